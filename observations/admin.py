@@ -4,8 +4,10 @@ from django import forms
 from django.contrib import messages
 from django.contrib.admin import ModelAdmin, StackedInline, TabularInline, register
 from django.contrib.admin.filters import DateFieldListFilter, RelatedFieldListFilter, SimpleListFilter
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import GEOSGeometry
+from django.db.models import Prefetch
 from django.shortcuts import redirect, render
 from django.urls import path, reverse
 from django.utils.safestring import mark_safe
@@ -23,8 +25,10 @@ from .models import (
     AnimalEncounter,
     Area,
     Campaign,
+    CampaignAdoptionJob,
     DisturbanceObservation,
     Encounter,
+    ExportJob,
     HatchlingMorphometricObservation,
     LightSourceObservation,
     LineTransectEncounter,
@@ -32,6 +36,9 @@ from .models import (
     ManagementAction,
     MediaAttachment,
     NestTagObservation,
+    OdkFailedSubmission,
+    OdkImportJob,
+    OdkSyncCursor,
     Survey,
     SurveyMediaAttachment,
     TagObservation,
@@ -70,6 +77,16 @@ class SiteFilter(RelatedFieldListFilter):
         return field.get_choices(include_blank=False, limit_choices_to={"area_type": Area.AREATYPE_SITE}, ordering=ordering)
 
 
+class EncounterChangeList(ChangeList):
+    """A changelist reading encounters with their child tables joined in one query (see TypedQuerySet.typed()),
+    instead of one more query per child model. As with polymorphic querysets, each encounter is listed (and passed
+    to admin actions) as an instance of its child model.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).typed()
+
+
 class MediaAttachmentInline(TabularInline):
     extra = 0
     exclude = ("source_id",)
@@ -255,6 +272,10 @@ class ObservationAdminMixin(VersionAdmin, ModelAdmin):
         else:
             return False
 
+    def get_queryset(self, request):
+        # Fetch each observation's encounter as its child model in one query, rather than polymorphically.
+        return super().get_queryset(request).prefetch_related(Prefetch("encounter", queryset=Encounter.objects.typed()))
+
     def area(self, obj):
         return obj.encounter.area
 
@@ -902,6 +923,7 @@ class SurveyAdmin(ExportActionMixin, FSMTransitionMixin, LeafletGeoAdmin, Versio
         "end_comments",
         "status",
         "production",
+        "duplicates",
         "owner",
     )
     list_filter = (
@@ -925,7 +947,7 @@ class SurveyAdmin(ExportActionMixin, FSMTransitionMixin, LeafletGeoAdmin, Versio
     form = s2form(Survey, attrs=S2ATTRS)
     formfield_overrides = FORMFIELD_OVERRIDES
     fsm_field = ["status"]
-    actions = ["merge_user"]
+    actions = ["merge_user", "close_duplicates"]
     resource_classes = [SurveyResource]
     fieldsets = (
         (
@@ -1024,6 +1046,24 @@ class SurveyAdmin(ExportActionMixin, FSMTransitionMixin, LeafletGeoAdmin, Versio
 
     owner.short_description = "Data Owner"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_duplicate_counts()
+
+    def duplicates(self, obj):
+        return obj.duplicate_count
+
+    duplicates.short_description = "Duplicates"
+    duplicates.admin_order_field = "duplicate_count"
+
+    def close_duplicates(self, request, queryset):
+        """A custom action to close the duplicates of the selected production surveys, e.g. of a whole season."""
+        msgs = queryset.close_duplicates(actor=request.user)
+        for msg in msgs:
+            messages.info(request, msg)
+        messages.success(request, f"Closed the duplicates of {len(msgs)} selected survey(s)")
+
+    close_duplicates.short_description = "Close duplicates of selected production surveys"
+
 
 class AreaGeoJSONImportForm(forms.Form):
     file = forms.FileField(help_text="Only support GeoJSON (.geojson/.json)")
@@ -1231,6 +1271,7 @@ class CampaignAdmin(ModelAdmin):
     )
     date_hierarchy = "start_time"
     form = s2form(Campaign, attrs=S2ATTRS)
+    actions = ["adopt_records"]
 
     def get_queryset(self, request):
         return (
@@ -1279,6 +1320,14 @@ class CampaignAdmin(ModelAdmin):
         else:
             return False
 
+    def adopt_records(self, request, queryset):
+        """A custom action to queue the adoption of the Surveys and Encounters within the selected campaigns."""
+        queryset = queryset.exclude(destination=None).exclude(start_time=None).exclude(end_time=None)
+        jobs = [campaign.queue_adoption() for campaign in queryset]
+        messages.success(request, f"Queued adoption jobs for {len(jobs)} selected campaign(s)")
+
+    adopt_records.short_description = "Adopt surveys and encounters within selected campaigns"
+
 
 @register(Encounter)
 class EncounterAdmin(FSMTransitionMixin, LeafletGeoAdmin, VersionAdmin):
@@ -1420,6 +1469,9 @@ class EncounterAdmin(FSMTransitionMixin, LeafletGeoAdmin, VersionAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).prefetch_related("observer", "reporter", "area", "site", "campaign")
 
+    def get_changelist(self, request, **kwargs):
+        return EncounterChangeList
+
     def name_link(self, obj):
         """List other encounters with the same subject."""
         return mark_safe(
@@ -1480,10 +1532,10 @@ class EncounterAdmin(FSMTransitionMixin, LeafletGeoAdmin, VersionAdmin):
 
 def curate_encounter(modeladmin, request, queryset):
     """A custom action to allow record status to be marked as curated."""
-    for obj in queryset:
-        obj.curate(by=request.user, description="Curated record as trustworthy")
-        obj.save()
-    messages.success(request, "Curated selected encounter(s) as trustworthy")
+    counts = queryset.bulk_transition("curate", by=request.user, description="Curated record as trustworthy")
+    messages.success(request, f"Curated {counts.transitioned} selected encounter(s) as trustworthy")
+    if counts.skipped:
+        messages.warning(request, f"Skipped {counts.skipped} selected encounter(s) which can't be curated from their QA status")
 
 
 curate_encounter.short_description = "Curate selected encounter records as trustworthy"
@@ -1491,10 +1543,10 @@ curate_encounter.short_description = "Curate selected encounter records as trust
 
 def flag_encounter(modeladmin, request, queryset):
     """A custom action to allow record status to be marked as flagged."""
-    for obj in queryset:
-        obj.flag(by=request.user, description="Flagged record as untrustworthy")
-        obj.save()
-    messages.warning(request, "Flagged selected encounter(s) as untrustworthy")
+    counts = queryset.bulk_transition("flag", by=request.user, description="Flagged record as untrustworthy")
+    messages.warning(request, f"Flagged {counts.transitioned} selected encounter(s) as untrustworthy")
+    if counts.skipped:
+        messages.warning(request, f"Skipped {counts.skipped} selected encounter(s) which can't be flagged from their QA status")
 
 
 flag_encounter.short_description = "Flag selected encounter records as untrustworthy"
@@ -1502,10 +1554,10 @@ flag_encounter.short_description = "Flag selected encounter records as untrustwo
 
 def reject_encounter(modeladmin, request, queryset):
     """A custom action to allow record status to be marked as rejected."""
-    for obj in queryset:
-        obj.reject(by=request.user, description="Reject record as unusable")
-        obj.save()
-    messages.warning(request, "Rejected selected encounter(s) as unusable")
+    counts = queryset.bulk_transition("reject", by=request.user, description="Reject record as unusable")
+    messages.warning(request, f"Rejected {counts.transitioned} selected encounter(s) as unusable")
+    if counts.skipped:
+        messages.warning(request, f"Skipped {counts.skipped} selected encounter(s) which can't be rejected from their QA status")
 
 
 reject_encounter.short_description = "Reject selected encounter records as unusable"
@@ -1833,3 +1885,43 @@ class LineTransectEncounterAdmin(ExportActionMixin, EncounterAdmin):
                 "site",
             )
         )
+
+
+@register(OdkSyncCursor)
+class OdkSyncCursorAdmin(ModelAdmin):
+    list_display = ("form_id", "project_id", "synced_to", "last_run")
+    list_filter = ("project_id",)
+    readonly_fields = ("last_run",)
+
+
+@register(OdkFailedSubmission)
+class OdkFailedSubmissionAdmin(ModelAdmin):
+    list_display = ("instance_id", "form_id", "project_id", "first_failed", "last_failed", "attempts")
+    list_filter = ("project_id", "form_id")
+    search_fields = ("instance_id",)
+    readonly_fields = ("first_failed", "last_failed", "attempts")
+
+
+@register(OdkImportJob)
+class OdkImportJobAdmin(ModelAdmin):
+    date_hierarchy = "created"
+    list_display = ("form_id", "status", "created", "started", "finished", "attempts", "submissions", "failures")
+    list_filter = ("status", "form_id")
+    readonly_fields = ("created", "started", "finished", "attempts", "submissions", "failures", "error")
+
+
+@register(CampaignAdoptionJob)
+class CampaignAdoptionJobAdmin(ModelAdmin):
+    date_hierarchy = "created"
+    list_display = ("campaign", "status", "created", "started", "finished", "attempts", "surveys", "encounters")
+    list_filter = ("status",)
+    readonly_fields = ("created", "started", "finished", "attempts", "surveys", "encounters", "error")
+
+
+@register(ExportJob)
+class ExportJobAdmin(ModelAdmin):
+    date_hierarchy = "created"
+    list_display = ("filename", "user", "status", "created", "started", "finished", "attempts")
+    list_filter = ("status", "exporter")
+    raw_id_fields = ("user",)
+    readonly_fields = ("created", "started", "finished", "attempts", "filter_hash", "fingerprint", "error")
@@ -1,13 +1,16 @@
-import datetime
-import json
-from typing import Any
+import gzip
+import os
+import tempfile
+import zlib
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.gis.geos import Point
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection
-from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views.generic.base import View
 
 from wastd.utils import DetailResourceView, ListResourceView
@@ -22,6 +25,7 @@ from .models import (
     LoggerObservation,
     MediaAttachment,
     NestTagObservation,
+    NestTrackReport,
     Survey,
     SurveyMediaAttachment,
     TurtleHatchlingEmergenceObservation,
@@ -74,6 +78,7 @@ class ObservationsResourceSummary(View):
             ("turtle-hatchling-emergence-outlier-observation", "turtle_hatchling_emergence_outlier_observation_list_resource"),
             ("light-source-observation", "light_source_observation_list_resource"),
             ("disturbance-observation", "disturbance_observation_list_resource"),
+            ("nests-and-tracks", "nestAndTracks"),
         ]
         endpoints = []
 
@@ -335,139 +340,84 @@ class DisturbanceObservationDetailResource(LoginRequiredMixin, DetailResourceVie
     serializer = DisturbanceObservationSerializer
 
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, o: Any) -> Any:
-        if isinstance(o, datetime.datetime):
-            return o.isoformat()
-        return super().default(o)
-
-
-def stream_data(query):
-    with connection.cursor() as cursor:
-        cursor.execute(query)
-
-        # Get column names from cursor.description
-        columns = [col[0] for col in cursor.description]
+def stream_data(query, params=None, chunk_size=2000):
+    """Stream the rows of an SQL query returning a single column of JSON text, as a JSON array.
+    Rows are read in chunks from a named server-side cursor, and the text is passed straight through.
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(query, params)
 
         yield "["  # Start of JSON array
-        first_row = True
-        row = cursor.fetchone()
-        while row:
-            if not first_row:
-                yield ","
-            else:
-                first_row = False
+        first_chunk = True
+        while rows := cursor.fetchmany(chunk_size):
+            chunk = ",".join(row[0] for row in rows)
+            yield chunk if first_chunk else "," + chunk
+            first_chunk = False
+        yield "]"  # End of JSON array
 
-            # Convert row data to dictionary with column names as keys
-            row_dict = dict(zip(columns, row))
 
-            # Convert the dictionary to JSON and yield
-            yield json.dumps(row_dict, cls=DateTimeEncoder)
+def gzip_stream(chunks):
+    """Compress a stream of text chunks in the gzip format."""
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 writes a gzip header and trailer.
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
 
-            row = cursor.fetchone()
-        yield "]"  # End of JSON array
+
+def nests_tracks_query():
+    """Return the nests and tracks feed SQL query, which reads the NestTrackReport table (one row per encounter).
+    Each row is rendered as a JSON object by PostgreSQL.
+    """
+    columns = ", ".join(f'"{column}"' for column in NestTrackReport.report_columns())
+    return f'SELECT row_to_json(r)::text FROM (SELECT {columns} FROM "{NestTrackReport._meta.db_table}" ORDER BY "when" DESC) r'
 
 
-def nests_tracks_streaming_json():
-    """This view streams the database query as JSON for use by external tools such as PowerBI."""
-    query = """
-SELECT
-    e."id" as encounter_id,
-    e."status",
-    org."label" AS "data_owner",
-    TO_CHAR(e."when" AT TIME ZONE \'Australia/Perth\', \'YYYY-MM-DD\') AS "date",
-    TO_CHAR(e."when" AT TIME ZONE \'Australia/Perth\', \'HH24:MI:SS\') AS "time",
-    CASE
-        WHEN EXTRACT(HOUR FROM e."when" AT TIME ZONE \'Australia/Perth\') < 12 THEN
-            TO_CHAR(e."when" AT TIME ZONE \'Australia/Perth\' - INTERVAL \'1 day\', \'YYYY-MM-DD\')
-        ELSE
-            TO_CHAR(e."when" AT TIME ZONE \'Australia/Perth\', \'YYYY-MM-DD\')
-    END AS "turtle_date",
-    site."name" AS "site_name",
-    ST_Y(e."where") as latitude,
-    ST_X(e."where") as longitude,
-    area."name" AS "area_name",
-    e."name" AS encounter_name,
-    obs."name" AS "observer",
-    rep."name" AS "reporter",
-    e."encounter_type",
-    e."comments",
-    t."nest_age",
-    t."nest_type",
-    t."species",
-    t."habitat",
-    t."disturbance",
-    t."nest_tagged",
-    t."logger_found",
-    t."eggs_counted",
-    t."hatchlings_measured",
-    t."fan_angles_measured",
-    n."eggs_laid",
-    n."egg_count",
-    n."no_egg_shells",
-    n."no_live_hatchlings_neck_of_nest",
-    n."no_live_hatchlings",
-    n."no_dead_hatchlings",
-    n."no_undeveloped_eggs",
-    n."no_unhatched_eggs",
-    n."no_unhatched_term",
-    n."no_depredated_eggs",
-    n."nest_depth_top",
-    n."nest_depth_bottom",
-    n."sand_temp",
-    n."air_temp",
-    n."water_temp",
-    n."egg_temp",
-    n."comments" AS "turtle_observation_comments",
-    tag."comments" AS "tag_observation_comments",
-    hatch."bearing_to_water_degrees",
-    hatch."bearing_leftmost_track_degrees",
-    hatch."bearing_rightmost_track_degrees",
-    hatch."no_tracks_main_group_max",
-    hatch."outlier_tracks_present",
-    hatch."path_to_sea_comments",
-    hatch."hatchling_emergence_time_known",
-    hatch."hatchling_emergence_time",
-    hatch."hatchling_emergence_time_accuracy",
-    hatch."cloud_cover_at_emergence_known",
-    hatch."cloud_cover_at_emergence",
-    tag."status" AS "nest_tag_status",
-    tag."flipper_tag_id",
-    TO_CHAR(tag."date_nest_laid" AT TIME ZONE \'Australia/Perth\', \'YYYY-MM-DD\') AS "date_nest_laid",
-    tag."tag_label"
-FROM
-    "observations_turtlenestencounter" t
-INNER JOIN
-    "observations_encounter" e ON (t."encounter_ptr_id" = e."id")
-LEFT JOIN
-    "observations_area" area ON (e."area_id" = area."id")
-LEFT JOIN
-    "observations_area" site ON (e."site_id" = site."id")
-LEFT JOIN
-    "observations_survey" survey ON (e."survey_id" = survey."id")
-LEFT JOIN
-    "users_user" obs ON (e."observer_id" = obs."id")
-LEFT JOIN
-    "users_user" rep ON (e."reporter_id" = rep."id")
-LEFT JOIN
-    "observations_observation" o ON (e."id" = o."encounter_id" AND o."polymorphic_ctype_id" IN (26))
-LEFT JOIN
-    "observations_turtlenestobservation" n ON (o."id" = n."observation_ptr_id")
-LEFT JOIN
-    "observations_observation" obs_tag ON (e."id" = obs_tag."encounter_id" AND obs_tag."polymorphic_ctype_id" IN (38))
-LEFT JOIN
-    "observations_nesttagobservation" tag ON (obs_tag."id" = tag."observation_ptr_id")
-LEFT JOIN
-    "observations_observation" obs_hatch ON (e."id" = obs_hatch."encounter_id" AND obs_hatch."polymorphic_ctype_id" IN (279))
-LEFT JOIN
-    "observations_turtlehatchlingemergenceobservation" hatch ON (obs_hatch."id" = hatch."observation_ptr_id")
-LEFT JOIN
-  "observations_campaign" c ON (e."campaign_id" = c."id")
-LEFT JOIN
-  "users_organisation" org ON (c."owner_id" = org."id")
-ORDER BY
-    e."when" DESC
+def write_nests_tracks_snapshot(path=None):
+    """Write the nests and tracks feed to a gzipped JSON file (by default, the NESTS_TRACKS_SNAPSHOT setting).
+    The file is written to a temporary path and then moved into place, so that readers never see a partial file.
+    """
+    path = path or settings.NESTS_TRACKS_SNAPSHOT
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    NestTrackReport.refresh()
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as snapshot:
+        try:
+            for data in gzip_stream(stream_data(nests_tracks_query())):
+                snapshot.write(data)
+        except:
+            os.unlink(snapshot.name)
+            raise
+    os.replace(snapshot.name, path)
+    return path
+
+
+class NestsTracksResource(LoginRequiredMixin, View):
+    """Stream the nests and tracks feed as JSON, for use by external tools such as PowerBI.
+    If the NESTS_TRACKS_SNAPSHOT setting is set and the snapshot file exists, it is served instead of querying
+    the database (pass `live=true` to bypass it). Responses are gzipped if the client accepts it.
+    Live data is read from the NestTrackReport table as of its last refresh (by the odk_download_turtle_forms and
+    refresh_nest_track_report management commands), so that requests don't write to the database.
     """
 
-    response = StreamingHttpResponse(stream_data(query), content_type="application/json")
-    return response
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+        snapshot = settings.NESTS_TRACKS_SNAPSHOT
+        if snapshot and os.path.exists(snapshot) and request.GET.get("live") != "true":
+            if accepts_gzip:
+                response = FileResponse(open(snapshot, "rb"), content_type="application/json")
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = FileResponse(gzip.open(snapshot, "rb"), content_type="application/json")
+        else:
+            chunks = stream_data(nests_tracks_query())
+            if accepts_gzip:
+                response = StreamingHttpResponse(gzip_stream(chunks), content_type="application/json")
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = StreamingHttpResponse(chunks, content_type="application/json")
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files import File
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ExportJob
+
+LOGGER = logging.getLogger("turtles")
+
+
+def export_parameters(view):
+    """Return the GET parameters of an export request as a dict of sorted lists, without the parameter
+    that requests an export job.
+    """
+    return {key: sorted(values) for key, values in sorted(view.request.GET.lists()) if key != view.export_job_parameter}
+
+
+def export_filter_hash(exporter, parameters, user=None):
+    """Return a hash identifying identical export requests."""
+    key = json.dumps([exporter, parameters, user.pk if user else None], sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def submit_export_job(view):
+    """Return an export job for the passed-in export view's request: a job completed within the last
+    EXPORT_JOB_MAX_AGE minutes (or still queued or running) for an identical request and unchanged data,
+    or else a newly queued job.
+    Views whose fingerprint can't detect changes to the exported data set `export_job_reuse = False`: only a
+    job which is still queued (so has not yet read any data) is returned for those.
+    """
+    exporter = f"{type(view).__module__}.{type(view).__qualname__}"
+    parameters = export_parameters(view)
+    user = view.request.user if view.request.user.is_authenticated else None
+    per_user = getattr(view, "export_job_per_user", False)
+    filter_hash = export_filter_hash(exporter, parameters, user if per_user else None)
+    fingerprint = view.get_export_fingerprint()
+
+    jobs = ExportJob.objects.filter(filter_hash=filter_hash, fingerprint=fingerprint)
+    if getattr(view, "export_job_reuse", True):
+        completed = jobs.filter(
+            status=ExportJob.STATUS_COMPLETED,
+            finished__gte=timezone.now() - timedelta(minutes=settings.EXPORT_JOB_MAX_AGE),
+        ).exclude(file="")
+        job = completed.first() or jobs.filter(status__in=[ExportJob.STATUS_QUEUED, ExportJob.STATUS_RUNNING]).first()
+    else:
+        job = jobs.filter(status=ExportJob.STATUS_QUEUED).first()
+    if job:
+        return job
+    return ExportJob.objects.create(
+        user=user,
+        exporter=exporter,
+        parameters=parameters,
+        per_user=per_user,
+        filter_hash=filter_hash,
+        fingerprint=fingerprint,
+        filename=view.get_export_filename(),
+    )
+
+
+def get_export_view(job):
+    """Return an instance of the job's export view, set up with a GET request having the job's parameters."""
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(mutable=True)
+    for key, values in job.parameters.items():
+        request.GET.setlist(key, values)
+    request.user = job.user or AnonymousUser()
+    view = import_string(job.exporter)()
+    view.setup(request)
+    return view
+
+
+def claim_export_job():
+    """Mark the oldest queued export job as running and return its pk, or None if no jobs are queued.
+    Jobs locked by another worker are skipped.
+    """
+    with transaction.atomic():
+        job_id = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ExportJob.STATUS_QUEUED)
+            .order_by("created")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if job_id:
+            ExportJob.objects.filter(pk=job_id).update(status=ExportJob.STATUS_RUNNING)
+    return job_id
+
+
+def delete_expired_export_jobs():
+    """Delete the export jobs created more than EXPORT_JOB_RETENTION_DAYS days ago, other than running jobs.
+    Export files are deleted with their jobs (see the ExportJob post_delete signal). Returns the number of jobs deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.EXPORT_JOB_RETENTION_DAYS)
+    deleted, _ = ExportJob.objects.filter(created__lt=cutoff).exclude(status=ExportJob.STATUS_RUNNING).delete()
+    if deleted:
+        LOGGER.info(f"Deleted {deleted} expired export jobs")
+    return deleted
+
+
+def run_export_job(job_id):
+    """Run an ExportJob in this process, writing the export file to media storage and recording the job's
+    status and timings. Returns the job status.
+    """
+    job = ExportJob.objects.get(pk=job_id)
+    job.start()
+    LOGGER.info(f"Running export job {job.pk}: {job.exporter} {job.parameters}")
+    try:
+        view = get_export_view(job)
+        with tempfile.TemporaryFile() as export_file:
+            view.write_export(export_file)
+            export_file.seek(0)
+            job.file.save(job.filename, File(export_file), save=False)
+    except Exception:
+        LOGGER.exception(f"An error occurred during export job {job.pk}")
+        job.fail(traceback.format_exc())
+    else:
+        job.complete()
+    LOGGER.info(f"Export job {job.pk} {job.status} in {job.duration}")
+    return job.status
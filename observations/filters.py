@@ -4,6 +4,7 @@ from django_filters.filters import (
     DateFilter,
     ChoiceFilter,
     ModelChoiceFilter,
+    NumberFilter,
 )
 from users.models import User
 from wastd.utils import FILTER_OVERRIDES
@@ -188,6 +189,10 @@ class TurtleNestEncounterFilter(FilterSet):
         label="Date to",
         input_formats=settings.DATE_INPUT_FORMATS,
     )
+    season = NumberFilter(
+        field_name="season",
+        label="Season (start year)",
+    )
     user_observer = ModelChoiceFilter(
         field_name="observer",
         label="Observed by",
@@ -246,6 +251,7 @@ class TurtleNestEncounterFilter(FilterSet):
             "status",
             "date_from",
             "date_to",
+            "season",
             "user_observer",
             # "user_reporter",
             "encounter_type",
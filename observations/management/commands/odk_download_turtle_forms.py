@@ -1,14 +1,12 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
 import logging
-from observations.odk import (
-    import_turtle_track_or_nest,
-    import_site_visit_start,
-    import_site_visit_end,
-    import_marine_wildlife_incident,
-    import_turtle_sighting,
-    import_turtle_track_or_nest_simple,
-    import_predator_or_disturbance,
-)
+import multiprocessing
+from observations.api import write_nests_tracks_snapshot
+from observations.models import NestTrackReport, OdkImportJob
+from observations.odk import IMPORT_FUNCTIONS, IMPORT_STAGES, run_import_job
 from wastd.odk import get_auth_headers
 
 
@@ -34,49 +32,112 @@ class Command(BaseCommand):
             dest="duration",
         )
 
+        parser.add_argument(
+            "--max-workers",
+            action="store",
+            default=None,
+            type=int,
+            help="Maximum number of concurrent requests to ODK Central (default: ODK_API_MAX_WORKERS setting)",
+            dest="max_workers",
+        )
+
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Request all form submissions from ODK Central, instead of only those created or updated since the previous run",
+            dest="full",
+        )
+
+        parser.add_argument(
+            "--xml",
+            action="store_true",
+            help="Download each form submission individually as XML, instead of in pages from the OData feed",
+            dest="xml",
+        )
+
+        parser.add_argument(
+            "--form",
+            action="append",
+            choices=list(IMPORT_FUNCTIONS),
+            help="Import only this ODK form (may be repeated)",
+            dest="forms",
+        )
+
+        parser.add_argument(
+            "--parallel",
+            action="store",
+            default=1,
+            type=int,
+            help="Number of worker processes used to import independent forms concurrently (default: 1)",
+            dest="parallel",
+        )
+
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Re-run only those forms whose most recent import job failed",
+            dest="retry_failed",
+        )
+
+    def get_jobs(self, forms, retry_failed):
+        """Return a list of OdkImportJob objects to run for the passed-in forms.
+        If `retry_failed` is True, the most recent failed job for each form is re-run instead.
+        """
+        if not retry_failed:
+            return [OdkImportJob.objects.create(form_id=form_id) for form_id in forms]
+        jobs = []
+        for form_id in forms:
+            job = OdkImportJob.objects.filter(form_id=form_id).first()
+            if job and job.status == OdkImportJob.STATUS_FAILED:
+                jobs.append(job)
+        return jobs
+
     def handle(self, *args, **options):
         logger = logging.getLogger("turtles")
         logger.info("Downloading auth headers")
         auth_headers = get_auth_headers()
+        kwargs = {
+            "auth_headers": auth_headers,
+            "max_workers": options["max_workers"],
+            "incremental": not options["full"],
+            "odata": not options["xml"],
+        }
+        form_kwargs = {
+            "site_visit_start": {"initial_duration_hr": options["initial_duration"]},
+            "site_visit_end": {"duration_hr": options["duration"]},
+        }
+        forms = options["forms"] or list(IMPORT_FUNCTIONS)
 
-        logger.info("Downloading data from Turtle Track or Nest form")
-        try:
-            import_turtle_track_or_nest(auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Turtle Track or Nest")
-
-        logger.info("Downloading data from Simple Turtle Track or Nest form")
-        try:
-            import_turtle_track_or_nest_simple(auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Simple Turtle Track or Nest")
-
-        logger.info("Downloading data from Site Visit Start form")
-        try:
-            import_site_visit_start(initial_duration_hr=options["initial_duration"], auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Site Visit Start")
+        for stage in IMPORT_STAGES:
+            jobs = self.get_jobs([form_id for form_id in stage if form_id in forms], options["retry_failed"])
+            if not jobs:
+                continue
 
-        logger.info("Downloading data from Site Visit End form, linking encounters")
-        try:
-            import_site_visit_end(duration_hr=options["duration"], auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Site Visit End")
+            if options["parallel"] > 1 and len(jobs) > 1:
+                # Database connections must not be shared with the forked worker processes.
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=min(options["parallel"], len(jobs)), mp_context=multiprocessing.get_context("fork")
+                ) as executor:
+                    futures = [executor.submit(run_import_job, job.pk, **kwargs, **form_kwargs.get(job.form_id, {})) for job in jobs]
+                    for future in futures:
+                        future.result()
+            else:
+                for job in jobs:
+                    run_import_job(job.pk, **kwargs, **form_kwargs.get(job.form_id, {}))
 
-        logger.info("Downloading data from Marine Wildlife Incident form")
-        try:
-            import_marine_wildlife_incident(auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Marine Wildlife Incident")
+        for job in OdkImportJob.objects.filter(form_id__in=forms).order_by("form_id", "-created").distinct("form_id"):
+            logger.info(f"{job.form_id}: {job.status}, {job.imported}/{job.submissions} submissions imported in {job.duration}")
 
-        logger.info("Downloading data from Turtle Sighting form")
+        logger.info("Refreshing the nest/track report")
         try:
-            import_turtle_sighting(auth_headers=auth_headers)
+            NestTrackReport.refresh()
         except:
-            logger.exception("An error occurred during import of Turtle Sighting")
+            logger.exception("An error occurred while refreshing the nest/track report")
 
-        logger.info("Downloading data from Predator or Disturbance form")
-        try:
-            import_predator_or_disturbance(auth_headers=auth_headers)
-        except:
-            logger.exception("An error occurred during import of Predator or Disturbance")
+        if settings.NESTS_TRACKS_SNAPSHOT:
+            logger.info("Refreshing the nests and tracks feed snapshot")
+            try:
+                write_nests_tracks_snapshot()
+            except:
+                logger.exception("An error occurred while writing the nests and tracks feed snapshot")
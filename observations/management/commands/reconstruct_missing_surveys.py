@@ -1,10 +1,14 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+import logging
+import time
+
 from observations.utils import reconstruct_missing_surveys
 
 
 class Command(BaseCommand):
     help = """Find Encounters with missing survey but existing site,
-group by date and site, aggregate datetime ("when") into earliest and latest record,
+group by site and local date, aggregate datetime ("when") into earliest and latest record,
 buffer earliest and latest record by given minutes (default: 30),
 create a Survey with aggregated data."""
 
@@ -17,6 +21,20 @@ create a Survey with aggregated data."""
             help="Number of minutes to buffer start and end time for a reconstructed survey",
             dest="buffer_mins",
         )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the number of surveys which would be created and the time taken, then roll back all changes",
+            dest="dry_run",
+        )
 
     def handle(self, *args, **options):
-        reconstruct_missing_surveys(options["buffer_mins"])
+        logger = logging.getLogger("turtles")
+        start = time.perf_counter()
+        with transaction.atomic():
+            surveys, encounters = reconstruct_missing_surveys(options["buffer_mins"])
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+        logger.info(f"Reconstructed {surveys} surveys for {encounters} encounters in {time.perf_counter() - start:.2f}s")
+        if options["dry_run"]:
+            logger.info("Dry run: all changes have been rolled back")
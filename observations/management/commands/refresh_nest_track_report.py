@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+import logging
+
+from observations.models import NestTrackReport
+
+
+class Command(BaseCommand):
+    help = "Refreshes the nest/track reporting table for turtle nest encounters changed since the last refresh"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Refresh the rows of all turtle nest encounters (e.g. after the report query has changed)",
+            dest="full",
+        )
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("turtles")
+        refreshed = NestTrackReport.refresh(full=options["full"])
+        logger.info(f"Refreshed {refreshed} nest/track report rows")
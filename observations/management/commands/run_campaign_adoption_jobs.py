@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+import logging
+import time
+
+from observations.models import Campaign
+from observations.utils import claim_campaign_adoption_job, run_campaign_adoption_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued campaign adoption jobs, linking the Surveys and Encounters within each Campaign to it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Queue an adoption job for every Campaign with a destination and time range before running the queue",
+            dest="all",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for queued adoption jobs, instead of exiting once the queue is empty",
+            dest="loop",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=10,
+            help="Number of seconds to wait between polls of the queue, with --loop (default 10)",
+            dest="interval",
+        )
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("turtles")
+        if options["all"]:
+            campaigns = Campaign.objects.exclude(destination=None).exclude(start_time=None).exclude(end_time=None)
+            for campaign in campaigns:
+                campaign.queue_adoption()
+            logger.info(f"Queued adoption jobs for {len(campaigns)} campaigns")
+        while True:
+            while job_id := claim_campaign_adoption_job():
+                run_campaign_adoption_job(job_id)
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        logger.info("No queued campaign adoption jobs")
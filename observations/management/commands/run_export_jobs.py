@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+import logging
+import time
+
+from observations.exports import claim_export_job, delete_expired_export_jobs, run_export_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued export jobs, writing each export file to media storage, and deletes expired export jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for queued export jobs, instead of exiting once the queue is empty",
+            dest="loop",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=10,
+            help="Number of seconds to wait between polls of the queue, with --loop (default 10)",
+            dest="interval",
+        )
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("turtles")
+        while True:
+            delete_expired_export_jobs()
+            while job_id := claim_export_job():
+                run_export_job(job_id)
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        logger.info("No queued export jobs")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.15 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0016_alter_animalencounter_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdkSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.CharField(max_length=64, verbose_name='ODK project ID')),
+                ('form_id', models.CharField(max_length=256, verbose_name='ODK form ID')),
+                ('synced_to', models.DateTimeField(blank=True, help_text='The latest submission created/updated timestamp seen in ODK Central for this form.', null=True)),
+                ('last_run', models.DateTimeField(blank=True, help_text='The time that this cursor was last advanced.', null=True)),
+            ],
+            options={
+                'verbose_name': 'ODK sync cursor',
+                'unique_together': {('project_id', 'form_id')},
+            },
+        ),
+    ]
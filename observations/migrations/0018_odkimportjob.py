@@ -0,0 +1,32 @@
+# Generated by Django 5.2.15 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0017_odksynccursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdkImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='The number of times that this job has been started.')),
+                ('error', models.TextField(blank=True, help_text='The exception raised by the most recent failed attempt.', null=True)),
+                ('form_id', models.CharField(db_index=True, max_length=256, verbose_name='ODK form ID')),
+                ('submissions', models.PositiveIntegerField(default=0, help_text='The number of new submissions downloaded from ODK Central.')),
+                ('failures', models.PositiveIntegerField(default=0, help_text='The number of downloaded submissions that could not be imported.')),
+            ],
+            options={
+                'verbose_name': 'ODK import job',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
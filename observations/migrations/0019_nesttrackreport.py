@@ -0,0 +1,98 @@
+# Generated by Django 5.2.15 on 2026-10-18 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0018_odkimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NestTrackReportQueue',
+            fields=[
+                ('encounter_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'nest/track report queue entry',
+                'verbose_name_plural': 'nest/track report queue',
+            },
+        ),
+        migrations.CreateModel(
+            name='NestTrackReport',
+            fields=[
+                ('encounter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='report', serialize=False, to='observations.turtlenestencounter')),
+                ('when', models.DateTimeField(db_index=True)),
+                ('status', models.TextField(blank=True, null=True)),
+                ('data_owner', models.TextField(blank=True, null=True)),
+                ('date', models.CharField(blank=True, help_text='Local date (YYYY-MM-DD).', max_length=10, null=True)),
+                ('time', models.CharField(blank=True, help_text='Local time (HH:MM:SS).', max_length=8, null=True)),
+                ('turtle_date', models.CharField(blank=True, help_text='Local date of the night the encounter belongs to (before midday counts as the previous night).', max_length=10, null=True)),
+                ('site_name', models.TextField(blank=True, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('area_name', models.TextField(blank=True, null=True)),
+                ('encounter_name', models.TextField(blank=True, null=True)),
+                ('observer', models.TextField(blank=True, null=True)),
+                ('reporter', models.TextField(blank=True, null=True)),
+                ('encounter_type', models.TextField(blank=True, null=True)),
+                ('comments', models.TextField(blank=True, null=True)),
+                ('nest_age', models.TextField(blank=True, null=True)),
+                ('nest_type', models.TextField(blank=True, null=True)),
+                ('species', models.TextField(blank=True, null=True)),
+                ('habitat', models.TextField(blank=True, null=True)),
+                ('disturbance', models.TextField(blank=True, null=True)),
+                ('nest_tagged', models.TextField(blank=True, null=True)),
+                ('logger_found', models.TextField(blank=True, null=True)),
+                ('eggs_counted', models.TextField(blank=True, null=True)),
+                ('hatchlings_measured', models.TextField(blank=True, null=True)),
+                ('fan_angles_measured', models.TextField(blank=True, null=True)),
+                ('eggs_laid', models.BooleanField(blank=True, null=True)),
+                ('egg_count', models.IntegerField(blank=True, null=True)),
+                ('no_egg_shells', models.IntegerField(blank=True, null=True)),
+                ('no_live_hatchlings_neck_of_nest', models.IntegerField(blank=True, null=True)),
+                ('no_live_hatchlings', models.IntegerField(blank=True, null=True)),
+                ('no_dead_hatchlings', models.IntegerField(blank=True, null=True)),
+                ('no_undeveloped_eggs', models.IntegerField(blank=True, null=True)),
+                ('no_unhatched_eggs', models.IntegerField(blank=True, null=True)),
+                ('no_unhatched_term', models.IntegerField(blank=True, null=True)),
+                ('no_depredated_eggs', models.IntegerField(blank=True, null=True)),
+                ('nest_depth_top', models.IntegerField(blank=True, null=True)),
+                ('nest_depth_bottom', models.IntegerField(blank=True, null=True)),
+                ('sand_temp', models.FloatField(blank=True, null=True)),
+                ('air_temp', models.FloatField(blank=True, null=True)),
+                ('water_temp', models.FloatField(blank=True, null=True)),
+                ('egg_temp', models.FloatField(blank=True, null=True)),
+                ('turtle_observation_comments', models.TextField(blank=True, null=True)),
+                ('tag_observation_comments', models.TextField(blank=True, null=True)),
+                ('bearing_to_water_degrees', models.FloatField(blank=True, null=True)),
+                ('bearing_leftmost_track_degrees', models.FloatField(blank=True, null=True)),
+                ('bearing_rightmost_track_degrees', models.FloatField(blank=True, null=True)),
+                ('no_tracks_main_group_max', models.IntegerField(blank=True, null=True)),
+                ('outlier_tracks_present', models.TextField(blank=True, null=True)),
+                ('path_to_sea_comments', models.TextField(blank=True, null=True)),
+                ('hatchling_emergence_time_known', models.TextField(blank=True, null=True)),
+                ('hatchling_emergence_time', models.DateTimeField(blank=True, null=True)),
+                ('hatchling_emergence_time_accuracy', models.TextField(blank=True, null=True)),
+                ('cloud_cover_at_emergence_known', models.TextField(blank=True, null=True)),
+                ('cloud_cover_at_emergence', models.IntegerField(blank=True, null=True)),
+                ('nest_tag_status', models.TextField(blank=True, null=True)),
+                ('flipper_tag_id', models.TextField(blank=True, null=True)),
+                ('date_nest_laid', models.CharField(blank=True, help_text='Local date (YYYY-MM-DD).', max_length=10, null=True)),
+                ('tag_label', models.TextField(blank=True, null=True)),
+                ('refreshed', models.DateTimeField(help_text='The time that this row was last refreshed.')),
+            ],
+            options={
+                'verbose_name': 'nest/track report',
+            },
+        ),
+        # Queue every existing encounter, so that the report is populated by the first refresh.
+        migrations.RunSQL(
+            sql='INSERT INTO "observations_nesttrackreportqueue" ("encounter_id", "queued") SELECT "encounter_ptr_id", NOW() FROM "observations_turtlenestencounter"',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
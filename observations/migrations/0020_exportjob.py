@@ -0,0 +1,39 @@
+# Generated by Django 5.2.15 on 2026-10-18 05:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0019_nesttrackreport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='The number of times that this job has been started.')),
+                ('error', models.TextField(blank=True, help_text='The exception raised by the most recent failed attempt.', null=True)),
+                ('exporter', models.CharField(help_text='The import path of the view class which writes the export.', max_length=256)),
+                ('parameters', models.JSONField(default=dict, help_text='The GET parameters of the export request (lists of values, keyed by parameter name).')),
+                ('per_user', models.BooleanField(default=False, help_text='Whether the export depends on the requesting user, and may only be downloaded by them.')),
+                ('filter_hash', models.CharField(db_index=True, help_text='A hash of the exporter, parameters and (for per-user exports) user.', max_length=64)),
+                ('fingerprint', models.CharField(blank=True, help_text='The state of the exported data when the export was requested.', max_length=256)),
+                ('filename', models.CharField(max_length=256)),
+                ('file', models.FileField(blank=True, max_length=512, null=True, upload_to='exports/%Y/%m/')),
+                ('user', models.ForeignKey(blank=True, help_text='The user who requested the export.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.15 on 2026-10-18 06:03
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0020_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['status', 'encounter_type'], name='encounter_status_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['area', 'when'], name='encounter_area_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['site', 'when'], name='encounter_site_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(models.F('site'), django.db.models.functions.datetime.TruncDate('start_time'), name='survey_site_start_date_idx'),
+        ),
+    ]
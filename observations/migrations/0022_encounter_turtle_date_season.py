@@ -0,0 +1,37 @@
+# Generated by Django 5.2.15 on 2026-10-18 06:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0021_encounter_survey_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='season',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, help_text='The season of the encounter, the start year of the fiscal year.', null=True),
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='turtle_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='The local date of the night the encounter belongs to (before midday counts as the previous night).', null=True),
+        ),
+        # Backfill in the local timezone, matching Encounter.get_turtle_date() and Encounter.get_season().
+        migrations.RunSQL(
+            sql=[(
+                """
+                UPDATE "observations_encounter" SET
+                    "turtle_date" = (("when" AT TIME ZONE %s) - INTERVAL '12 hours')::date,
+                    "season" = EXTRACT(YEAR FROM ("when" AT TIME ZONE %s) - INTERVAL '6 months')
+                WHERE "when" IS NOT NULL
+                """,
+                [settings.TIME_ZONE, settings.TIME_ZONE],
+            )],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
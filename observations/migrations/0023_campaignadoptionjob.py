@@ -0,0 +1,33 @@
+# Generated by Django 5.2.15 on 2026-10-18 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0022_encounter_turtle_date_season'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignAdoptionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='The number of times that this job has been started.')),
+                ('error', models.TextField(blank=True, help_text='The exception raised by the most recent failed attempt.', null=True)),
+                ('surveys', models.PositiveIntegerField(default=0, help_text='The number of Surveys moved into the Campaign.')),
+                ('encounters', models.PositiveIntegerField(default=0, help_text='The number of Encounters moved into the Campaign.')),
+                ('campaign', models.ForeignKey(help_text='The Campaign adopting its Surveys and Encounters.', on_delete=django.db.models.deletion.CASCADE, related_name='adoption_jobs', to='observations.campaign')),
+            ],
+            options={
+                'verbose_name': 'campaign adoption job',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.15 on 2026-10-18 14:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observations', '0023_campaignadoptionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdkFailedSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.CharField(max_length=64, verbose_name='ODK project ID')),
+                ('form_id', models.CharField(max_length=256, verbose_name='ODK form ID')),
+                ('instance_id', models.CharField(max_length=256, verbose_name='ODK instance ID')),
+                ('first_failed', models.DateTimeField(auto_now_add=True, help_text='The time that this submission first failed to import.')),
+                ('last_failed', models.DateTimeField(default=django.utils.timezone.now, help_text='The time that this submission most recently failed to import.')),
+                ('attempts', models.PositiveIntegerField(default=1, help_text='The number of imports which have failed to import this submission.')),
+            ],
+            options={
+                'verbose_name': 'ODK failed submission',
+                'unique_together': {('project_id', 'form_id', 'instance_id')},
+            },
+        ),
+        migrations.AlterField(
+            model_name='odkimportjob',
+            name='submissions',
+            field=models.PositiveIntegerField(default=0, help_text='The number of new (or retried) submissions downloaded from ODK Central.'),
+        ),
+        migrations.AlterField(
+            model_name='odkimportjob',
+            name='failures',
+            field=models.PositiveIntegerField(default=0, help_text='The number of new submissions that could not be imported.'),
+        ),
+    ]
@@ -21,19 +21,27 @@ from datetime import timedelta
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis.db import models
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import connection, transaction
+from django.db.models.functions import TruncDate
+from django.db.models.query import ModelIterable
 from django.template import loader
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
 from django_fsm import FSMField, transition
 from django_fsm_log.decorators import fsm_log_by, fsm_log_description
 from django_fsm_log.models import StateLog
+from polymorphic.managers import PolymorphicManager
 from polymorphic.models import PolymorphicModel
+from polymorphic.query import PolymorphicQuerySet
 from slugify import slugify
 
 from users.models import Organisation, User
-from wastd.utils import LegacySourceMixin, QualityControlMixin, UrlsMixin
+from wastd.utils import BulkTransitionMixin, BulkTransitionQuerySet, JobMixin, LegacySourceMixin, QualityControlMixin, UrlsMixin
 
 from . import lookups
 
@@ -59,6 +67,55 @@ def survey_media(instance, filename):
     return "survey/{}/{}".format(instance.survey.id, filename)
 
 
+def child_relations(model):
+    """Return the reverse one-to-one relations from a model to its direct child (multi-table inheritance) models."""
+    return [rel for rel in model._meta.related_objects if rel.one_to_one and rel.parent_link]
+
+
+class TypedModelIterable(ModelIterable):
+    """Yield each object as an instance of its child model, where the child table was joined by `typed()`."""
+
+    def __iter__(self):
+        select_related = self.queryset.query.select_related
+        if not isinstance(select_related, dict):
+            select_related = {}
+        relations = [rel for rel in child_relations(self.queryset.model) if rel.name in select_related]
+        for obj in super().__iter__():
+            for rel in relations:
+                child = rel.get_cached_value(obj, None)
+                if child is not None:
+                    obj = child
+                    break
+            yield obj
+
+
+class TypedQuerySet(PolymorphicQuerySet):
+    """A polymorphic queryset with cheaper alternatives for list views.
+
+    django-polymorphic fetches the base table rows, then runs one more query per child model present
+    to fetch the child objects. Where that isn't needed:
+
+    * `non_polymorphic()` reads the base table columns only, returning base model instances.
+    * `typed()` LEFT JOINs the child tables and returns child model instances, all in one query.
+    """
+
+    def typed(self, *models):
+        """Return a non-polymorphic queryset joining the tables of the passed child models (by default, all direct
+        child models), which yields each object as an instance of its child model.
+        Objects having a child model which isn't joined are returned as base model instances.
+        """
+        relations = [rel.name for rel in child_relations(self.model) if not models or rel.related_model in models]
+        queryset = self.non_polymorphic()
+        if relations:
+            # select_related() without arguments would follow every foreign key.
+            queryset = queryset.select_related(*relations)
+        queryset._iterable_class = TypedModelIterable
+        return queryset
+
+
+TypedManager = PolymorphicManager.from_queryset(TypedQuerySet)
+
+
 class Area(models.Model):
     """An area with a polygonal extent.
 
@@ -275,6 +332,18 @@ class Campaign(models.Model):
             "na" if not self.end_time else self.end_time.astimezone(settings.TZ).strftime("%Y-%m-%d"),
         )
 
+    def destination_filter(self):
+        """Return a filter for records at the Campaign's destination: records in the destination Locality,
+        or at a Site within it.
+
+        The Sites within the destination are looked up once, so that records are matched on their area and site
+        foreign keys instead of testing each record's location against the destination geometry.
+        """
+        site_ids = list(
+            Area.objects.filter(area_type=Area.AREATYPE_SITE, geom__coveredby=self.destination.geom).values_list("pk", flat=True)
+        )
+        return models.Q(area=self.destination) | models.Q(site__in=site_ids)
+
     @property
     def surveys(self):
         """Return a QuerySet of Surveys or None.
@@ -284,7 +353,7 @@ class Campaign(models.Model):
         """
         if self.destination and self.start_time and self.end_time:
             return Survey.objects.filter(
-                site__geom__coveredby=self.destination.geom,
+                self.destination_filter(),
                 start_time__gte=self.start_time,
                 end_time__lte=self.end_time,
             )
@@ -298,8 +367,9 @@ class Campaign(models.Model):
         and Surveys linked to another Campaign.
         We assume that Campaigns do not overlap.
         """
-        if self.surveys:
-            return self.surveys.exclude(campaign=self)
+        surveys = self.surveys
+        if surveys is not None:
+            return surveys.exclude(campaign=self)
         return None
 
     @property
@@ -307,7 +377,7 @@ class Campaign(models.Model):
         """Return the QuerySet of all Encounters within this Campaign."""
         if self.destination and self.start_time and self.end_time:
             return Encounter.objects.filter(
-                where__coveredby=self.destination.geom,
+                self.destination_filter(),
                 when__gte=self.start_time,
                 when__lte=self.end_time,
             )
@@ -321,29 +391,119 @@ class Campaign(models.Model):
         and Encounters linked to another Campaign.
         We assume that Campaigns do not overlap.
         """
-        if self.encounters:
-            return self.encounters.exclude(campaign=self)
+        encounters = self.encounters
+        if encounters is not None:
+            return encounters.exclude(campaign=self)
         return None
 
+    def has_adoption_changes(self):
+        """Whether the destination or time range differ from the saved Campaign, or the Campaign is unsaved."""
+        saved = Campaign.objects.filter(pk=self.pk).values("destination_id", "start_time", "end_time").first()
+        return saved != {"destination_id": self.destination_id, "start_time": self.start_time, "end_time": self.end_time}
+
+    def queue_adoption(self):
+        """Return the queued adoption job of this Campaign, queueing a new job if there is none."""
+        job = self.adoption_jobs.filter(status=CampaignAdoptionJob.STATUS_QUEUED).first()
+        return job or CampaignAdoptionJob.objects.create(campaign=self)
+
     def adopt_all_surveys_and_encounters(self):
-        """Adopt all surveys and encounters in this Campaign."""
+        """Adopt all surveys and encounters in this Campaign.
+
+        Only records which are not yet linked to this Campaign are updated.
+        Returns the number of surveys and encounters adopted.
+        """
         no_svy = 0
         no_enc = 0
-        if self.surveys:
-            no_svy = self.surveys.update(campaign=self)
-        if self.encounters:
-            no_enc = self.encounters.update(campaign=self)
+        surveys = self.orphaned_surveys
+        if surveys is not None:
+            no_svy = surveys.update(campaign=self)
+        encounters = self.orphaned_encounters
+        if encounters is not None:
+            nest_ctype_id = ContentType.objects.get_for_model(TurtleNestEncounter).pk
+            encounter_ids = list(encounters.values_list("pk", "polymorphic_ctype_id"))
+            no_enc = Encounter.objects.filter(pk__in=[pk for pk, _ in encounter_ids]).update(campaign=self)
+            # The data owner of the nest/track report rows is the Campaign owner.
+            NestTrackReport.enqueue([pk for pk, ctype_id in encounter_ids if ctype_id == nest_ctype_id])
         LOGGER.info("Adopted {0} surveys and {1} encounters.".format(no_svy, no_enc))
+        return no_svy, no_enc
 
     def adopt_all_orphaned_surveys_and_encounters(self):
         """Adopt all orphaned surveys and encounters in this Campaign."""
-        no_svy = 0
-        no_enc = 0
-        if self.orphaned_surveys:
-            no_svy = self.orphaned_surveys.update(campaign=self)
-        if self.orphaned_encounters:
-            no_enc = self.orphaned_encounters.update(campaign=self)
-        LOGGER.info("Adopted {0} surveys and {1} encounters.".format(no_svy, no_enc))
+        return self.adopt_all_surveys_and_encounters()
+
+
+def count_subquery(queryset):
+    """Return a subquery of the number of rows in the passed-in (correlated) queryset."""
+    return models.Subquery(
+        queryset.order_by().annotate(count=models.Func(models.F("pk"), function="COUNT")).values("count"),
+        output_field=models.IntegerField(),
+    )
+
+
+class SurveyQuerySet(BulkTransitionQuerySet):
+    """QuerySet of Surveys, finding the duplicates of every survey in the queryset at once.
+
+    Duplicate surveys are the other surveys of the same site and local start date with intersecting durations,
+    as in Survey.duplicate_surveys. The duplicates of each survey are read in a correlated subquery on the
+    site and start date index, so that a season of surveys is compared with its duplicates in one query.
+    """
+
+    def duplicates_of_outer(self, **filters):
+        """Return the duplicates of the outer survey of a subquery, which must be annotated with `local_start_date`."""
+        return (
+            self.model.objects.filter(
+                site=models.OuterRef("site"), start_time__date=models.OuterRef("local_start_date"), **filters
+            )
+            .exclude(pk=models.OuterRef("pk"))
+            .exclude(start_time__gte=models.OuterRef("end_time"))  # surveys starting after the outer survey
+            .exclude(end_time__lte=models.OuterRef("start_time"))  # surveys ending before the outer survey
+            .order_by()
+        )
+
+    def with_duplicate_counts(self):
+        """Annotate each survey with the number of its duplicate surveys as `duplicate_count`,
+        and the number of its duplicate production surveys as `production_duplicate_count`.
+        """
+        return self.annotate(local_start_date=TruncDate("start_time")).annotate(
+            duplicate_count=count_subquery(self.duplicates_of_outer()),
+            production_duplicate_count=count_subquery(self.duplicates_of_outer(production=True)),
+        )
+
+    def with_duplicate_ids(self):
+        """Annotate each survey with the PKs of its duplicate surveys as `duplicate_ids`,
+        and the PKs of its duplicate production surveys as `production_duplicate_ids`.
+        """
+        return self.annotate(local_start_date=TruncDate("start_time")).annotate(
+            duplicate_ids=ArraySubquery(self.duplicates_of_outer().order_by("pk").values("pk")),
+            production_duplicate_ids=ArraySubquery(self.duplicates_of_outer(production=True).order_by("pk").values("pk")),
+        )
+
+    def close_duplicates(self, actor=None):
+        """Close the duplicates of every production survey in this queryset which has duplicate production surveys,
+        e.g. all surveys of a season, within one transaction.
+
+        Of each group of duplicate production surveys, the survey with the most encounters (then the earliest)
+        remains the production survey and closes its duplicates with Survey.close_duplicates().
+        Surveys whose duplicate production surveys have all been closed already are skipped.
+        Returns the message of each closed group of duplicates.
+        """
+        encounters = Encounter.objects.non_polymorphic().filter(survey=models.OuterRef("pk"))
+        surveys = (
+            self.filter(production=True)
+            .with_duplicate_ids()
+            .filter(production_duplicate_ids__len__gt=0)
+            .annotate(encounter_count=count_subquery(encounters))
+            .order_by("-encounter_count", "start_time", "pk")
+        )
+        closed = set()
+        msgs = []
+        with transaction.atomic():
+            for survey in surveys:
+                if survey.pk in closed or closed.issuperset(survey.production_duplicate_ids):
+                    continue
+                msgs.append(survey.close_duplicates(actor=actor))
+                closed.update(survey.duplicate_ids)
+        return msgs
 
 
 class Survey(QualityControlMixin, UrlsMixin, models.Model):
@@ -512,9 +672,15 @@ class Survey(QualityControlMixin, UrlsMixin, models.Model):
         help_text="A human-readable, self-explanatory label.",
     )
 
+    objects = SurveyQuerySet.as_manager()
+
     class Meta:
         ordering = ("-start_time",)
         unique_together = ("source", "source_id")
+        indexes = [
+            # Surveys by site and local start date (duplicate_surveys filters on start_time__date).
+            models.Index(models.F("site"), TruncDate("start_time"), name="survey_site_start_date_idx"),
+        ]
 
     def __str__(self):
         return self.label_short()
@@ -564,22 +730,23 @@ class Survey(QualityControlMixin, UrlsMixin, models.Model):
 
     @property
     def no_duplicates(self):
-        """The number of duplicate surveys."""
+        """The number of duplicate surveys, annotated by SurveyQuerySet.with_duplicate_counts() where available."""
+        if hasattr(self, "duplicate_count"):
+            return self.duplicate_count
         return self.duplicate_surveys.count()
 
     @property
     def has_duplicates(self):
         """Whether there are duplicate surveys."""
+        if hasattr(self, "duplicate_count"):
+            return self.duplicate_count > 0
         return self.duplicate_surveys.exists()
 
     def has_production_duplicates(self):
         """Whether there are duplicate production surveys."""
-        return (
-            Survey.objects.filter(site=self.site, start_time__date=self.start_date, production=True)
-            .exclude(pk=self.pk)
-            .exclude(start_time__gte=self.end_time)  # surveys starting after self
-            .exclude(end_time__lte=self.start_time)  # surveys ending before self
-        ).exists()
+        if hasattr(self, "production_duplicate_count"):
+            return self.production_duplicate_count > 0
+        return self.duplicate_surveys.filter(production=True).exists()
 
     def make_production(self):
         self.production = True
@@ -604,74 +771,75 @@ class Survey(QualityControlMixin, UrlsMixin, models.Model):
         Encounters outside its spatial bounds can occur if the Survey site was adjusted manually.
         These will be orphaned after this operation, and can be adopted either by saving an adjacent survey,
         or running "adopt orphaned encounters".
+
+        Surveys, media attachments and Encounters are changed with queryset updates within one transaction,
+        so that no model signals are sent. Orphaned Encounters within the adjusted duration are claimed once.
         """
-        survey_pks = [survey.pk for survey in self.duplicate_surveys.all()] + [self.pk]
-        all_encounters = Encounter.objects.filter(survey_id__in=survey_pks)
+        # Imported here to avoid a circular import: observations.utils imports from this module.
+        from .utils import claim_encounters
+
+        duplicate_pks = list(self.duplicate_surveys.values_list("pk", flat=True))
+        survey_pks = duplicate_pks + [self.pk]
         curator = actor if actor else User.objects.get(pk=1)
-        msg = "Closing {0} duplicate(s) of Survey {1} as {2}.".format(len(survey_pks) - 1, self.pk, curator)
-
-        # All duplicate Surveys shall be closed (not production) and own no Encounters
-        for duplicate in self.duplicate_surveys.all():
-            LOGGER.info("Closing Survey {0} with actor {1}".format(duplicate.pk, curator))
-            duplicate.production = False
-            duplicate.save()
-            if duplicate.status != QualityControlMixin.STATUS_CURATED:
-                duplicate.curate(by=curator)
-                duplicate.save()
-            # Merge any media attachments on the duplicate survey.
-            attachments = SurveyMediaAttachment.objects.filter(survey=duplicate)
-            for media in attachments:
-                media.survey = self
-                media.save()
-
-        # From all Encounters (if any), adjust Survey duration
-        if all_encounters.exists():
-            # Merge any Encounters on the old survey.
-            for encounter in all_encounters:
-                encounter.survey = self
-                encounter.save()
-
-            earliest_enc = min([e.when for e in all_encounters])
-            earliest_buffered = earliest_enc - timedelta(minutes=30)
-            latest_enc = max([e.when for e in all_encounters])
-            latest_buffered = latest_enc + timedelta(minutes=30)
-
-            msg += " {0} combined Encounters were found from duplicates between {1} and {2}.".format(
-                all_encounters.count(),
-                earliest_enc.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
-                latest_enc.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
-            )
-            if earliest_enc < self.start_time:
-                msg += " Adjusted Survey start time from {0} to 30 mins before earliest Encounter, {1}.".format(
-                    self.start_time.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
-                    earliest_buffered.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
-                )
-                self.start_time = earliest_buffered
-            if latest_enc > self.end_time:
-                msg += " Adjusted Survey end time from {0} to 30 mins after latest Encounter, {1}.".format(
-                    self.end_time.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
-                    latest_buffered.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+        msg = "Closing {0} duplicate(s) of Survey {1} as {2}.".format(len(duplicate_pks), self.pk, curator)
+
+        with transaction.atomic():
+            # All duplicate Surveys shall be closed (not production) and own no Encounters or media attachments.
+            if duplicate_pks:
+                LOGGER.info("Closing Surveys {0} with actor {1}".format(", ".join(map(str, duplicate_pks)), curator))
+                duplicates = Survey.objects.filter(pk__in=duplicate_pks)
+                duplicates.update(production=False)
+                duplicates.bulk_transition("curate", by=curator)
+                SurveyMediaAttachment.objects.filter(survey__in=duplicate_pks).update(survey=self)
+
+            # From all Encounters (if any), adjust Survey duration
+            all_encounters = Encounter.objects.filter(survey__in=survey_pks)
+            nest_ids = list(TurtleNestEncounter.objects.filter(survey__in=survey_pks).values_list("pk", flat=True))
+            encounters = all_encounters.aggregate(count=models.Count("pk"), earliest=models.Min("when"), latest=models.Max("when"))
+            if encounters["count"]:
+                # Merge any Encounters on the old surveys.
+                all_encounters.update(survey=self)
+
+                earliest_enc = encounters["earliest"]
+                earliest_buffered = earliest_enc - timedelta(minutes=30)
+                latest_enc = encounters["latest"]
+                latest_buffered = latest_enc + timedelta(minutes=30)
+
+                msg += " {0} combined Encounters were found from duplicates between {1} and {2}.".format(
+                    encounters["count"],
+                    earliest_enc.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+                    latest_enc.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
                 )
-                self.end_time = latest_buffered
+                if earliest_enc < self.start_time:
+                    msg += " Adjusted Survey start time from {0} to 30 mins before earliest Encounter, {1}.".format(
+                        self.start_time.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+                        earliest_buffered.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+                    )
+                    self.start_time = earliest_buffered
+                if latest_enc > self.end_time:
+                    msg += " Adjusted Survey end time from {0} to 30 mins after latest Encounter, {1}.".format(
+                        self.end_time.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+                        latest_buffered.astimezone(settings.TZ).strftime("%Y-%m-%d %H:%M %Z"),
+                    )
+                    self.end_time = latest_buffered
+
+            # This Survey is the production survey, owning all Encounters.
+            self.production = True
+            survey = Survey.objects.filter(pk=self.pk)
+            survey.update(production=True, start_time=self.start_time, end_time=self.end_time)
+            survey.bulk_transition("curate", by=curator)
+            self.refresh_from_db(fields=["status"])
+
+            # ...except cuckoo Encounters
+            if encounters["count"] and self.site is not None:
+                cuckoos = all_encounters.exclude(where__coveredby=self.site.geom).update(site=None, survey=None)
+                msg += " Evicted {0} cuckoo Encounters observed outside the survey site.".format(cuckoos)
+
+            # Queryset updates bypass the post_save signals: claim orphaned Encounters and queue the report rows.
+            if self.start_time and self.end_time and self.site:
+                claim_encounters(self)
+            NestTrackReport.enqueue(nest_ids)
 
-        # This Survey is the production survey, owning all Encounters.
-        self.production = True
-        self.save()
-        if self.status != QualityControlMixin.STATUS_CURATED:
-            self.curate(by=curator)
-            self.save()
-
-        # ...except cuckoo Encounters
-        if all_encounters.exists() and self.site is not None:
-            cuckoo_encounters = all_encounters.exclude(where__coveredby=self.site.geom)
-            for e in cuckoo_encounters:
-                e.site = None
-                e.survey = None
-                e.save()
-            msg += " Evicted {0} cuckoo Encounters observed outside the survey site.".format(cuckoo_encounters.count())
-
-        # Post-save runs claim_encounters in signals.
-        self.save()
         LOGGER.info(msg)
         return msg
 
@@ -682,12 +850,16 @@ class Survey(QualityControlMixin, UrlsMixin, models.Model):
     @property
     def guess_site(self):
         """Return the first site containing the start_location or None."""
+        if not self.start_location:
+            return None
         candidates = Area.objects.filter(area_type=Area.AREATYPE_SITE, geom__covers=self.start_location)
         return candidates.first() or None
 
     @property
     def guess_area(self):
         """Return the first locality containing the start_location or None."""
+        if not self.start_location:
+            return None
         candidates = Area.objects.filter(area_type=Area.AREATYPE_LOCALITY, geom__covers=self.start_location)
         return candidates.first() or None
 
@@ -837,6 +1009,16 @@ class SurveyMediaAttachment(LegacySourceMixin, models.Model):
             return ""
 
 
+class EncounterQuerySet(BulkTransitionMixin, TypedQuerySet):
+    def bulk_transitioned(self, logs):
+        # The bulk update bypasses the post_save signal which queues report rows to be refreshed.
+        nest_ctype_id = ContentType.objects.get_for_model(TurtleNestEncounter).pk
+        NestTrackReport.enqueue([log.object_id for log in logs if log.content_type_id == nest_ctype_id])
+
+
+EncounterManager = PolymorphicManager.from_queryset(EncounterQuerySet)
+
+
 class Encounter(PolymorphicModel, UrlsMixin, models.Model):
     """The base Encounter class.
 
@@ -1007,6 +1189,20 @@ class Encounter(PolymorphicModel, UrlsMixin, models.Model):
         verbose_name="Observed on",
         help_text="The observation datetime, shown as local time (no daylight savings), stored as UTC.",
     )
+    turtle_date = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text="The local date of the night the encounter belongs to (before midday counts as the previous night).",
+    )
+    season = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text="The season of the encounter, the start year of the fiscal year.",
+    )
     location_accuracy = models.CharField(
         max_length=300,
         verbose_name="Location accuracy class (m)",
@@ -1067,10 +1263,17 @@ class Encounter(PolymorphicModel, UrlsMixin, models.Model):
         help_text="Comments",
     )
 
+    objects = EncounterManager()
+
     class Meta:
         ordering = ("-when",)
         unique_together = ("source", "source_id")
         get_latest_by = "when"
+        indexes = [
+            models.Index(fields=["status", "encounter_type"], name="encounter_status_type_idx"),
+            models.Index(fields=["area", "when"], name="encounter_area_when_idx"),
+            models.Index(fields=["site", "when"], name="encounter_site_when_idx"),
+        ]
 
     @property
     def opts(self):
@@ -1277,13 +1480,28 @@ class Encounter(PolymorphicModel, UrlsMixin, models.Model):
             )
         )
 
-    @property
-    def season(self):
+    def get_turtle_date(self):
+        """Return the local date of the turtle night of the Encounter.
+
+        Turtle nights run from midday to midday, so an Encounter before midday belongs to the previous date.
+        """
+        return (self.when.astimezone(settings.TZ) - timedelta(hours=12)).date()
+
+    def get_season(self):
         """Return the season of the Encounter, the start year of the fiscal year.
 
-        Calculated as the calendar year 180 days before the date of the Encounter.
+        Calculated as the calendar year six months before the local date of the Encounter.
         """
-        return (self.when - relativedelta(months=6)).year
+        return (self.when.astimezone(settings.TZ) - relativedelta(months=6)).year
+
+    def set_turtle_date(self):
+        """Set the stored turtle_date and season from `when`.
+
+        Called by the encounter_pre_save signal; bulk inserts and updates must call this themselves.
+        """
+        if self.when:
+            self.turtle_date = self.get_turtle_date()
+            self.season = self.get_season()
 
     @property
     def guess_site(self):
@@ -1916,6 +2134,8 @@ class Observation(PolymorphicModel, LegacySourceMixin, models.Model):
         help_text="The Encounter during which the observation was made",
     )
 
+    objects = TypedManager()
+
     class Meta:
         ordering = ("-pk",)
 
@@ -3214,3 +3434,491 @@ class DisturbanceObservation(Observation):
 
     def card_template(self):
         return "observations/disturbance_observation_card.html"
+
+
+class OdkSyncCursor(models.Model):
+    """A per-form watermark recording how far submissions to an ODK Central form have been synchronised,
+    so that each download only requests submissions created or updated since the previous run.
+    """
+
+    project_id = models.CharField(
+        max_length=64,
+        verbose_name="ODK project ID",
+    )
+    form_id = models.CharField(
+        max_length=256,
+        verbose_name="ODK form ID",
+    )
+    synced_to = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="The latest submission created/updated timestamp seen in ODK Central for this form.",
+    )
+    last_run = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="The time that this cursor was last advanced.",
+    )
+
+    class Meta:
+        unique_together = ("project_id", "form_id")
+        verbose_name = "ODK sync cursor"
+
+    def __str__(self):
+        return f"{self.project_id}/{self.form_id}: {self.synced_to.isoformat() if self.synced_to else 'never synced'}"
+
+    @classmethod
+    def get_for_form(cls, project_id, form_id):
+        """Return the sync cursor for the passed-in ODK form, creating it if required."""
+        return cls.objects.get_or_create(project_id=str(project_id), form_id=form_id)[0]
+
+    def advance(self, watermark):
+        """Move this cursor forward to the passed-in timestamp (it never moves backwards)."""
+        if watermark and (not self.synced_to or watermark > self.synced_to):
+            self.synced_to = watermark
+        self.last_run = timezone.now()
+        self.save()
+
+
+class OdkFailedSubmission(models.Model):
+    """An ODK Central submission which could not be imported. The form's sync cursor moves past failed submissions,
+    so each later import requests the recorded submissions again individually, until they are imported.
+    """
+
+    project_id = models.CharField(
+        max_length=64,
+        verbose_name="ODK project ID",
+    )
+    form_id = models.CharField(
+        max_length=256,
+        verbose_name="ODK form ID",
+    )
+    instance_id = models.CharField(
+        max_length=256,
+        verbose_name="ODK instance ID",
+    )
+    first_failed = models.DateTimeField(
+        auto_now_add=True,
+        help_text="The time that this submission first failed to import.",
+    )
+    last_failed = models.DateTimeField(
+        default=timezone.now,
+        help_text="The time that this submission most recently failed to import.",
+    )
+    attempts = models.PositiveIntegerField(
+        default=1,
+        help_text="The number of imports which have failed to import this submission.",
+    )
+
+    class Meta:
+        unique_together = ("project_id", "form_id", "instance_id")
+        verbose_name = "ODK failed submission"
+
+    def __str__(self):
+        return f"{self.project_id}/{self.form_id}/{self.instance_id}: {self.attempts} attempt(s)"
+
+    @classmethod
+    def record(cls, project_id, form_id, instance_ids, failed):
+        """Record the outcome of an import of the passed-in submissions (instance IDs) to an ODK form: the
+        submissions in `failed` are recorded, and the records of other submissions are removed.
+        Returns the number of failed submissions which had already failed in an earlier import.
+        """
+        failures = cls.objects.filter(project_id=str(project_id), form_id=form_id)
+        failed = set(failed)
+        failures.filter(instance_id__in=set(instance_ids) - failed).delete()
+        repeated = set(failures.filter(instance_id__in=failed).values_list("instance_id", flat=True))
+        failures.filter(instance_id__in=repeated).update(attempts=models.F("attempts") + 1, last_failed=timezone.now())
+        cls.objects.bulk_create(
+            [cls(project_id=str(project_id), form_id=form_id, instance_id=instance_id) for instance_id in failed - repeated],
+            ignore_conflicts=True,
+        )
+        return len(repeated)
+
+
+class OdkImportJob(JobMixin):
+    """A record of one run of the import of submissions to a single ODK Central form, so that forms can be
+    imported by separate worker processes and a failed form can be retried by itself.
+    """
+
+    form_id = models.CharField(
+        max_length=256,
+        db_index=True,
+        verbose_name="ODK form ID",
+    )
+    submissions = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of new (or retried) submissions downloaded from ODK Central.",
+    )
+    failures = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of new submissions that could not be imported.",
+    )
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "ODK import job"
+
+    def __str__(self):
+        return f"{self.form_id} ({self.created.isoformat() if self.created else 'unsaved'}): {self.status}"
+
+    @property
+    def imported(self):
+        """Return the number of submissions imported successfully."""
+        return self.submissions - self.failures
+
+
+class ExportJob(JobMixin):
+    """A download from an export view (a list view using ResourceDownloadMixin, or another view implementing
+    get_export_filename(), get_export_fingerprint() and write_export()), run out of the request cycle by the
+    run_export_jobs management command. The export file is written to media storage.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="export_jobs",
+        help_text="The user who requested the export.",
+    )
+    exporter = models.CharField(
+        max_length=256,
+        help_text="The import path of the view class which writes the export.",
+    )
+    parameters = models.JSONField(
+        default=dict,
+        help_text="The GET parameters of the export request (lists of values, keyed by parameter name).",
+    )
+    per_user = models.BooleanField(
+        default=False,
+        help_text="Whether the export depends on the requesting user, and may only be downloaded by them.",
+    )
+    filter_hash = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="A hash of the exporter, parameters and (for per-user exports) user.",
+    )
+    fingerprint = models.CharField(
+        max_length=256,
+        blank=True,
+        help_text="The state of the exported data when the export was requested.",
+    )
+    filename = models.CharField(max_length=256)
+    file = models.FileField(upload_to="exports/%Y/%m/", max_length=512, blank=True, null=True)
+
+    class Meta:
+        ordering = ("-created",)
+
+    def __str__(self):
+        return f"{self.filename} ({self.created.isoformat() if self.created else 'unsaved'}): {self.status}"
+
+    def get_absolute_url(self):
+        return reverse("observations:exportjob-detail", kwargs={"pk": self.pk})
+
+
+class CampaignAdoptionJob(JobMixin):
+    """The adoption of the Surveys and Encounters within a Campaign's destination and time range, queued when
+    either changes and run out of the request cycle by the run_campaign_adoption_jobs management command.
+    """
+
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.CASCADE,
+        related_name="adoption_jobs",
+        help_text="The Campaign adopting its Surveys and Encounters.",
+    )
+    surveys = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of Surveys moved into the Campaign.",
+    )
+    encounters = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of Encounters moved into the Campaign.",
+    )
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "campaign adoption job"
+
+    def __str__(self):
+        return f"{self.campaign} ({self.created.isoformat() if self.created else 'unsaved'}): {self.status}"
+
+
+# The flattened row for each TurtleNestEncounter, with its latest nest, nest tag and hatchling emergence observations.
+# Columns are in the same order as the NestTrackReport fields.
+NEST_TRACK_REPORT_QUERY = """
+SELECT DISTINCT ON (e."id")
+    e."id" AS "encounter_id",
+    e."when",
+    e."status",
+    org."label" AS "data_owner",
+    TO_CHAR(e."when" AT TIME ZONE 'Australia/Perth', 'YYYY-MM-DD') AS "date",
+    TO_CHAR(e."when" AT TIME ZONE 'Australia/Perth', 'HH24:MI:SS') AS "time",
+    TO_CHAR(e."turtle_date", 'YYYY-MM-DD') AS "turtle_date",
+    site."name" AS "site_name",
+    ST_Y(e."where") AS "latitude",
+    ST_X(e."where") AS "longitude",
+    area."name" AS "area_name",
+    e."name" AS "encounter_name",
+    obs."name" AS "observer",
+    rep."name" AS "reporter",
+    e."encounter_type",
+    e."comments",
+    t."nest_age",
+    t."nest_type",
+    t."species",
+    t."habitat",
+    t."disturbance",
+    t."nest_tagged",
+    t."logger_found",
+    t."eggs_counted",
+    t."hatchlings_measured",
+    t."fan_angles_measured",
+    n."eggs_laid",
+    n."egg_count",
+    n."no_egg_shells",
+    n."no_live_hatchlings_neck_of_nest",
+    n."no_live_hatchlings",
+    n."no_dead_hatchlings",
+    n."no_undeveloped_eggs",
+    n."no_unhatched_eggs",
+    n."no_unhatched_term",
+    n."no_depredated_eggs",
+    n."nest_depth_top",
+    n."nest_depth_bottom",
+    n."sand_temp",
+    n."air_temp",
+    n."water_temp",
+    n."egg_temp",
+    n."comments" AS "turtle_observation_comments",
+    tag."comments" AS "tag_observation_comments",
+    hatch."bearing_to_water_degrees",
+    hatch."bearing_leftmost_track_degrees",
+    hatch."bearing_rightmost_track_degrees",
+    hatch."no_tracks_main_group_max",
+    hatch."outlier_tracks_present",
+    hatch."path_to_sea_comments",
+    hatch."hatchling_emergence_time_known",
+    hatch."hatchling_emergence_time",
+    hatch."hatchling_emergence_time_accuracy",
+    hatch."cloud_cover_at_emergence_known",
+    hatch."cloud_cover_at_emergence",
+    tag."status" AS "nest_tag_status",
+    tag."flipper_tag_id",
+    TO_CHAR(tag."date_nest_laid" AT TIME ZONE 'Australia/Perth', 'YYYY-MM-DD') AS "date_nest_laid",
+    tag."tag_label",
+    NOW() AS "refreshed"
+FROM
+    "observations_turtlenestencounter" t
+INNER JOIN
+    "observations_encounter" e ON (t."encounter_ptr_id" = e."id")
+LEFT JOIN
+    "observations_area" area ON (e."area_id" = area."id")
+LEFT JOIN
+    "observations_area" site ON (e."site_id" = site."id")
+LEFT JOIN
+    "users_user" obs ON (e."observer_id" = obs."id")
+LEFT JOIN
+    "users_user" rep ON (e."reporter_id" = rep."id")
+LEFT JOIN
+    "observations_observation" o ON (e."id" = o."encounter_id" AND o."polymorphic_ctype_id" = %(nest_ctype_id)s)
+LEFT JOIN
+    "observations_turtlenestobservation" n ON (o."id" = n."observation_ptr_id")
+LEFT JOIN
+    "observations_observation" obs_tag ON (e."id" = obs_tag."encounter_id" AND obs_tag."polymorphic_ctype_id" = %(tag_ctype_id)s)
+LEFT JOIN
+    "observations_nesttagobservation" tag ON (obs_tag."id" = tag."observation_ptr_id")
+LEFT JOIN
+    "observations_observation" obs_hatch ON (e."id" = obs_hatch."encounter_id" AND obs_hatch."polymorphic_ctype_id" = %(hatch_ctype_id)s)
+LEFT JOIN
+    "observations_turtlehatchlingemergenceobservation" hatch ON (obs_hatch."id" = hatch."observation_ptr_id")
+LEFT JOIN
+    "observations_campaign" c ON (e."campaign_id" = c."id")
+LEFT JOIN
+    "users_organisation" org ON (c."owner_id" = org."id")
+WHERE
+    t."encounter_ptr_id" = ANY(%(encounter_ids)s)
+ORDER BY
+    e."id",
+    n."observation_ptr_id" DESC NULLS LAST,
+    tag."observation_ptr_id" DESC NULLS LAST,
+    hatch."observation_ptr_id" DESC NULLS LAST
+"""
+
+
+class NestTrackReportQueue(models.Model):
+    """A TurtleNestEncounter whose NestTrackReport row needs to be refreshed.
+    Encounter ids are queued by signals when an encounter or its observations are saved, and explicitly by
+    bulk operations that bypass signals (bulk inserts and queryset updates).
+    """
+
+    encounter_id = models.BigIntegerField(primary_key=True)
+    queued = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "nest/track report queue entry"
+        verbose_name_plural = "nest/track report queue"
+
+    def __str__(self):
+        return f"{self.encounter_id} (queued {self.queued.isoformat()})"
+
+
+class NestTrackReport(models.Model):
+    """A denormalised reporting row per TurtleNestEncounter, flattening the encounter with its nest (egg count),
+    nest tag and hatchling emergence observations, plus the names of its area, site, observer, reporter and data owner.
+
+    Rows are refreshed incrementally from the NestTrackReportQueue, so that reports and feeds read a single table
+    instead of joining eight tables on each request.
+    """
+
+    encounter = models.OneToOneField(
+        TurtleNestEncounter,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="report",
+    )
+    when = models.DateTimeField(db_index=True)
+    status = models.TextField(blank=True, null=True)
+    data_owner = models.TextField(blank=True, null=True)
+    date = models.CharField(max_length=10, blank=True, null=True, help_text="Local date (YYYY-MM-DD).")
+    time = models.CharField(max_length=8, blank=True, null=True, help_text="Local time (HH:MM:SS).")
+    turtle_date = models.CharField(
+        max_length=10,
+        blank=True,
+        null=True,
+        help_text="Local date of the night the encounter belongs to (before midday counts as the previous night).",
+    )
+    site_name = models.TextField(blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    area_name = models.TextField(blank=True, null=True)
+    encounter_name = models.TextField(blank=True, null=True)
+    observer = models.TextField(blank=True, null=True)
+    reporter = models.TextField(blank=True, null=True)
+    encounter_type = models.TextField(blank=True, null=True)
+    comments = models.TextField(blank=True, null=True)
+    nest_age = models.TextField(blank=True, null=True)
+    nest_type = models.TextField(blank=True, null=True)
+    species = models.TextField(blank=True, null=True)
+    habitat = models.TextField(blank=True, null=True)
+    disturbance = models.TextField(blank=True, null=True)
+    nest_tagged = models.TextField(blank=True, null=True)
+    logger_found = models.TextField(blank=True, null=True)
+    eggs_counted = models.TextField(blank=True, null=True)
+    hatchlings_measured = models.TextField(blank=True, null=True)
+    fan_angles_measured = models.TextField(blank=True, null=True)
+    eggs_laid = models.BooleanField(blank=True, null=True)
+    egg_count = models.IntegerField(blank=True, null=True)
+    no_egg_shells = models.IntegerField(blank=True, null=True)
+    no_live_hatchlings_neck_of_nest = models.IntegerField(blank=True, null=True)
+    no_live_hatchlings = models.IntegerField(blank=True, null=True)
+    no_dead_hatchlings = models.IntegerField(blank=True, null=True)
+    no_undeveloped_eggs = models.IntegerField(blank=True, null=True)
+    no_unhatched_eggs = models.IntegerField(blank=True, null=True)
+    no_unhatched_term = models.IntegerField(blank=True, null=True)
+    no_depredated_eggs = models.IntegerField(blank=True, null=True)
+    nest_depth_top = models.IntegerField(blank=True, null=True)
+    nest_depth_bottom = models.IntegerField(blank=True, null=True)
+    sand_temp = models.FloatField(blank=True, null=True)
+    air_temp = models.FloatField(blank=True, null=True)
+    water_temp = models.FloatField(blank=True, null=True)
+    egg_temp = models.FloatField(blank=True, null=True)
+    turtle_observation_comments = models.TextField(blank=True, null=True)
+    tag_observation_comments = models.TextField(blank=True, null=True)
+    bearing_to_water_degrees = models.FloatField(blank=True, null=True)
+    bearing_leftmost_track_degrees = models.FloatField(blank=True, null=True)
+    bearing_rightmost_track_degrees = models.FloatField(blank=True, null=True)
+    no_tracks_main_group_max = models.IntegerField(blank=True, null=True)
+    outlier_tracks_present = models.TextField(blank=True, null=True)
+    path_to_sea_comments = models.TextField(blank=True, null=True)
+    hatchling_emergence_time_known = models.TextField(blank=True, null=True)
+    hatchling_emergence_time = models.DateTimeField(blank=True, null=True)
+    hatchling_emergence_time_accuracy = models.TextField(blank=True, null=True)
+    cloud_cover_at_emergence_known = models.TextField(blank=True, null=True)
+    cloud_cover_at_emergence = models.IntegerField(blank=True, null=True)
+    nest_tag_status = models.TextField(blank=True, null=True)
+    flipper_tag_id = models.TextField(blank=True, null=True)
+    date_nest_laid = models.CharField(max_length=10, blank=True, null=True, help_text="Local date (YYYY-MM-DD).")
+    tag_label = models.TextField(blank=True, null=True)
+    refreshed = models.DateTimeField(help_text="The time that this row was last refreshed.")
+
+    class Meta:
+        verbose_name = "nest/track report"
+
+    def __str__(self):
+        return f"{self.encounter_id} {self.date} {self.site_name or ''}"
+
+    @classmethod
+    def report_columns(cls):
+        """Return the database columns of the report, excluding the ordering and housekeeping columns."""
+        return [field.column for field in cls._meta.concrete_fields if field.name not in ("when", "refreshed")]
+
+    @classmethod
+    def enqueue(cls, encounter_ids):
+        """Queue the passed-in encounter ids to be refreshed. Ids that are already queued have their queued time
+        updated, so that a refresh which claimed them earlier does not remove them from the queue.
+        """
+        NestTrackReportQueue.objects.bulk_create(
+            # Postgres refuses to update the same row twice in one statement, so drop duplicate ids.
+            [NestTrackReportQueue(encounter_id=encounter_id) for encounter_id in dict.fromkeys(encounter_ids)],
+            update_conflicts=True,
+            unique_fields=["encounter_id"],
+            update_fields=["queued"],
+        )
+
+    @classmethod
+    def enqueue_all(cls):
+        """Queue every TurtleNestEncounter to be refreshed."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""INSERT INTO "{NestTrackReportQueue._meta.db_table}" ("encounter_id", "queued")
+                SELECT "encounter_ptr_id", %s FROM "{TurtleNestEncounter._meta.db_table}"
+                ON CONFLICT ("encounter_id") DO UPDATE SET "queued" = EXCLUDED."queued"
+                """,
+                # Use the same clock as refresh() compares the queued times against.
+                [timezone.now()],
+            )
+
+    @classmethod
+    def refresh(cls, full=False, chunk_size=5000):
+        """Refresh the report rows of queued encounters (or of every encounter, if `full` is True), in chunks
+        of `chunk_size` encounters per transaction. Returns the number of encounters refreshed.
+        """
+        if full:
+            cls.enqueue_all()
+
+        columns = [f'"{field.column}"' for field in cls._meta.concrete_fields]
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != '"encounter_id"')
+        query = (
+            f'INSERT INTO "{cls._meta.db_table}" ({", ".join(columns)})'
+            f"{NEST_TRACK_REPORT_QUERY}"
+            f'ON CONFLICT ("encounter_id") DO UPDATE SET {updates}'
+        )
+        params = {
+            "nest_ctype_id": ContentType.objects.get_for_model(TurtleNestObservation).pk,
+            "tag_ctype_id": ContentType.objects.get_for_model(NestTagObservation).pk,
+            "hatch_ctype_id": ContentType.objects.get_for_model(TurtleHatchlingEmergenceObservation).pk,
+        }
+
+        refreshed = 0
+        while True:
+            with transaction.atomic():
+                # Skip queue entries locked by a concurrent refresh. Entries re-queued after the claim are left
+                # in the queue (and refreshed again), as the report query may not have seen their changes.
+                claimed = timezone.now()
+                encounter_ids = list(
+                    NestTrackReportQueue.objects.filter(queued__lte=claimed)
+                    .select_for_update(skip_locked=True)
+                    .order_by("encounter_id")
+                    .values_list("encounter_id", flat=True)[:chunk_size]
+                )
+                if not encounter_ids:
+                    break
+                with connection.cursor() as cursor:
+                    cursor.execute(query, {**params, "encounter_ids": encounter_ids})
+                NestTrackReportQueue.objects.filter(encounter_id__in=encounter_ids, queued__lte=claimed).delete()
+            refreshed += len(encounter_ids)
+
+        if refreshed:
+            LOGGER.info(f"Refreshed {refreshed} nest/track report rows")
+        return refreshed
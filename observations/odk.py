@@ -1,20 +1,32 @@
+import os
 from datetime import datetime, timedelta
 from dateutil import parser
 from django.conf import settings
+from django.db import IntegrityError, transaction
 import logging
+import requests
+import traceback
 
 from users.models import User
 from wastd.odk import (
+    filter_submissions_metadata,
     get_auth_headers,
     get_form_submission_data,
+    get_imported_source_ids,
+    get_odata_submission_metadata,
+    get_odata_submissions,
+    get_session,
+    get_submission,
+    get_submissions_metadata,
+    get_submissions_watermark,
+    parse_odata_submission,
     parse_geopoint,
     parse_geopoint_accuracy,
-    get_submission_attachment,
+    get_submission_attachments,
 )
 from wastd.utils import LegacySourceMixin
 from .lookups import NA_VALUE, TURTLE_INTERACTION_CHOICES
 from .models import (
-    Area,
     Survey,
     SurveyMediaAttachment,
     MediaAttachment,
@@ -29,12 +41,17 @@ from .models import (
     TurtleHatchlingEmergenceOutlierObservation,
     LightSourceObservation,
     LoggerObservation,
+    NestTrackReport,
     AnimalEncounter,
     TurtleMorphometricObservation,
     TurtleDamageObservation,
     TagObservation,
     DisturbanceObservation,
+    OdkFailedSubmission,
+    OdkImportJob,
+    OdkSyncCursor,
 )
+from .utils import AreaLocator, bulk_create_polymorphic
 
 LOGGER = logging.getLogger("turtles")
 
@@ -50,23 +67,578 @@ def create_new_user(name):
     return user
 
 
-def get_user(reporter):
-    """Try to match the reporter to an existing user. If not, return 'Unknown user'."""
-    if reporter:
-        reporter = reporter.strip()
-        if User.objects.filter(is_active=True, name=reporter).exists():
-            user = User.objects.filter(is_active=True, name=reporter).first()
-        else:  # Create a new user.
-            user = create_new_user(reporter)
+def normalise_name(name):
+    """Return the passed-in name casefolded and with whitespace collapsed, for matching."""
+    return " ".join(name.split()).casefold()
+
+
+class UserResolver:
+    """Resolves reporter names recorded in ODK submissions to Users from memory.
+
+    Active users are loaded once, and indexed by their normalised name and aliases (names take precedence
+    over aliases, and users are matched in their default ordering as for `User.objects.first()`).
+    Reporters without a matching user should be passed to `create_missing` before resolving a set of submissions,
+    so that new users are created in one batch instead of one query per submission.
+    """
+
+    def __init__(self):
+        self.users = list(User.objects.filter(is_active=True))
+        self.index = {}
+        for user in self.users:
+            if user.name:
+                self.index.setdefault(normalise_name(user.name), user)
+        for user in self.users:
+            for alias in user.aliases.split(","):
+                if alias.strip():
+                    self.index.setdefault(normalise_name(alias), user)
+        self.partial_matches = {}
+        self._unknown_user = None
+
+    def find(self, name, partial=False):
+        """Return the User matching the passed-in name, or None.
+        If `partial` is True, fall back to the first user whose name contains the passed-in name.
+        """
+        key = normalise_name(name)
+        if key in self.index:
+            return self.index[key]
+        if partial:
+            if key not in self.partial_matches:
+                self.partial_matches[key] = next((user for user in self.users if key in normalise_name(user.name)), None)
+            return self.partial_matches[key]
+        return None
+
+    def create_missing(self, names, partial=False):
+        """Create Users in bulk for each of the passed-in names without a matching user."""
+        new_users = {}
+        for name in names:
+            if not name or not name.strip():
+                continue
+            name = name.strip()
+            key = normalise_name(name)
+            if key not in new_users and not self.find(name, partial=partial):
+                new_users[key] = User(name=name)
+        if not new_users:
+            return []
+
+        # Guarantee a unique username value by appending an underscore to the string.
+        usernames = set(User.objects.values_list("username", flat=True))
+        for user in new_users.values():
+            user.username = user.name.lower().replace(" ", "_")
+            while user.username in usernames:
+                user.username += "_"
+            usernames.add(user.username)
+            user.set_unusable_password()
+
+        try:
+            with transaction.atomic():
+                created = User.objects.bulk_create(new_users.values())
+        except IntegrityError:
+            # Another process has created a conflicting username since it was checked; create the users one by one.
+            created = [create_new_user(user.name) for user in new_users.values()]
+
+        for key, user in zip(new_users, created):
             LOGGER.info(f"Created new user {user}")
-    else:  # The form has been submitted without a user name recorded.
-        user = User.objects.get_or_create(name="Unknown user", username="unknown_user")[0]
-        LOGGER.warning(f"No reporter recorded, returning {user}")
+            self.users.append(user)
+            self.index[key] = user
+        # Names without a partial match may now match one of the new users.
+        self.partial_matches = {key: user for key, user in self.partial_matches.items() if user}
+        return created
+
+    def get_user(self, reporter, partial=False):
+        """Try to match the reporter to an existing user. If not, create a new one.
+        If no reporter is recorded, return 'Unknown user'.
+        """
+        if reporter and reporter.strip():
+            user = self.find(reporter, partial=partial)
+            if not user:
+                user = self.create_missing([reporter], partial=partial)[0]
+        else:  # The form has been submitted without a user name recorded.
+            if not self._unknown_user:
+                self._unknown_user = User.objects.get_or_create(name="Unknown user", username="unknown_user")[0]
+            user = self._unknown_user
+            LOGGER.warning(f"No reporter recorded, returning {user}")
+
+        return user
+
+
+def get_new_submissions(
+    auth_headers,
+    project_id,
+    form_id,
+    incremental=True,
+    odata=True,
+    max_workers=None,
+    imported_queryset=None,
+    imported_field="source_id",
+):
+    """Download submission data for an ODK form which has not yet been imported.
+    If `incremental` is True, only submissions created or updated since the form's sync cursor are requested.
+    If `odata` is True, submissions are read in pages from the OData Submissions feed, otherwise each
+    submission is downloaded individually as XML.
+    Incremental downloads also request the submissions which failed to import in earlier runs (see
+    OdkFailedSubmission), since the sync cursor has moved past them.
+    Returns a tuple: (submission data, latest created/updated timestamp seen in the submission metadata).
+    Rejected submissions are not returned; ODK Central updates a submission's updatedAt when its review state
+    changes, so a rejected submission which is later approved is requested again by an incremental download.
+    """
+    since = OdkSyncCursor.get_for_form(project_id, form_id).synced_to if incremental else None
+    if since:
+        LOGGER.info(f"Requesting {form_id} submissions created or updated since {since.isoformat()}")
+
+    if odata:
+        rows = list(get_odata_submissions(auth_headers, project_id, form_id, since=since))
+        submissions_metadata = [get_odata_submission_metadata(row) for row in rows]
+        instance_ids = set(
+            filter_submissions_metadata(submissions_metadata, imported_queryset=imported_queryset, imported_field=imported_field)
+        )
+        submissions = [parse_odata_submission(row) for row in rows if row["__id"] in instance_ids]
+    else:
+        submissions_metadata = get_submissions_metadata(auth_headers, project_id, form_id, since=since)
+        submissions = get_form_submission_data(
+            auth_headers,
+            project_id,
+            form_id,
+            max_workers=max_workers,
+            imported_queryset=imported_queryset,
+            imported_field=imported_field,
+            submissions_metadata=submissions_metadata,
+        )
+
+    # Submissions which can't be parsed are returned as empty lists by get_submission.
+    submissions = [submission for submission in submissions if submission]
+    if incremental:
+        submissions += get_failed_submissions(
+            auth_headers,
+            project_id,
+            form_id,
+            exclude=[submission["meta"]["instanceID"] for submission in submissions],
+            imported_queryset=imported_queryset,
+            imported_field=imported_field,
+        )
+
+    return submissions, get_submissions_watermark(submissions_metadata)
+
+
+def get_failed_submissions(auth_headers, project_id, form_id, exclude=(), imported_queryset=None, imported_field="source_id"):
+    """Download the submissions to an ODK form which failed to import in earlier runs, other than those whose
+    instance IDs are in `exclude` (e.g. because they have just been downloaded again).
+    The records of failed submissions which have since been imported, or deleted from ODK Central, are removed.
+    """
+    failures = OdkFailedSubmission.objects.filter(project_id=str(project_id), form_id=form_id).exclude(instance_id__in=exclude)
+    instance_ids = list(failures.values_list("instance_id", flat=True))
+    if not instance_ids:
+        return []
+    LOGGER.info(f"Requesting {len(instance_ids)} {form_id} submissions which failed to import in earlier runs")
+    resolved = get_imported_source_ids(instance_ids, queryset=imported_queryset, field=imported_field)
+    submissions = []
+    session = get_session()
+    for instance_id in instance_ids:
+        if instance_id in resolved:
+            continue
+        try:
+            submission = get_submission(auth_headers, project_id, form_id, instance_id, session=session)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            resolved.add(instance_id)
+            continue
+        if submission:
+            submissions.append(submission)
+    failures.filter(instance_id__in=resolved).delete()
+    return submissions
+
+
+def finish_import(project_id, form_id, submissions, failed, watermark):
+    """Record the submissions to an ODK form which could not be imported (`failed`, a list of instance IDs), so
+    that later imports request them again, and move the form's sync cursor forward past every downloaded submission.
+    Returns the result of the import: a tuple of the number of submissions downloaded and the number which failed.
+    Retried submissions which fail again are left out of both counts, so that a submission which can never be
+    imported doesn't fail every later import job (it remains recorded as an OdkFailedSubmission).
+    """
+    instance_ids = [submission["meta"]["instanceID"] for submission in submissions]
+    repeated = OdkFailedSubmission.record(project_id, form_id, instance_ids, failed)
+    if failed:
+        LOGGER.warning(f"{len(failed)} {form_id} submissions could not be imported and will be requested again")
+    OdkSyncCursor.get_for_form(project_id, form_id).advance(watermark)
+    return len(submissions) - repeated, len(failed) - repeated
+
+
+def save_attachments(auth_headers, project_id, form_id, attachments, max_workers=None):
+    """Download photos for imported records concurrently, saving each as a MediaAttachment (for an Encounter)
+    or SurveyMediaAttachment (for a Survey). `attachments` is a list of (record, instance_id, filename, title)
+    tuples. Photos whose filename is already attached to the record are skipped.
+    Returns the number of attachments created.
+    """
+    attachments = [attachment for attachment in attachments if attachment[2]]
+    encounter_ids = [record.pk for record, _, _, _ in attachments if isinstance(record, Encounter)]
+    survey_ids = [record.pk for record, _, _, _ in attachments if isinstance(record, Survey)]
+    existing = set()
+    for encounter_id, name in MediaAttachment.objects.filter(encounter_id__in=encounter_ids).values_list("encounter_id", "attachment"):
+        existing.add((Encounter, encounter_id, os.path.basename(name)))
+    for survey_id, name in SurveyMediaAttachment.objects.filter(survey_id__in=survey_ids).values_list("survey_id", "attachment"):
+        existing.add((Survey, survey_id, os.path.basename(name)))
+
+    pending = [
+        attachment
+        for attachment in attachments
+        if (Survey if isinstance(attachment[0], Survey) else Encounter, attachment[0].pk, attachment[2]) not in existing
+    ]
+    if not pending:
+        return 0
+
+    LOGGER.info(f"Downloading {len(pending)} {form_id} attachments")
+    created = 0
+    downloads = get_submission_attachments(
+        auth_headers, project_id, form_id, [(instance_id, filename) for _, instance_id, filename, _ in pending], max_workers=max_workers
+    )
+    for index, photo_file, error in downloads:
+        record, instance_id, filename, title = pending[index]
+        if error:
+            LOGGER.error(f"Unable to download {filename} for ODK {form_id} submission {instance_id}: {error}")
+            continue
+
+        if isinstance(record, Survey):
+            photo = SurveyMediaAttachment(
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                survey=record,
+                media_type="photograph",
+                title=title,
+                attachment=photo_file,
+            )
+        else:
+            photo = MediaAttachment(
+                encounter=record,
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                media_type="photograph",
+                title=title,
+                attachment=photo_file,
+            )
+        photo.save()
+        photo_file.close()
+        created += 1
+        LOGGER.info(f"Created {photo._meta.object_name} {photo}")
 
-    return user
+    return created
 
 
-def import_turtle_track_or_nest(form_id="turtle_track_or_nest", auth_headers=None):
+def parse_turtle_track_or_nest(submission, user, locator):
+    """Parse a submission to the Turtle Track or Nest ODK form into an unsaved TurtleNestEncounter, plus its list
+    of unsaved child observations and a list of photos to download (see `save_attachments`).
+    Derived fields normally set by the encounter_pre_save signal (site, area, encounter_type, turtle_date) are set here.
+    """
+    instance_id = submission["meta"]["instanceID"]
+    observations = []
+    attachments = []
+
+    # check for new forms
+    if submission["details"].get("survey_start_time"):
+        start_time = parser.isoparse(
+            submission["details"]["survey_start_time"]
+        )  # New forms allow editing of time in case submitted after the fact
+    else:
+        start_time = parser.isoparse(submission["start_time"])  # Old forms
+
+    # Confusingly, TurtleNestEncounter objects cover nest, track and nest & track encounters.
+    encounter = TurtleNestEncounter(
+        status="imported",
+        source="odk",
+        source_id=instance_id,
+        where=parse_geopoint(submission["details"]["observed_at"]),
+        when=start_time,
+        observer=user,
+        reporter=user,
+        comments=f"Device ID {submission['device_id']}",
+        nest_age=submission["details"]["nest_age"],
+        nest_type=submission["details"]["nest_type"],
+        species=submission["details"]["species"],
+    )
+    encounter.encounter_type = encounter.get_encounter_type()
+    encounter.set_turtle_date()
+
+    if "nest" in submission:
+        encounter.habitat = submission["nest"]["habitat"]
+        encounter.disturbance = submission["nest"]["disturbance"]
+        encounter.nest_tagged = submission["nest"]["nest_tagged"]
+        encounter.logger_found = submission["nest"]["logger_found"]
+        encounter.eggs_counted = submission["nest"]["eggs_counted"]
+        encounter.hatchlings_measured = submission["nest"]["hatchlings_measured"]
+
+    # Try to determine the encounter site & area.
+    locator.assign(encounter, encounter.where)
+
+    # get any nest photos
+    if "nest_photos" in submission:
+        nest_photos = submission["nest_photos"]
+        if nest_photos["photo_nest_1"]:
+            filename = nest_photos["photo_nest_1"]
+            attachments.append((encounter, instance_id, filename, f"Photo of nest {filename}"))
+
+        if nest_photos["photo_nest_2"]:
+            filename = nest_photos["photo_nest_2"]
+            attachments.append((encounter, instance_id, filename, f"Photo of nest {filename}"))
+
+        if nest_photos["photo_nest_3"]:
+            filename = nest_photos["photo_nest_3"]
+            attachments.append((encounter, instance_id, filename, f"Photo of nest {filename}"))
+
+    # TurtleNestObservation object
+    if "egg_count" in submission:
+        observation = submission["egg_count"]
+        nest_observation = TurtleNestObservation(
+            encounter=encounter,
+            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+            no_egg_shells=int(observation["no_egg_shells"]),
+            no_live_hatchlings=int(observation["no_live_hatchlings"]),
+            no_dead_hatchlings=int(observation["no_dead_hatchlings"]),
+            no_undeveloped_eggs=int(observation["no_undeveloped_eggs"]),
+            no_unhatched_eggs=int(observation["no_unhatched_eggs"]),
+            no_unhatched_term=int(observation["no_unhatched_term"]),
+            no_depredated_eggs=int(observation["no_depredated_eggs"]),
+            nest_depth_top=int(observation["nest_depth_top"]) if observation["nest_depth_top"] else None,
+            nest_depth_bottom=int(observation["nest_depth_bottom"]) if observation["nest_depth_bottom"] else None,
+            comments=observation["nest_excavation_comments"],
+        )
+        nest_observation.egg_count = (
+            nest_observation.no_egg_shells
+            + nest_observation.no_undeveloped_eggs
+            + nest_observation.no_unhatched_eggs
+            + nest_observation.no_unhatched_term
+        )
+        nest_observation.eggs_laid = nest_observation.egg_count and nest_observation.egg_count > 0
+        observations.append(nest_observation)
+
+        # Photo of eggs.
+        filename = observation["photo_eggs"]
+        attachments.append((encounter, instance_id, filename, f"Photo of nest eggs {filename}"))
+
+    # TurtleNestDisturbanceObservation objects
+    if "disturbance_observations" in submission:
+        # Might be a list or a single object :|
+        if not isinstance(submission["disturbance_observations"]["disturbance_observation"], list):
+            disturbances = [submission["disturbance_observations"]["disturbance_observation"]]
+        else:
+            disturbances = submission["disturbance_observations"]["disturbance_observation"]
+
+        for observation in disturbances:
+            disturbance = TurtleNestDisturbanceObservation(
+                encounter=encounter,
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                disturbance_cause=observation["disturbance_cause"],
+                disturbance_cause_confidence=observation["disturbance_cause_confidence"],
+                disturbance_severity=observation["disturbance_severity"],
+                comments=observation["comments"],
+            )
+            observations.append(disturbance)
+
+            # All photos are associated with the parent Encounter, as another Observation subclass.
+            filename = observation["photo_disturbance"]
+            attachments.append((encounter, instance_id, filename, f"Photo of nest disturbance {filename}"))
+
+    # TurtleTrackObservation object.
+    if "track_photos" in submission:
+        track_observation = submission["track_photos"]
+        if track_observation["photo_track_1"]:
+            filename = track_observation["photo_track_1"]
+            attachments.append((encounter, instance_id, filename, f"Photo of track {filename}"))
+        if track_observation["photo_track_2"]:
+            filename = track_observation["photo_track_2"]
+            attachments.append((encounter, instance_id, filename, f"Photo of track {filename}"))
+        if any(
+            [
+                track_observation["max_track_width_front"],
+                track_observation["max_track_width_rear"],
+                track_observation["carapace_drag_width"],
+                track_observation["step_length"],
+                track_observation["tail_pokes"],
+            ]
+        ):
+            track_observation = TurtleTrackObservation(
+                encounter=encounter,
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                max_track_width_front=int(track_observation["max_track_width_front"])
+                if track_observation["max_track_width_front"]
+                else None,
+                max_track_width_rear=int(track_observation["max_track_width_rear"])
+                if track_observation["max_track_width_rear"]
+                else None,
+                carapace_drag_width=int(track_observation["carapace_drag_width"])
+                if track_observation["carapace_drag_width"]
+                else None,
+                step_length=int(track_observation["step_length"]) if track_observation["step_length"] else None,
+                tail_pokes=track_observation["tail_pokes"],
+            )
+            observations.append(track_observation)
+
+    # NestTagObservation object.
+    if "nest_tag" in submission:
+        tag_observation = NestTagObservation(
+            encounter=encounter,
+            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+            status=submission["nest_tag"]["tag_status"],
+            flipper_tag_id=submission["nest_tag"]["flipper_tag_id"],
+            date_nest_laid=datetime.strptime(submission["nest_tag"]["date_nest_laid"], "%Y-%m-%d").date()
+            if submission["nest_tag"]["date_nest_laid"]
+            else None,
+            tag_label=submission["nest_tag"]["tag_label"],
+            comments=submission["nest_tag"]["tag_comments"],
+        )
+        observations.append(tag_observation)
+        # Tag photo
+        if submission["nest_tag"]["photo_tag"]:
+            filename = submission["nest_tag"]["photo_tag"]
+            attachments.append((encounter, instance_id, filename, f"Photo of nest tag {filename}"))
+
+    # LoggerObservation objects
+    if "loggers" in submission:
+        loggers = submission["loggers"]["logger_details"]
+        # Might be a list or a single object :|
+        if not isinstance(loggers, list):
+            loggers = [loggers]
+
+        for logger in loggers:
+            logger_observation = LoggerObservation(
+                encounter=encounter,
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                logger_type=logger["logger_type"],
+                deployment_status=logger["logger_status"],
+                logger_id=logger["logger_id"],
+                comments=logger["logger_comments"],
+            )
+            observations.append(logger_observation)
+
+            if logger["photo_logger"]:
+                filename = logger["photo_logger"]
+                attachments.append((encounter, instance_id, filename, f"Photo of logger {filename}"))
+
+    # HatchlingMorphometricObservation objects
+    if "hatchling_measurements" in submission:
+        hatchlings = submission["hatchling_measurements"]["hatchling_measurement"]
+        # Might be a list or a single object :|
+        if not isinstance(hatchlings, list):
+            hatchlings = [hatchlings]
+
+        for hatchling in hatchlings:
+            hatchling_measurement = HatchlingMorphometricObservation(
+                encounter=encounter,
+                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                straight_carapace_length_mm=int(hatchling["straight_carapace_length_mm"])
+                if hatchling["straight_carapace_length_mm"]
+                else None,
+                straight_carapace_width_mm=int(hatchling["straight_carapace_width_mm"])
+                if hatchling["straight_carapace_width_mm"]
+                else None,
+                body_weight_g=int(hatchling["body_weight_g"]) if hatchling["body_weight_g"] else None,
+            )
+            observations.append(hatchling_measurement)
+
+    # TurtleHatchlingEmergenceObservation objects
+    if "fan_angles" in submission:
+        fan = submission["fan_angles"]
+
+        # Seawards photo
+        filename = fan["photo_hatchling_tracks_seawards"]
+        attachments.append((encounter, instance_id, filename, f"Seawards photo of fan angles {filename}"))
+
+        # Relief photo
+        filename = fan["photo_hatchling_tracks_relief"]
+        attachments.append((encounter, instance_id, filename, f"Relief photo of fan angles {filename}"))
+
+        emergence_obs = TurtleHatchlingEmergenceObservation(
+            encounter=encounter,
+            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+            bearing_to_water_degrees=float(fan["bearing_to_water_manual"]) if fan["bearing_to_water_manual"] else None,
+            bearing_leftmost_track_degrees=float(fan["leftmost_track_manual"]) if fan["leftmost_track_manual"] else None,
+            bearing_rightmost_track_degrees=float(fan["rightmost_track_manual"]) if fan["rightmost_track_manual"] else None,
+            no_tracks_main_group=int(fan["no_tracks_main_group"]) if fan["no_tracks_main_group"] else None,
+            no_tracks_main_group_min=int(fan["no_tracks_main_group_min"]) if fan["no_tracks_main_group_min"] else None,
+            no_tracks_main_group_max=int(fan["no_tracks_main_group_max"]) if fan["no_tracks_main_group_max"] else None,
+            outlier_tracks_present=fan["outlier_tracks_present"],
+            path_to_sea_comments=fan["path_to_sea_comments"],
+            hatchling_emergence_time_known=fan["hatchling_emergence_time_known"],
+            light_sources_present=fan["light_sources_present"],
+            cloud_cover_at_emergence=int(fan["cloud_cover_at_emergence"]) if fan["cloud_cover_at_emergence"] else None,
+        )
+
+        if "hatchling_emergence_time_group" in submission:
+            emergence = submission["hatchling_emergence_time_group"]
+            emergence_obs.hatchling_emergence_time = parser.isoparse(emergence["hatchling_emergence_time"])
+            emergence_obs.hatchling_emergence_time_accuracy = emergence["hatchling_emergence_time_source"]
+
+        # TODO: path to sea record.
+        observations.append(emergence_obs)
+
+        if "outlier_tracks" in submission:
+            # Might be a list or a single object :|
+            outliers = submission["outlier_tracks"]["outlier_track"]
+            if not isinstance(outliers, list):
+                outliers = [outliers]
+
+            for outlier in outliers:
+                outlier_obs = TurtleHatchlingEmergenceOutlierObservation(
+                    encounter=encounter,
+                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                    bearing_outlier_track_degrees=float(outlier["outlier_track_bearing_manual"])
+                    if outlier["outlier_track_bearing_manual"]
+                    else None,
+                    outlier_group_size=int(outlier["outlier_group_size"]) if outlier["outlier_group_size"] else None,
+                    outlier_track_comment=outlier["outlier_track_comment"],
+                )
+                observations.append(outlier_obs)
+                # Outlier photo
+                filename = outlier["outlier_track_photo"]
+                attachments.append((encounter, instance_id, filename, f"Outlier track of fan angles {filename}"))
+
+        if "light_sources" in submission:
+            # Might be a list or a single object :|
+            light_sources = submission["light_sources"]["light_source"]
+            if not isinstance(light_sources, list):
+                light_sources = [light_sources]
+
+            for source in light_sources:
+                source_obs = LightSourceObservation(
+                    encounter=encounter,
+                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
+                    bearing_light_degrees=int(source["light_bearing_manual"]) if source["light_bearing_manual"] else None,
+                    light_source_type=source["light_source_type"],
+                    light_source_description=source["light_source_description"],
+                )
+                observations.append(source_obs)
+
+                # Light source photo
+                filename = source["light_source_photo"]
+                attachments.append((encounter, instance_id, filename, f"Light source photo {filename}"))
+
+    return encounter, observations, attachments
+
+
+def save_turtle_nest_encounters(staged, bulk=True):
+    """Save a batch of parsed TurtleNestEncounters and their child observations, as returned by
+    `parse_turtle_track_or_nest`, in one transaction. If `bulk` is True, encounters and observations are
+    written with one multi-row insert per table, otherwise each record is saved individually.
+    """
+    with transaction.atomic():
+        if not bulk:
+            for encounter, observations, _ in staged:
+                encounter.save()
+                for observation in observations:
+                    observation.save()
+            return
+
+        bulk_create_polymorphic(TurtleNestEncounter, [encounter for encounter, _, _ in staged])
+        # Group the child observations by model, so that each table receives a single insert.
+        observations = {}
+        for _, children, _ in staged:
+            for observation in children:
+                observations.setdefault(type(observation), []).append(observation)
+        for model, objs in observations.items():
+            bulk_create_polymorphic(model, objs)
+        # Bulk inserts bypass the post_save signals, so queue the report rows explicitly.
+        NestTrackReport.enqueue([encounter.pk for encounter, _, _ in staged])
+
+
+def import_turtle_track_or_nest(
+    form_id="turtle_track_or_nest", auth_headers=None, max_workers=None, incremental=True, odata=True, batch_size=500
+):
     """Import submissions to the Turtle Track or Nest ODK form.
     Each submission should create:
         1 TurtleNestEncounter
@@ -79,448 +651,75 @@ def import_turtle_track_or_nest(form_id="turtle_track_or_nest", auth_headers=Non
         0+ HatchlingMorphometricObservation (hatchling measurements)
         0+ TurtleHatchlingEmergenceOutlierObservation (outlier measurements measured in fan angles)
         0+ LightSourceObservation (measured in fan angles)
+    Submissions are parsed first, then written in batches of `batch_size` using bulk inserts.
     """
     if not auth_headers:
         LOGGER.info("Downloading auth headers")
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=TurtleNestEncounter.objects.filter(source="odk"),
+    )
     LOGGER.info(f"Downloaded {form_id} submission data")
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    staged = []
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if TurtleNestEncounter.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
 
-            # Try to match the reporter to an existing user. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
-
-            # check for new forms
-            if "survey_start_time" in submission["details"]:
-                start_time = parser.isoparse(
-                    submission["details"]["survey_start_time"]
-                )  # New forms allow editing of time in case submitted after the fact
-            else:
-                start_time = parser.isoparse(submission["start_time"])  # Old forms
-
-            # Confusingly, TurtleNestEncounter objects cover nest, track and nest & track encounters.
-            encounter = TurtleNestEncounter(
-                status="imported",
-                source="odk",
-                source_id=instance_id,
-                where=parse_geopoint(submission["details"]["observed_at"]),
-                when=start_time,
-                observer=user,
-                reporter=user,
-                comments=f"Device ID {submission['device_id']}",
-                nest_age=submission["details"]["nest_age"],
-                nest_type=submission["details"]["nest_type"],
-                species=submission["details"]["species"],
-            )
-            encounter.encounter_type = encounter.get_encounter_type()
-
-            if "nest" in submission:
-                encounter.habitat = submission["nest"]["habitat"]
-                encounter.disturbance = submission["nest"]["disturbance"]
-                encounter.nest_tagged = submission["nest"]["nest_tagged"]
-                encounter.logger_found = submission["nest"]["logger_found"]
-                encounter.eggs_counted = submission["nest"]["eggs_counted"]
-                encounter.hatchlings_measured = submission["nest"]["hatchlings_measured"]
-
-            # Try to determine the encounter site & area.
-            encounter.area = encounter.guess_area
-            encounter.site = encounter.guess_site
-
-            encounter.save()
-            LOGGER.info(f"Created TurtleNestEncounter: {encounter}")
+            user = users.get_user(reporter)
 
-            # get any nest photos
-            if "nest_photos" in submission:
-                nest_photos = submission["nest_photos"]
-                if nest_photos["photo_nest_1"]:
-                    filename = nest_photos["photo_nest_1"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of nest {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-
-                if nest_photos["photo_nest_2"]:
-                    filename = nest_photos["photo_nest_2"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of nest {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-
-                if nest_photos["photo_nest_3"]:
-                    filename = nest_photos["photo_nest_3"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of nest {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-
-            # TurtleNestObservation object
-            if "egg_count" in submission:
-                observation = submission["egg_count"]
-                nest_observation = TurtleNestObservation(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    no_egg_shells=int(observation["no_egg_shells"]),
-                    no_live_hatchlings=int(observation["no_live_hatchlings"]),
-                    no_dead_hatchlings=int(observation["no_dead_hatchlings"]),
-                    no_undeveloped_eggs=int(observation["no_undeveloped_eggs"]),
-                    no_unhatched_eggs=int(observation["no_unhatched_eggs"]),
-                    no_unhatched_term=int(observation["no_unhatched_term"]),
-                    no_depredated_eggs=int(observation["no_depredated_eggs"]),
-                    nest_depth_top=int(observation["nest_depth_top"]) if observation["nest_depth_top"] else None,
-                    nest_depth_bottom=int(observation["nest_depth_bottom"]) if observation["nest_depth_bottom"] else None,
-                    comments=observation["nest_excavation_comments"],
-                )
-                nest_observation.egg_count = (
-                    nest_observation.no_egg_shells
-                    + nest_observation.no_undeveloped_eggs
-                    + nest_observation.no_unhatched_eggs
-                    + nest_observation.no_unhatched_term
-                )
-                nest_observation.eggs_laid = nest_observation.egg_count and nest_observation.egg_count > 0
-                nest_observation.save()
-                LOGGER.info(f"Created TurtleNestObservation {nest_observation}")
-
-                # Photo of eggs.
-                filename = observation["photo_eggs"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Photo of nest eggs {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
-
-            # TurtleNestDisturbanceObservation objects
-            if "disturbance_observations" in submission:
-                # Might be a list or a single object :|
-                if not isinstance(submission["disturbance_observations"]["disturbance_observation"], list):
-                    observations = [submission["disturbance_observations"]["disturbance_observation"]]
-                else:
-                    observations = submission["disturbance_observations"]["disturbance_observation"]
+            staged.append(parse_turtle_track_or_nest(submission, user, locator))
+        except:
+            failed.append(instance_id)
+            LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    # Write the parsed records in batches, one transaction per batch.
+    for i in range(0, len(staged), batch_size):
+        batch = staged[i : i + batch_size]
+        try:
+            save_turtle_nest_encounters(batch)
+            LOGGER.info(f"Created {len(batch)} TurtleNestEncounters")
+        except:
+            # Fall back to saving the batch one record at a time, to isolate any failing submission.
+            LOGGER.exception(f"Exception during bulk import of ODK {form_id} submissions, saving individually")
+            for record in batch:
+                encounter, observations, _ = record
+                for obj in [encounter, *observations]:  # Discard any primary keys assigned in the failed batch.
+                    obj.pk = obj.id = None
+                    obj._state.adding = True
                 for observation in observations:
-                    disturbance = TurtleNestDisturbanceObservation(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        disturbance_cause=observation["disturbance_cause"],
-                        disturbance_cause_confidence=observation["disturbance_cause_confidence"],
-                        disturbance_severity=observation["disturbance_severity"],
-                        comments=observation["comments"],
-                    )
-                    disturbance.save()
-                    LOGGER.info(f"Created TurtleNestDisturbanceObservation: {disturbance}")
-
-                    # All photos are associated with the parent Encounter, as another Observation subclass.
-                    filename = observation["photo_disturbance"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of nest disturbance {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-
-            # TurtleTrackObservation object.
-            if "track_photos" in submission:
-                track_observation = submission["track_photos"]
-                if track_observation["photo_track_1"]:
-                    filename = track_observation["photo_track_1"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of track {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-                if track_observation["photo_track_2"]:
-                    filename = track_observation["photo_track_2"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of track {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
-                if any(
-                    [
-                        track_observation["max_track_width_front"],
-                        track_observation["max_track_width_rear"],
-                        track_observation["carapace_drag_width"],
-                        track_observation["step_length"],
-                        track_observation["tail_pokes"],
-                    ]
-                ):
-                    track_observation = TurtleTrackObservation(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        max_track_width_front=int(track_observation["max_track_width_front"])
-                        if track_observation["max_track_width_front"]
-                        else None,
-                        max_track_width_rear=int(track_observation["max_track_width_rear"])
-                        if track_observation["max_track_width_rear"]
-                        else None,
-                        carapace_drag_width=int(track_observation["carapace_drag_width"])
-                        if track_observation["carapace_drag_width"]
-                        else None,
-                        step_length=int(track_observation["step_length"]) if track_observation["step_length"] else None,
-                        tail_pokes=track_observation["tail_pokes"],
-                    )
-                    track_observation.save()
-                    LOGGER.info(f"Created TurtleTrackObservation {track_observation}")
+                    observation.encounter = encounter
+                try:
+                    save_turtle_nest_encounters([record], bulk=False)
+                    LOGGER.info(f"Created TurtleNestEncounter: {encounter}")
+                except:
+                    failed.append(encounter.source_id)
+                    encounter.pk = encounter.id = None
+                    LOGGER.exception(f"Exception during import of ODK {form_id} submission {encounter.source_id}")
 
-            # NestTagObservation object.
-            if "nest_tag" in submission:
-                tag_observation = NestTagObservation(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    status=submission["nest_tag"]["tag_status"],
-                    flipper_tag_id=submission["nest_tag"]["flipper_tag_id"],
-                    date_nest_laid=datetime.strptime(submission["nest_tag"]["date_nest_laid"], "%Y-%m-%d").date()
-                    if submission["nest_tag"]["date_nest_laid"]
-                    else None,
-                    tag_label=submission["nest_tag"]["tag_label"],
-                    comments=submission["nest_tag"]["tag_comments"],
-                )
-                tag_observation.save()
-                LOGGER.info(f"Created NestTagObservation {tag_observation}")
-                # Tag photo
-                if submission["nest_tag"]["photo_tag"]:
-                    filename = submission["nest_tag"]["photo_tag"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of nest tag {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
+    # Photos are downloaded after all submissions have been saved.
+    attachments = [attachment for encounter, _, photos in staged if encounter.pk for attachment in photos]
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
 
-            # LoggerObservation objects
-            if "loggers" in submission:
-                loggers = submission["loggers"]["logger_details"]
-                # Might be a list or a single object :|
-                if not isinstance(loggers, list):
-                    loggers = [loggers]
+    return finish_import(project_id, form_id, submissions, failed, watermark)
 
-                for logger in loggers:
-                    logger_observation = LoggerObservation(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        logger_type=logger["logger_type"],
-                        deployment_status=logger["logger_status"],
-                        logger_id=logger["logger_id"],
-                        comments=logger["logger_comments"],
-                    )
-                    logger_observation.save()
-                    LOGGER.info(f"Created LoggerObservation: {logger_observation}")
-
-                    if logger["photo_logger"]:
-                        filename = logger["photo_logger"]
-                        LOGGER.info(f"Downloading {filename}")
-                        attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                        photo = MediaAttachment(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            media_type="photograph",
-                            title=f"Photo of logger {filename}",
-                            attachment=attachment,
-                        )
-                        photo.save()
-                        LOGGER.info(f"Created MediaAttachment {photo}")
-
-            # HatchlingMorphometricObservation objects
-            if "hatchling_measurements" in submission:
-                hatchlings = submission["hatchling_measurements"]["hatchling_measurement"]
-                # Might be a list or a single object :|
-                if not isinstance(hatchlings, list):
-                    hatchlings = [hatchlings]
 
-                for hatchling in hatchlings:
-                    hatchling_measurement = HatchlingMorphometricObservation(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        straight_carapace_length_mm=int(hatchling["straight_carapace_length_mm"])
-                        if hatchling["straight_carapace_length_mm"]
-                        else None,
-                        straight_carapace_width_mm=int(hatchling["straight_carapace_width_mm"])
-                        if hatchling["straight_carapace_width_mm"]
-                        else None,
-                        body_weight_g=int(hatchling["body_weight_g"]) if hatchling["body_weight_g"] else None,
-                    )
-                    hatchling_measurement.save()
-                    LOGGER.info(f"Created HatchlingMorphometricObservation: {hatchling_measurement}")
-
-            # TurtleHatchlingEmergenceObservation objects
-            if "fan_angles" in submission:
-                fan = submission["fan_angles"]
-
-                # Seawards photo
-                filename = fan["photo_hatchling_tracks_seawards"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Seawards photo of fan angles {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
-
-                # Relief photo
-                filename = fan["photo_hatchling_tracks_relief"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Relief photo of fan angles {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
-
-                emergence_obs = TurtleHatchlingEmergenceObservation(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    bearing_to_water_degrees=float(fan["bearing_to_water_manual"]) if fan["bearing_to_water_manual"] else None,
-                    bearing_leftmost_track_degrees=float(fan["leftmost_track_manual"]) if fan["leftmost_track_manual"] else None,
-                    bearing_rightmost_track_degrees=float(fan["rightmost_track_manual"]) if fan["rightmost_track_manual"] else None,
-                    no_tracks_main_group=int(fan["no_tracks_main_group"]) if fan["no_tracks_main_group"] else None,
-                    no_tracks_main_group_min=int(fan["no_tracks_main_group_min"]) if fan["no_tracks_main_group_min"] else None,
-                    no_tracks_main_group_max=int(fan["no_tracks_main_group_max"]) if fan["no_tracks_main_group_max"] else None,
-                    outlier_tracks_present=fan["outlier_tracks_present"],
-                    path_to_sea_comments=fan["path_to_sea_comments"],
-                    hatchling_emergence_time_known=fan["hatchling_emergence_time_known"],
-                    light_sources_present=fan["light_sources_present"],
-                    cloud_cover_at_emergence=int(fan["cloud_cover_at_emergence"]) if fan["cloud_cover_at_emergence"] else None,
-                )
-
-                if "hatchling_emergence_time_group" in submission:
-                    emergence = submission["hatchling_emergence_time_group"]
-                    emergence_obs.hatchling_emergence_time = parser.isoparse(emergence["hatchling_emergence_time"])
-                    emergence_obs.hatchling_emergence_time_accuracy = emergence["hatchling_emergence_time_source"]
-
-                # TODO: path to sea record.
-                emergence_obs.save()
-                LOGGER.info(f"Created TurtleHatchlingEmergenceObservation {emergence_obs}")
-
-                if "outlier_tracks" in submission:
-                    # Might be a list or a single object :|
-                    outliers = submission["outlier_tracks"]["outlier_track"]
-                    if not isinstance(outliers, list):
-                        outliers = [outliers]
-
-                    for outlier in outliers:
-                        outlier_obs = TurtleHatchlingEmergenceOutlierObservation(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            bearing_outlier_track_degrees=float(outlier["outlier_track_bearing_manual"])
-                            if outlier["outlier_track_bearing_manual"]
-                            else None,
-                            outlier_group_size=int(outlier["outlier_group_size"]) if outlier["outlier_group_size"] else None,
-                            outlier_track_comment=outlier["outlier_track_comment"],
-                        )
-                        outlier_obs.save()
-                        LOGGER.info(f"Created TurtleHatchlingEmergenceOutlierObservation {outlier_obs}")
-                        # Outlier photo
-                        filename = outlier["outlier_track_photo"]
-                        LOGGER.info(f"Downloading {filename}")
-                        attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                        photo = MediaAttachment(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            media_type="photograph",
-                            title=f"Outlier track of fan angles {filename}",
-                            attachment=attachment,
-                        )
-                        photo.save()
-                        LOGGER.info(f"Created MediaAttachment {photo}")
-
-                if "light_sources" in submission:
-                    # Might be a list or a single object :|
-                    light_sources = submission["light_sources"]["light_source"]
-                    if not isinstance(light_sources, list):
-                        light_sources = [light_sources]
-
-                    for source in light_sources:
-                        source_obs = LightSourceObservation(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            bearing_light_degrees=int(source["light_bearing_manual"]) if source["light_bearing_manual"] else None,
-                            light_source_type=source["light_source_type"],
-                            light_source_description=source["light_source_description"],
-                        )
-                        source_obs.save()
-                        LOGGER.info(f"Created LightSourceObservation {source_obs}")
-
-                        # Light source photo
-                        filename = source["light_source_photo"]
-                        LOGGER.info(f"Downloading {filename}")
-                        attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                        photo = MediaAttachment(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            media_type="photograph",
-                            title=f"Light source photo {filename}",
-                            attachment=attachment,
-                        )
-                        photo.save()
-                        LOGGER.info(f"Created MediaAttachment {photo}")
-        except:
-            LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
-
-
-def import_turtle_track_or_nest_simple(form_id="beach_tracks_nest_simple", auth_headers=None):
+def import_turtle_track_or_nest_simple(
+    form_id="beach_tracks_nest_simple", auth_headers=None, max_workers=None, incremental=True, odata=True
+):
     """Import submissions to the Simple turtle Track or Nest ODK form.
     Each submission should create:
     1 TurtleNestEncounter
@@ -532,20 +731,31 @@ def import_turtle_track_or_nest_simple(form_id="beach_tracks_nest_simple", auth_
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=TurtleNestEncounter.objects.filter(source="odk"),
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    attachments = []  # Photos are downloaded after all submissions have been processed.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if TurtleNestEncounter.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
 
-            # Try to match the reporter to an existing user. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
+            user = users.get_user(reporter)
 
             # check for new forms
-            if "survey_start_time" in submission["details"]:
+            if submission["details"].get("survey_start_time"):
                 start_time = parser.isoparse(
                     submission["details"]["survey_start_time"]
                 )  # New forms allow editing of time in case submitted after the fact
@@ -577,8 +787,7 @@ def import_turtle_track_or_nest_simple(form_id="beach_tracks_nest_simple", auth_
                     encounter.disturbance = "no"
 
             # Try to determine the encounter site & area.
-            encounter.area = encounter.guess_area
-            encounter.site = encounter.guess_site
+            locator.assign(encounter, encounter.where)
 
             encounter.save()
             LOGGER.info(f"Created TurtleNestEncounter: {encounter}")
@@ -587,30 +796,10 @@ def import_turtle_track_or_nest_simple(form_id="beach_tracks_nest_simple", auth_
                 track_observation = submission["details"]["track_photos"]
                 if track_observation["photo_track_1"]:
                     filename = track_observation["photo_track_1"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of track {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
+                    attachments.append((encounter, instance_id, filename, f"Photo of track {filename}"))
                 if track_observation["photo_track_2"]:
                     filename = track_observation["photo_track_2"]
-                    LOGGER.info(f"Downloading {filename}")
-                    attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                    photo = MediaAttachment(
-                        encounter=encounter,
-                        source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                        media_type="photograph",
-                        title=f"Photo of track {filename}",
-                        attachment=attachment,
-                    )
-                    photo.save()
-                    LOGGER.info(f"Created MediaAttachment {photo}")
+                    attachments.append((encounter, instance_id, filename, f"Photo of track {filename}"))
                 if any(
                     [
                         track_observation["max_track_width_front"],
@@ -641,10 +830,17 @@ def import_turtle_track_or_nest_simple(form_id="beach_tracks_nest_simple", auth_
                     disturbance.save()
                     LOGGER.info(f"Created TurtleNestDisturbanceObservation: {disturbance}")
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
 
-def import_site_visit_start(form_id="site_visit_start", initial_duration_hr=8, auth_headers=None):
+    return finish_import(project_id, form_id, submissions, failed, watermark)
+
+
+def import_site_visit_start(
+    form_id="site_visit_start", initial_duration_hr=8, auth_headers=None, max_workers=None, incremental=True, odata=True
+):
     """Import submissions to the Site Visit Start ODK form.
     Each submission should create one Survey.
     """
@@ -653,21 +849,35 @@ def import_site_visit_start(form_id="site_visit_start", initial_duration_hr=8, a
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=Survey.objects.filter(source="odk"),
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    attachments = []  # Photos are downloaded after all submissions have been processed.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
+    users.create_missing(
+        (name for submission in submissions for name in (submission.get("site_visit", {}).get("team") or "").split(",")), partial=True
+    )
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if Survey.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
 
-            # Try to match the reporter to an existing User. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
+            user = users.get_user(reporter)
 
             visit = submission["site_visit"]
             # Check for new forms
-            if "survey_start_time" in visit:
+            if visit.get("survey_start_time"):
                 start_time = parser.isoparse(visit["survey_start_time"])  # New forms allow editing of time in case submitted after the fact
             else:
                 start_time = parser.isoparse(submission["start_time"])  # Old forms
@@ -685,8 +895,7 @@ def import_site_visit_start(form_id="site_visit_start", initial_duration_hr=8, a
 
             # Guess the area & site, and plug in an initial estimated end_time.
             # The correct end_time will (hopefully) be gathered from the Site Visit End form.
-            survey.area = survey.guess_area
-            survey.site = survey.guess_site
+            locator.assign(survey, survey.start_location)
             survey.end_time = survey.start_time + timedelta(hours=initial_duration_hr)
 
             # Set training surveys to non production
@@ -702,65 +911,68 @@ def import_site_visit_start(form_id="site_visit_start", initial_duration_hr=8, a
                 team = visit["team"].split(",")
                 for name in team:
                     name = name.strip()
-                    if User.objects.filter(is_active=True, name__icontains=name).exists():
-                        user = User.objects.filter(is_active=True, name__icontains=name).first()
-                    else:  # Create a new user.
-                        user = create_new_user(name)
-                        LOGGER.info(f"Created new user {user}")
-                    survey.team.add(user)
+                    survey.team.add(users.get_user(name, partial=True))
 
             LOGGER.info(f"Created Survey {survey}")
 
             if visit["site_conditions"]:
                 filename = visit["site_conditions"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = SurveyMediaAttachment(
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    survey=survey,
-                    media_type="photograph",
-                    title=f"Photo of site visit start {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created SurveyMediaAttachment {photo}")
+                attachments.append((survey, instance_id, filename, f"Photo of site visit start {filename}"))
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
+
+    return finish_import(project_id, form_id, submissions, failed, watermark)
 
-def import_site_visit_end(form_id="site_visit_end", duration_hr=8, auth_headers=None):
+
+def import_site_visit_end(form_id="site_visit_end", duration_hr=8, auth_headers=None, max_workers=None, incremental=True, odata=True):
     """Import submissions to the Site Visit End ODK form.
     This differs from the functions above, in that it tries to match on an existing
     Survey object and update its details.
+    Submissions which can't be matched to a site and a single Survey are recorded as failed, and so are
+    matched again by later imports.
     """
     if not auth_headers:
         LOGGER.info("Downloading auth headers")
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=Survey.objects.filter(source="odk"),
+        imported_field="end_source_id",
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    attachments = []  # Photos are downloaded after all submissions have been processed.
+    failed = []  # Instance IDs of the submissions which could not be imported.
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if Survey.objects.filter(source="odk", end_source_id=instance_id):
-                continue  # Skip records already imported.
 
             # Try to match a site by location (just use the first one returned by the database).
             visit = submission["site_visit"]
             location = parse_geopoint(visit["location"])
-            site = Area.objects.filter(area_type=Area.AREATYPE_SITE, geom__covers=location).first()
+            site = locator.site(location)
 
             if not site:
                 # Send a warning to the admins to investigate & address.
                 log = f"Site Visit End form: unable to match a site for survey end at {location.wkt}"
                 LOGGER.warning(log)
+                failed.append(instance_id)  # Not imported: recorded to be requested again by the next import.
                 continue
 
             # Try to match one (only) existing Survey object.
             # Algorithm: filter Surveys in the same Site, having a start_time not before end_time by
             # greater than `duration_hr` hours.
-            if "survey_start_time" in visit:
+            if visit.get("survey_end_time"):
                 end_time = parser.isoparse(visit["survey_end_time"])  # New forms allow editing of time in case submitted after the fact
             else:
                 end_time = parser.isoparse(submission["end_time"])  # Old forms
@@ -774,6 +986,7 @@ def import_site_visit_end(form_id="site_visit_end", duration_hr=8, auth_headers=
             if surveys.count() != 1:
                 log = f"Site Visit End form: unable to match a single Survey (matched {surveys.count()})"
                 LOGGER.warning(log)
+                failed.append(instance_id)  # Not imported: recorded to be requested again by the next import.
                 continue
             else:
                 survey = surveys.first()
@@ -789,22 +1002,17 @@ def import_site_visit_end(form_id="site_visit_end", duration_hr=8, auth_headers=
 
             if visit["site_conditions"]:
                 filename = visit["site_conditions"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = SurveyMediaAttachment(
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    survey=survey,
-                    media_type="photograph",
-                    title=f"Photo of site visit end {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created SurveyMediaAttachment {photo}")
+                attachments.append((survey, instance_id, filename, f"Photo of site visit end {filename}"))
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
+
+    return finish_import(project_id, form_id, submissions, failed, watermark)
 
-def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_headers=None):
+
+def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_headers=None, max_workers=None, incremental=True, odata=True):
     """Import submissions to the Marine Wildlife Incident ODK form.
     Each submission should create:
         1 AnimalEncounter
@@ -817,17 +1025,28 @@ def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_hea
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=AnimalEncounter.objects.filter(source="odk"),
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    attachments = []  # Photos are downloaded after all submissions have been processed.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if AnimalEncounter.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
 
-            # Try to match the reporter to an existing User. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
+            user = users.get_user(reporter)
 
             site_visit = submission["site_visit"]
             if site_visit["habitat"]:
@@ -873,121 +1092,43 @@ def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_hea
             encounter.scanned_for_pit_tags = checks["scanned_for_pit_tags"]
             encounter.checked_for_flipper_tags = checks["checked_for_flipper_tags"]
 
+            # Try to determine the encounter site & area.
+            locator.assign(encounter, encounter.where)
             encounter.save()
             LOGGER.info(f"Created AnimalEncounter: {encounter}")
 
             # All photo uploads.
             if submission["site_visit"]["photo_habitat"]:
                 filename = submission["site_visit"]["photo_habitat"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Habitate photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Habitate photo {filename}"))
 
             if submission["photos_turtle"]["photo_carapace_top"]:
                 filename = submission["photos_turtle"]["photo_carapace_top"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Carapace photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Carapace photo {filename}"))
 
             if submission["photos_turtle"]["photo_head_top"]:
                 filename = submission["photos_turtle"]["photo_head_top"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Head top photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Head top photo {filename}"))
 
             if submission["photos_turtle"]["photo_head_side"]:
                 filename = submission["photos_turtle"]["photo_head_side"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Head side photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Head side photo {filename}"))
 
             if submission["photos_turtle"]["photo_head_front"]:
                 filename = submission["photos_turtle"]["photo_head_front"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Head front photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Head front photo {filename}"))
 
             if submission["habitat_photos"]["photo_habitat_1"]:
                 filename = submission["habitat_photos"]["photo_habitat_1"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Scene photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Scene photo {filename}"))
 
             if submission["habitat_photos"]["photo_habitat_2"]:
                 filename = submission["habitat_photos"]["photo_habitat_2"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Scene photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Scene photo {filename}"))
 
             if submission["habitat_photos"]["photo_habitat_3"]:
                 filename = submission["habitat_photos"]["photo_habitat_3"]
-                LOGGER.info(f"Downloading {filename}")
-                attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                photo = MediaAttachment(
-                    encounter=encounter,
-                    source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                    media_type="photograph",
-                    title=f"Scene photo {filename}",
-                    attachment=attachment,
-                )
-                photo.save()
-                LOGGER.info(f"Created MediaAttachment {photo}")
+                attachments.append((encounter, instance_id, filename, f"Scene photo {filename}"))
 
             # TurtleDamageObservation
             if "damage_observations" in submission:
@@ -1010,17 +1151,7 @@ def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_hea
 
                     if obs["photo_damage"]:
                         filename = obs["photo_damage"]
-                        LOGGER.info(f"Downloading {filename}")
-                        attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                        photo = MediaAttachment(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            media_type="photograph",
-                            title=f"Animal damage photo {filename}",
-                            attachment=attachment,
-                        )
-                        photo.save()
-                        LOGGER.info(f"Created MediaAttachment {photo}")
+                        attachments.append((encounter, instance_id, filename, f"Animal damage photo {filename}"))
 
             # TagObservation
             if "tag_observations" in submission:
@@ -1045,17 +1176,7 @@ def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_hea
 
                     if obs["tag_photo"]:
                         filename = obs["tag_photo"]
-                        LOGGER.info(f"Downloading {filename}")
-                        attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-                        photo = MediaAttachment(
-                            encounter=encounter,
-                            source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                            media_type="photograph",
-                            title=f"Tag photo {filename}",
-                            attachment=attachment,
-                        )
-                        photo.save()
-                        LOGGER.info(f"Created MediaAttachment {photo}")
+                        attachments.append((encounter, instance_id, filename, f"Tag photo {filename}"))
 
             # TurtleMorphometricObservation
             morph = submission["morphometrics"]
@@ -1082,10 +1203,15 @@ def import_marine_wildlife_incident(form_id="marine_wildlife_incident", auth_hea
                 morphometric_obs.save()
                 LOGGER.info(f"Created TurtleMorphometricObservation: {morphometric_obs}")
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
 
-def import_turtle_sighting(form_id="turtle_sighting", auth_headers=None):
+    return finish_import(project_id, form_id, submissions, failed, watermark)
+
+
+def import_turtle_sighting(form_id="turtle_sighting", auth_headers=None, max_workers=None, incremental=True, odata=True):
     """Import submissions to the Turtle Sighting ODK form.
     Each submission should create one AnimalEncounter.
     """
@@ -1094,18 +1220,27 @@ def import_turtle_sighting(form_id="turtle_sighting", auth_headers=None):
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers,
+        project_id,
+        form_id,
+        incremental=incremental,
+        odata=odata,
+        max_workers=max_workers,
+        imported_queryset=AnimalEncounter.objects.filter(source="odk"),
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
 
-            if AnimalEncounter.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
-
-            # Try to match the reporter to an existing User. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
+            user = users.get_user(reporter)
 
             sighting = submission["encounter"]
             encounter = AnimalEncounter(
@@ -1126,14 +1261,19 @@ def import_turtle_sighting(form_id="turtle_sighting", auth_headers=None):
                 interaction_choices = dict(TURTLE_INTERACTION_CHOICES)
                 encounter.behaviour = interaction_choices.get(sighting["interaction"], None)
 
+            # Try to determine the encounter site & area.
+            locator.assign(encounter, encounter.where)
             encounter.save()
 
             LOGGER.info(f"Created AnimalEncounter {encounter}")
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
 
+    return finish_import(project_id, form_id, submissions, failed, watermark)
 
-def import_predator_or_disturbance(form_id="predator_or_disturbance", auth_headers=None):
+
+def import_predator_or_disturbance(form_id="predator_or_disturbance", auth_headers=None, max_workers=None, incremental=True, odata=True):
     """Import submissions to the Predator or Disturbance ODK form.
     Each submission should create:
     1 Encounter (type: disturbance)
@@ -1144,17 +1284,22 @@ def import_predator_or_disturbance(form_id="predator_or_disturbance", auth_heade
         auth_headers = get_auth_headers()
     project_id = settings.ODK_API_PROJECTID
     LOGGER.info(f"Downloading {form_id} submission data")
-    submissions = get_form_submission_data(auth_headers, project_id, form_id)
-
+    submissions, watermark = get_new_submissions(
+        auth_headers, project_id, form_id, incremental=incremental, odata=odata, max_workers=max_workers
+    )
+
+    locator = AreaLocator()  # Assign localities & sites without a spatial query per submission.
+    attachments = []  # Photos are downloaded after all submissions have been processed.
+    failed = []  # Instance IDs of the submissions which could not be imported.
+    users = UserResolver()  # Resolve reporters to users without a query per submission.
+    users.create_missing(submission.get("reporter") for submission in submissions)
     for submission in submissions:
+        instance_id = submission["meta"]["instanceID"]
         try:
-            instance_id = submission["meta"]["instanceID"]
-            if Encounter.objects.filter(source="odk", source_id=instance_id):
-                continue  # Skip records already imported.
 
-            # Try to match the reporter to an existing user. If not, create a new one.
+            # Match the reporter to an existing user (new users were created before the loop).
             reporter = submission["reporter"]
-            user = get_user(reporter)
+            user = users.get_user(reporter)
             start = parser.isoparse(submission["start_time"])
             disturbance = submission["disturbance"]
 
@@ -1169,24 +1314,13 @@ def import_predator_or_disturbance(form_id="predator_or_disturbance", auth_heade
                 encounter_type=Encounter.ENCOUNTER_DISTURBANCE,
             )
             # Try to determine the encounter site & area.
-            encounter.area = encounter.guess_area
-            encounter.site = encounter.guess_site
+            locator.assign(encounter, encounter.where)
             encounter.save()
             LOGGER.info(f"Created Encounter: {encounter}")
 
             # MediaAttachment (photo).
             filename = disturbance["photo"]
-            LOGGER.info(f"Downloading {filename}")
-            attachment = get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename)
-            photo = MediaAttachment(
-                encounter=encounter,
-                source=LegacySourceMixin.SOURCE_DIGITAL_CAPTURE_ODK,
-                media_type="photograph",
-                title=f"Disturbance/predator photo {filename}",
-                attachment=attachment,
-            )
-            photo.save()
-            LOGGER.info(f"Created MediaAttachment {photo}")
+            attachments.append((encounter, instance_id, filename, f"Disturbance/predator photo {filename}"))
 
             # DisturbanceObservation object.
             disturbance_observation = DisturbanceObservation(
@@ -1199,4 +1333,55 @@ def import_predator_or_disturbance(form_id="predator_or_disturbance", auth_heade
             disturbance_observation.save()
             LOGGER.info(f"Created DisturbanceObservation {disturbance_observation}")
         except:
+            failed.append(instance_id)
             LOGGER.exception(f"Exception during import of ODK {form_id} submission {instance_id}")
+
+    save_attachments(auth_headers, project_id, form_id, attachments, max_workers=max_workers)
+
+    return finish_import(project_id, form_id, submissions, failed, watermark)
+
+
+# The import function for each ODK form.
+IMPORT_FUNCTIONS = {
+    "turtle_track_or_nest": import_turtle_track_or_nest,
+    "beach_tracks_nest_simple": import_turtle_track_or_nest_simple,
+    "site_visit_start": import_site_visit_start,
+    "site_visit_end": import_site_visit_end,
+    "marine_wildlife_incident": import_marine_wildlife_incident,
+    "turtle_sighting": import_turtle_sighting,
+    "predator_or_disturbance": import_predator_or_disturbance,
+}
+
+# The forms in each stage are independent of one another and may be imported concurrently.
+# Site Visit Start surveys claim the encounters imported in the first stage, and Site Visit End
+# submissions update the surveys created by Site Visit Start, so those stages run in order.
+IMPORT_STAGES = (
+    ("turtle_track_or_nest", "beach_tracks_nest_simple", "marine_wildlife_incident", "turtle_sighting", "predator_or_disturbance"),
+    ("site_visit_start",),
+    ("site_visit_end",),
+)
+
+
+def run_import_job(job_id, **kwargs):
+    """Run an OdkImportJob in this process, recording its status, counts and timings.
+    Keyword arguments are passed to the import function for the job's form.
+    A job fails if the import raises an exception (the form's sync cursor is not advanced, so a retry requests
+    the same submissions again), or if any new submission could not be imported (failed submissions are requested
+    again by each later import, see finish_import).
+    Returns the job status.
+    """
+    job = OdkImportJob.objects.get(pk=job_id)
+    job.start()
+    LOGGER.info(f"Importing ODK form {job.form_id}")
+    try:
+        job.submissions, job.failures = IMPORT_FUNCTIONS[job.form_id](form_id=job.form_id, **kwargs)
+    except Exception:
+        LOGGER.exception(f"An error occurred during import of ODK form {job.form_id}")
+        job.fail(traceback.format_exc())
+    else:
+        if job.failures:
+            job.fail(f"{job.failures} of {job.submissions} submissions could not be imported")
+        else:
+            job.complete()
+    LOGGER.info(f"Import of ODK form {job.form_id} {job.status}: {job.imported}/{job.submissions} submissions in {job.duration}")
+    return job.status
@@ -0,0 +1,218 @@
+"""Automated QA/QC rules for imported encounters.
+
+Each rule selects the imported encounters that it applies to with a queryset predicate. All of the matching
+encounters are transitioned at once with `bulk_transition()`, in place of a save() per encounter.
+Rules are applied in order, so an encounter flagged by one rule is no longer imported when the next rule runs.
+"""
+
+import logging
+
+from django.db.models import Exists, OuterRef, Q
+
+from .lookups import NEST_TYPE_TRACK_UNSURE, TURTLE_SPECIES_DEFAULT
+from .models import (
+    AnimalEncounter,
+    Area,
+    Encounter,
+    TrackTallyObservation,
+    TurtleNestDisturbanceObservation,
+    TurtleNestDisturbanceTallyObservation,
+    TurtleNestEncounter,
+)
+
+
+class QARule(object):
+    """An automated QA/QC check, which applies a transition to the imported encounters matching a predicate.
+
+    `message` (logged) and `description` (recorded in the StateLog) are format strings. `values` maps extra
+    placeholders to field lookups on the encounter: matching encounters are grouped by those values, and
+    each group is transitioned and logged separately. `message` may also use the `count` placeholder.
+    """
+
+    def __init__(self, name, model, message, description, predicate=None, transition="flag", values=None):
+        self.name = name
+        self.model = model
+        self.message = message
+        self.description = description
+        self.predicate = predicate or Q()
+        self.transition = transition
+        self.values = values or {}
+
+    def get_predicate(self):
+        return self.predicate
+
+    def get_queryset(self):
+        """Return the imported encounters which this rule applies to."""
+        return self.model.objects.filter(status=Encounter.STATUS_IMPORTED).filter(self.get_predicate())
+
+    def apply(self, by=None):
+        """Transition every matching encounter, logging the number transitioned in each group.
+        Returns the number of encounters transitioned.
+        """
+        logger = logging.getLogger("turtles")
+        queryset = self.get_queryset()
+        lookups = list(self.values.values())
+        groups = queryset.order_by().values_list(*lookups).distinct() if lookups else [()]
+        count = 0
+
+        for values in groups:
+            context = dict(zip(self.values, values))
+            transitioned, _ = queryset.filter(**dict(zip(lookups, values))).bulk_transition(
+                self.transition, by=by, description=self.description.format(**context)
+            )
+            if transitioned:
+                logger.info(self.message.format(count=transitioned, **context))
+            count += transitioned
+
+        return count
+
+
+class LocalityQARule(QARule):
+    """A QA rule applying to encounters in any area covered by one of the named localities."""
+
+    def __init__(self, name, model, message, description, localities, **kwargs):
+        super().__init__(name, model, message, description, **kwargs)
+        self.localities = localities
+
+    def get_predicate(self):
+        localities = Area.objects.filter(name__in=self.localities, area_type=Area.AREATYPE_LOCALITY)
+        covered = Q(pk__in=[])
+        for geom in localities.values_list("geom", flat=True):
+            covered |= Q(area__geom__coveredby=geom)
+        return covered & self.predicate
+
+
+def uncertain_predation():
+    """Return a predicate matching nest encounters with a disturbance (or disturbance tally) of unknown cause."""
+    return Exists(TurtleNestDisturbanceObservation.objects.filter(encounter=OuterRef("pk"), disturbance_cause="unknown")) | Exists(
+        TurtleNestDisturbanceTallyObservation.objects.filter(encounter=OuterRef("pk"), disturbance_cause="unknown")
+    )
+
+
+def species_recorded(species):
+    """Return a predicate matching nest encounters of the species, or having a track or disturbance tally of it."""
+    return (
+        Q(species=species)
+        | Exists(TrackTallyObservation.objects.filter(encounter=OuterRef("pk"), species=species))
+        | Exists(TurtleNestDisturbanceTallyObservation.objects.filter(encounter=OuterRef("pk"), species=species))
+    )
+
+
+def unlikely_species_rules(name, localities, species_list):
+    """Return a rule for each species which is not expected to nest at the localities."""
+    return [
+        LocalityQARule(
+            f"{species}-{name}",
+            TurtleNestEncounter,
+            f"Flagging {{count}} turtle nest encounters for curation: {species_name} at {{area}}",
+            f"Flagged for curation by automated checks: {species_name} at {{area}}",
+            localities=localities,
+            predicate=species_recorded(species),
+            values={"area": "area__name"},
+        )
+        for species, species_name in species_list
+    ]
+
+
+def get_rules():
+    """Return the automated QA/QC rules, in the order in which they are applied."""
+    return [
+        QARule(
+            "training-site",
+            TurtleNestEncounter,
+            'Flagging {count} turtle nest encounters for curation due to site containing "Training"',
+            'Flagged for curation by automated checks due to site containing "Training"',
+            predicate=Q(site__name__icontains="training"),
+        ),
+        QARule(
+            "testing-site",
+            TurtleNestEncounter,
+            'Flagging {count} turtle nest encounters for curation due to site containing "testing"',
+            'Flagged for curation by automated checks due to site containing "testing"',
+            predicate=Q(site__name__icontains="testing"),
+        ),
+        QARule(
+            "uncertain-species",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to uncertain species",
+            "Flagged for curation by automated checks due to uncertain species",
+            predicate=Q(species=TURTLE_SPECIES_DEFAULT),
+        ),
+        QARule(
+            "test-species",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to test species type",
+            "Flagged for curation by automated checks due to test species type",
+            predicate=Q(species__in=["corolla-corolla", "test-turtle"]),
+        ),
+        QARule(
+            "uncertain-nesting-outcome",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to uncertain nesting outcome",
+            "Flagged for curation by automated checks due to uncertain nesting outcome",
+            predicate=Q(nest_type=NEST_TYPE_TRACK_UNSURE),
+        ),
+        QARule(
+            "uncertain-nest-age",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to uncertain nest age",
+            "Flagged for curation by automated checks due to uncertain nest age",
+            predicate=Q(nest_age="unknown"),
+        ),
+        QARule(
+            "uncertain-predation",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to uncertain predation",
+            "Flagged for curation by automated checks due to uncertain predation",
+            predicate=uncertain_predation(),
+        ),
+        # Leatherback, Loggerhead and Olive ridley turtles are not expected to nest at these localities.
+        *unlikely_species_rules(
+            "localities",
+            [
+                "Delambre Island",
+                "Thevenard Island",
+                "Port Hedland",
+                "Rosemary Island",
+                "Eco Beach",
+                "Barrow Island",
+                "Mundabullangana",
+            ],
+            [
+                ("dermochelys-coriacea", "Dermochelys coriacea (Leatherback turtle)"),
+                ("caretta-caretta", "Caretta caretta (Loggerhead turtle)"),
+                ("lepidochelys-olivacea", "Lepidochelys olivacea (Olive ridley turtle)"),
+            ],
+        ),
+        # Leatherback and Olive ridley turtles are not expected to nest at Ningaloo.
+        *unlikely_species_rules(
+            "ningaloo",
+            ["Ningaloo"],
+            [
+                ("dermochelys-coriacea", "Dermochelys coriacea (Leatherback turtle)"),
+                ("lepidochelys-olivacea", "Lepidochelys olivacea (Olive ridley turtle)"),
+            ],
+        ),
+        QARule(
+            "nest-unknown-reporter",
+            TurtleNestEncounter,
+            "Flagging {count} turtle nest encounters for curation due to unknown reporter",
+            "Flagged for curation by automated checks due to unknown reporter",
+            predicate=Q(reporter__username="unknown_user"),
+        ),
+        # Imported turtle nest encounters which have passed all of the checks above.
+        QARule(
+            "nest-passed",
+            TurtleNestEncounter,
+            "Marking {count} imported turtle nest encounters as curated (passed QA/QC checks)",
+            "Curated by automated QA/QC (passed all checks)",
+            transition="curate",
+        ),
+        QARule(
+            "animal-unknown-reporter",
+            AnimalEncounter,
+            "Flagging {count} animal encounters for curation due to unknown reporter",
+            "Flagged for curation by automated checks due to unknown reporter",
+            predicate=Q(reporter__username="unknown_user"),
+        ),
+    ]
@@ -1,5 +1,5 @@
-from datetime import timedelta
 from django.conf import settings
+from django.db.models import Prefetch
 from import_export.fields import Field
 from import_export.resources import ModelResource
 
@@ -9,8 +9,12 @@ from .models import (
     AnimalEncounter,
     TurtleNestEncounter,
     LineTransectEncounter,
+    NestTagObservation,
+    NestTrackReport,
     Survey,
     Observation,
+    TurtleHatchlingEmergenceObservation,
+    TurtleNestObservation,
     TurtleNestDisturbanceObservation,
     TurtleTrackObservation,
     DisturbanceObservation,
@@ -106,6 +110,12 @@ class EncounterResource(ModelResource):
     def get_export_order(self):
         return self._meta.fields
 
+    def filter_export(self, queryset, **kwargs):
+        # Fetch the related objects used by the dehydrate methods with each encounter.
+        # The exported fields all belong to the resource model, so skip the polymorphic queries for child models:
+        # objects are exported as instances of the resource model.
+        return queryset.non_polymorphic().select_related("area", "site", "survey__site", "observer", "reporter")
+
     def dehydrate_status(self, obj):
         return obj.get_status_display()
 
@@ -165,13 +175,10 @@ class EncounterResource(ModelResource):
         return ""
 
     # from 12pm to 12pm then next day, the date stays the same i.e 11:59am on 3/12/23 is 2/12/23
-    # Note this displayed using the Django set timezone NOT the timezone the encouter happened - this is potetially bad if it is different. Really should be showing the timezone of collection
+    # Stored on the encounter as turtle_date (local time).
     def dehydrate_turtle_time_day(self, obj):
-        if obj.when:
-            if obj.when.astimezone(settings.TZ).hour < 12:
-                adjusted_date = obj.when.astimezone(settings.TZ) - timedelta(days=1)
-                return adjusted_date.strftime("%d-%b-%Y")
-            return obj.when.strftime("%d-%b-%Y")
+        if obj.turtle_date:
+            return obj.turtle_date.strftime("%d-%b-%Y")
         return ""
 
 
@@ -253,6 +260,13 @@ class TurtleNestEncounterResource(EncounterResource):
     date_nest_laid = Field()
     tag_label = Field()
 
+    # The child observation types exported with each encounter.
+    child_observations = {
+        "nest_observation": TurtleNestObservation,
+        "hatchling_emergence_observation": TurtleHatchlingEmergenceObservation,
+        "nesttag_observation": NestTagObservation,
+    }
+
     class Meta:
         model = TurtleNestEncounter
         fields = EncounterResource.Meta.fields + [
@@ -306,6 +320,18 @@ class TurtleNestEncounterResource(EncounterResource):
     def get_export_order(self):
         return self._meta.fields
 
+    def filter_export(self, queryset, **kwargs):
+        # Fetch each child observation type for all exported encounters in one query, rather than
+        # three queries per encounter. As with get_nest_observation() etc., the first observation in the
+        # Observation ordering (the latest) is used.
+        queryset = super().filter_export(queryset, **kwargs)
+        return queryset.prefetch_related(
+            *[
+                Prefetch("observations", queryset=model.objects.order_by("-pk"), to_attr=f"_prefetched_{obs_type}")
+                for obs_type, model in self.child_observations.items()
+            ]
+        )
+
     def get_child_observation_output(self, obs, attr):
         if obs is None:
             return ""
@@ -427,7 +453,7 @@ class TurtleNestEncounterResource(EncounterResource):
         return self.get_child_observation_output(obs, "egg_temp")
 
     def dehydrate_nest_tag(self, encounter):
-        obs = encounter.get_nesttag_observation()
+        obs = self._get_or_cache_observation(encounter, "nesttag_observation")
         if obs:
             return obs.name
         else:
@@ -528,7 +554,10 @@ class TurtleNestEncounterResource(EncounterResource):
     def _get_or_cache_observation(self, encounter, obs_type):
         cache_attr = f"_cached_{obs_type}"
         if not hasattr(encounter, cache_attr):
-            if obs_type == "nest_observation":
+            prefetched = getattr(encounter, f"_prefetched_{obs_type}", None)
+            if prefetched is not None:
+                observation = prefetched[0] if prefetched else None
+            elif obs_type == "nest_observation":
                 observation = encounter.get_nest_observation()
             elif obs_type == "hatchling_emergence_observation":
                 observation = encounter.get_hatchling_emergence_observation()
@@ -540,6 +569,21 @@ class TurtleNestEncounterResource(EncounterResource):
         return getattr(encounter, cache_attr)
 
 
+class NestTrackReportResource(ModelResource):
+    """Turtle nest encounters flattened with their nest, nest tag and hatchling emergence observations,
+    exported from the NestTrackReport table (one row per encounter).
+    """
+
+    description = "Nest/track report"
+
+    class Meta:
+        model = NestTrackReport
+        fields = [field.name for field in NestTrackReport._meta.concrete_fields if field.name not in ("when", "refreshed")]
+
+    def get_export_order(self):
+        return self._meta.fields
+
+
 class LineTransectEncounterResource(ModelResource):
     class Meta:
         model = LineTransectEncounter
@@ -1,5 +1,60 @@
+from collections import defaultdict
+from functools import cache
+from itertools import islice
 from django.conf import settings
-from typing import Dict, Any
+from django.contrib.gis.db.models.functions import AsGeoJSON, AsWKT
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import Case, JSONField, OuterRef, Q, TextField, Value, When
+from django.db.models.functions import Cast, Concat, JSONObject
+from django.utils.encoding import force_str
+from typing import Dict, Any, Iterator
+from .models import Survey
+
+
+@cache
+def choice_labels(model, field_name) -> Dict[Any, str]:
+    """Return the display labels for the choices of a model field, as returned by `get_<field>_display()`."""
+    return {value: force_str(label, strings_only=True) for value, label in model._meta.get_field(field_name).flatchoices}
+
+
+def iter_values(queryset, fields, chunk_size=None) -> Iterator[Dict[str, Any]]:
+    """Return the queryset as dicts of the passed-in field values, read from a database cursor in chunks if `chunk_size` is passed."""
+    queryset = queryset.prefetch_related(None).values(*fields)
+    return queryset.iterator(chunk_size=chunk_size) if chunk_size else iter(queryset)
+
+
+def choice_label_expression(model, field_name):
+    """Return an SQL expression for the display label of a model field's value, as returned by `get_<field>_display()`."""
+    whens = [When(**{field_name: value}, then=Value(label)) for value, label in choice_labels(model, field_name).items()]
+    return Case(*whens, default=Cast(field_name, TextField()), output_field=TextField())
+
+
+def geometry_expression(field_name):
+    """Return an SQL expression for a geometry field as a GeoJSON object."""
+    return Cast(AsGeoJSON(field_name), JSONField())
+
+
+def media_url_expression(field_name):
+    """Return an SQL expression for the MEDIA_URL path of a file field, or null if empty."""
+    return Case(
+        When(Q(**{f"{field_name}__isnull": True}) | Q(**{field_name: ""}), then=Value(None)),
+        default=Concat(Value(settings.MEDIA_URL), field_name),
+        output_field=TextField(),
+    )
+
+
+def iter_db_features(queryset, feature, chunk_size=None) -> Iterator[str]:
+    """Return the queryset as GeoJSON Feature text rendered by the database from the passed-in JSONObject expression,
+    read from a database cursor in chunks if `chunk_size` is passed.
+    """
+    queryset = queryset.prefetch_related(None).annotate(_feature=Cast(feature, TextField())).values_list("_feature", flat=True)
+    return queryset.iterator(chunk_size=chunk_size) if chunk_size else iter(queryset)
+
+
+def iter_chunks(rows, chunk_size) -> Iterator[list]:
+    """Yield lists of up to `chunk_size` items from the passed-in iterator."""
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
 
 
 def area_serializer(obj) -> Dict[str, Any]:
@@ -64,10 +119,134 @@ def survey_serializer(obj) -> Dict[str, Any]:
     }
 
 
+SURVEY_VALUES = (
+    "pk",
+    "start_location",
+    "status",
+    "source",
+    "source_id",
+    "device_id",
+    "area_id",
+    "site_id",
+    "reporter_id",
+    "start_location_accuracy_m",
+    "start_time",
+    "start_photo",
+    "start_comments",
+    "end_source_id",
+    "end_device_id",
+    "end_location",
+    "end_location_accuracy_m",
+    "end_time",
+    "end_photo",
+    "end_comments",
+    "production",
+    "label",
+)
+
+
+def survey_teams(survey_ids) -> Dict[int, list]:
+    """Return the team member ids of each of the passed-in surveys, in the default User ordering."""
+    teams = defaultdict(list)
+    members = (
+        Survey.team.through.objects.filter(survey_id__in=survey_ids)
+        .order_by("user__name", "user__username")
+        .values_list("survey_id", "user_id")
+    )
+    for survey_id, user_id in members:
+        teams[survey_id].append(user_id)
+    return teams
+
+
+def survey_values_serializer(queryset, chunk_size=None) -> Iterator[Dict[str, Any]]:
+    """Serialise a Survey queryset from field values, with output identical to `survey_serializer`.
+    Team members are queried once per chunk of surveys.
+    """
+    status_labels = choice_labels(queryset.model, "status")
+    source_labels = choice_labels(queryset.model, "source")
+    tz = settings.TZ
+
+    for chunk in iter_chunks(iter_values(queryset, SURVEY_VALUES, chunk_size), chunk_size or 1000):
+        teams = survey_teams([row["pk"] for row in chunk])
+        for row in chunk:
+            start_location = row["start_location"]
+            end_location = row["end_location"]
+            yield {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [start_location.x, start_location.y]} if start_location else None,
+                "properties": {
+                    "id": row["pk"],
+                    "status": status_labels.get(row["status"], row["status"]),
+                    "source": source_labels.get(row["source"], row["source"]),
+                    "source_id": row["source_id"],
+                    "device_id": row["device_id"],
+                    "area_id": row["area_id"],
+                    "site_id": row["site_id"],
+                    "reporter_id": row["reporter_id"],
+                    "start_location_accuracy_m": row["start_location_accuracy_m"],
+                    "start_time": row["start_time"].astimezone(tz).isoformat(),
+                    "start_photo": settings.MEDIA_URL + row["start_photo"] if row["start_photo"] else None,  # FIXME: absolute URL
+                    "start_comments": row["start_comments"],
+                    "end_source_id": row["end_source_id"],
+                    "end_device_id": row["end_device_id"],
+                    "end_location": end_location.wkt if end_location else None,
+                    "end_location_accuracy_m": row["end_location_accuracy_m"],
+                    "end_time": row["end_time"].astimezone(tz).isoformat(),
+                    "end_photo": settings.MEDIA_URL + row["end_photo"] if row["end_photo"] else None,  # FIXME: absolute URL
+                    "end_comments": row["end_comments"],
+                    "production": row["production"],
+                    "team": teams[row["pk"]],
+                    "label": row["label"],
+                },
+            }
+
+
+def survey_feature_expression(model):
+    """Return an expression rendering a Survey as a GeoJSON Feature in the database, with the properties of
+    `survey_serializer` (timestamps are in UTC, and geometries use the PostGIS number and WKT formatting).
+    """
+    return JSONObject(
+        type=Value("Feature"),
+        geometry=geometry_expression("start_location"),
+        properties=JSONObject(
+            id="pk",
+            status=choice_label_expression(model, "status"),
+            source=choice_label_expression(model, "source"),
+            source_id="source_id",
+            device_id="device_id",
+            area_id="area_id",
+            site_id="site_id",
+            reporter_id="reporter_id",
+            start_location_accuracy_m="start_location_accuracy_m",
+            start_time="start_time",
+            start_photo=media_url_expression("start_photo"),
+            start_comments="start_comments",
+            end_source_id="end_source_id",
+            end_device_id="end_device_id",
+            end_location=AsWKT("end_location"),
+            end_location_accuracy_m="end_location_accuracy_m",
+            end_time="end_time",
+            end_photo=media_url_expression("end_photo"),
+            end_comments="end_comments",
+            production="production",
+            team=ArraySubquery(
+                Survey.team.through.objects.filter(survey_id=OuterRef("pk")).order_by("user__name", "user__username").values("user_id")
+            ),
+            label="label",
+        ),
+    )
+
+
 class SurveySerializer(object):
     def serialize(obj):
         return survey_serializer(obj)
 
+    def serialize_values(queryset, chunk_size=None):
+        return survey_values_serializer(queryset, chunk_size)
+
+    def serialize_db(queryset, chunk_size=None):
+        return iter_db_features(queryset, survey_feature_expression(queryset.model), chunk_size)
+
 
 def survey_media_attachment_serializer(obj) -> Dict[str, Any]:
     return {
@@ -121,10 +300,100 @@ def encounter_serializer(obj) -> Dict[str, Any]:
     }
 
 
+ENCOUNTER_VALUES = (
+    "pk",
+    "where",
+    "survey_id",
+    "area_id",
+    "site_id",
+    "source",
+    "source_id",
+    "when",
+    "location_accuracy",
+    "location_accuracy_m",
+    "name",
+    "observer_id",
+    "reporter_id",
+    "encounter_type",
+    "comments",
+    "status",
+)
+
+
+def encounter_values_serializer(queryset, chunk_size=None) -> Iterator[Dict[str, Any]]:
+    """Serialise an Encounter queryset from field values, with output identical to `encounter_serializer`."""
+    source_labels = choice_labels(queryset.model, "source")
+    encounter_type_labels = choice_labels(queryset.model, "encounter_type")
+    status_labels = choice_labels(queryset.model, "status")
+    tz = settings.TZ
+
+    for row in iter_values(queryset, ENCOUNTER_VALUES, chunk_size):
+        where = row["where"]
+        encounter_type = row["encounter_type"]
+        yield {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [where.x, where.y]} if where else None,
+            "properties": {
+                "id": row["pk"],
+                "survey_id": row["survey_id"],
+                "area_id": row["area_id"],
+                "site_id": row["site_id"],
+                "source": source_labels.get(row["source"], row["source"]),
+                "source_id": row["source_id"],
+                "when": row["when"].astimezone(tz).isoformat(),
+                "location_accuracy": row["location_accuracy"],
+                "location_accuracy_m": row["location_accuracy_m"],
+                "name": row["name"],
+                "observer_id": row["observer_id"],
+                "reporter_id": row["reporter_id"],
+                "encounter_type": encounter_type_labels.get(encounter_type, encounter_type) if encounter_type else None,
+                "comments": row["comments"],
+                "status": status_labels.get(row["status"], row["status"]),
+            },
+        }
+
+
+def encounter_feature_expression(model):
+    """Return an expression rendering an Encounter as a GeoJSON Feature in the database, with the properties of
+    `encounter_serializer` (timestamps are in UTC, and coordinates use the PostGIS number formatting).
+    """
+    return JSONObject(
+        type=Value("Feature"),
+        geometry=geometry_expression("where"),
+        properties=JSONObject(
+            id="pk",
+            survey_id="survey_id",
+            area_id="area_id",
+            site_id="site_id",
+            source=choice_label_expression(model, "source"),
+            source_id="source_id",
+            when="when",
+            location_accuracy="location_accuracy",
+            location_accuracy_m="location_accuracy_m",
+            name="name",
+            observer_id="observer_id",
+            reporter_id="reporter_id",
+            encounter_type=Case(
+                When(Q(encounter_type__isnull=True) | Q(encounter_type=""), then=Value(None)),
+                default=choice_label_expression(model, "encounter_type"),
+                output_field=TextField(),
+            ),
+            comments="comments",
+            status=choice_label_expression(model, "status"),
+        ),
+    )
+
+
 class EncounterSerializer(object):
     def serialize(encounter):
         return encounter_serializer(encounter)
 
+    def serialize_values(queryset, chunk_size=None):
+        return encounter_values_serializer(queryset, chunk_size)
+
+    def serialize_db(queryset, chunk_size=None):
+        return iter_db_features(queryset, encounter_feature_expression(queryset.model), chunk_size)
+
 
 def animalencounter_serializer(obj) -> Dict[str, Any]:
     d = {
@@ -193,7 +462,7 @@ def observation_serializer(obj) -> Dict[str, Any]:
         "type": "Feature",
         "properties": {
             "id": obj.pk,
-            "encounter_id": obj.encounter.pk,
+            "encounter_id": obj.encounter_id,
             "source": obj.get_source_display(),
             "source_id": obj.source_id,
         },
@@ -1,35 +1,55 @@
 import logging
 
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
+from users.models import Organisation, User
 from wastd.utils import sanitize_tag_label
 
 from .models import (
     AnimalEncounter,
+    Area,
     Campaign,
     Encounter,
+    ExportJob,
     LineTransectEncounter,
     NestTagObservation,
+    NestTrackReport,
     Survey,
     TagObservation,
+    TurtleHatchlingEmergenceObservation,
     TurtleNestEncounter,
+    TurtleNestObservation,
 )
 from .utils import claim_encounters
 
 LOGGER = logging.getLogger("turtles")
 
 
+@receiver(pre_save, sender=Campaign)
+def campaign_pre_save(sender, instance, *args, **kwargs):
+    """Campaign: note whether the destination or time range have changed."""
+    instance._adoption_changed = instance.has_adoption_changes()
+
+
 @receiver(post_save, sender=Campaign)
 def campaign_post_save(sender, instance, *args, **kwargs):
-    """Campaign: Claim Surveys and Encounters."""
-    instance.adopt_all_surveys_and_encounters()
-    msg = "Campaign {} has adopted {} surveys and {} encounters.".format(instance, instance.surveys.count(), instance.encounters.count())
-    LOGGER.info(msg)
+    """Campaign: queue the adoption of its Surveys and Encounters if its destination or time range have changed.
+
+    Adoption is run out of the request cycle by the run_campaign_adoption_jobs management command. Records imported
+    after a Campaign was saved are adopted by the periodic `run_campaign_adoption_jobs --all` run.
+    """
+    if getattr(instance, "_adoption_changed", True) and instance.destination and instance.start_time and instance.end_time:
+        job = instance.queue_adoption()
+        LOGGER.info("Campaign {} has queued adoption job {}.".format(instance, job.pk))
 
 
 @receiver(pre_save, sender=Survey)
 def survey_pre_save(sender, instance, *args, **kwargs):
+    # Skip the lookups if an AreaLocator has already assigned the area and site.
+    if getattr(instance, "_area_assigned", False):
+        return
     if not instance.site:
         instance.site = instance.guess_site
     if not instance.area:
@@ -62,8 +82,9 @@ def encounter_pre_save(sender, instance, *args, **kwargs):
     Bulk updates or bulk creates will bypass these to be reconstructed later.
 
     * source_id: Set from short_name if empty
-    * area and site: Inferred from location (where) if empty
+    * area and site: Inferred from location (where) if empty, unless already assigned by an AreaLocator
     * encounter_type: Set from instance.get_encounter_type()
+    * turtle_date and season: Set from when
     """
     # If the encounter doesn't have a source_id
     if not instance.source_id:
@@ -71,12 +92,14 @@ def encounter_pre_save(sender, instance, *args, **kwargs):
     # This is slow, use set_name() instead in bulk
     if not instance.name and instance.pk and instance.inferred_name:
         instance.name = instance.inferred_name
-    if not instance.site:
-        instance.site = instance.guess_site
-    if not instance.area:
-        instance.area = instance.guess_area
+    if not getattr(instance, "_area_assigned", False):
+        if not instance.site:
+            instance.site = instance.guess_site
+        if not instance.area:
+            instance.area = instance.guess_area
     if not instance.encounter_type:
         instance.encounter_type = instance.get_encounter_type()
+    instance.set_turtle_date()
 
 
 @receiver(pre_save, sender=TagObservation)
@@ -96,3 +119,72 @@ def nesttagobservation_pre_save(sender, instance, *args, **kwargs):
     if instance.encounter.status == Encounter.STATUS_NEW and not instance.encounter.name:
         instance.encounter.name = instance.name
         instance.encounter.save()
+
+
+@receiver(post_save, sender=TurtleNestEncounter)
+def turtlenestencounter_post_save(sender, instance, *args, **kwargs):
+    """TurtleNestEncounter post_save: queue the encounter's report row to be refreshed."""
+    NestTrackReport.enqueue([instance.pk])
+
+
+@receiver(post_save, sender=TurtleNestObservation)
+@receiver(post_save, sender=NestTagObservation)
+@receiver(post_save, sender=TurtleHatchlingEmergenceObservation)
+@receiver(post_delete, sender=TurtleNestObservation)
+@receiver(post_delete, sender=NestTagObservation)
+@receiver(post_delete, sender=TurtleHatchlingEmergenceObservation)
+def nest_track_report_observation_changed(sender, instance, *args, **kwargs):
+    """Queue the report row of the observation's encounter to be refreshed."""
+    NestTrackReport.enqueue([instance.encounter_id])
+
+
+def report_field_changed(instance, field, update_fields=None):
+    """Whether the passed-in field of a saved instance differs from its saved value."""
+    if instance._state.adding or (update_fields is not None and field not in update_fields):
+        return False
+    return type(instance)._default_manager.filter(pk=instance.pk).exclude(**{field: getattr(instance, field)}).exists()
+
+
+@receiver(pre_save, sender=Area)
+@receiver(pre_save, sender=User)
+def report_name_pre_save(sender, instance, update_fields=None, *args, **kwargs):
+    """Area, User: note whether the name, which is copied into the nest/track report, has changed."""
+    instance._report_changed = report_field_changed(instance, "name", update_fields)
+
+
+@receiver(pre_save, sender=Organisation)
+def organisation_report_pre_save(sender, instance, update_fields=None, *args, **kwargs):
+    """Organisation: note whether the label, which is copied into the nest/track report, has changed."""
+    instance._report_changed = report_field_changed(instance, "label", update_fields)
+
+
+@receiver(pre_save, sender=Campaign)
+def campaign_report_pre_save(sender, instance, update_fields=None, *args, **kwargs):
+    """Campaign: note whether the owner, whose label is copied into the nest/track report, has changed."""
+    instance._report_changed = report_field_changed(instance, "owner", update_fields)
+
+
+@receiver(post_save, sender=Area)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Organisation)
+@receiver(post_save, sender=Campaign)
+def report_post_save(sender, instance, *args, **kwargs):
+    """Queue the report rows of the turtle nest encounters referencing a changed Area, User, Organisation
+    or Campaign to be refreshed.
+    """
+    if not getattr(instance, "_report_changed", False):
+        return
+    lookups = {
+        Area: Q(area=instance) | Q(site=instance),
+        User: Q(observer=instance) | Q(reporter=instance),
+        Organisation: Q(campaign__owner=instance),
+        Campaign: Q(campaign=instance),
+    }
+    NestTrackReport.enqueue(TurtleNestEncounter.objects.filter(lookups[sender]).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=ExportJob)
+def exportjob_post_delete(sender, instance, *args, **kwargs):
+    """ExportJob: delete the export file from media storage."""
+    if instance.file:
+        instance.file.delete(save=False)
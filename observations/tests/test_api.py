@@ -1,4 +1,14 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from django.test import override_settings
 from django.urls import reverse
+
+from observations.api import write_nests_tracks_snapshot
+from observations.models import Encounter, NestTrackReport
 from .test_views import ViewsTestCase
 
 
@@ -13,6 +23,55 @@ class ApiTests(ViewsTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.enc.source_id)
 
+    def test_encounter_api_list_keyset(self):
+        list_url = reverse("api:encounter_list_resource")
+        ids = []
+        response = self.client.get(list_url, {"after": "", "limit": 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn("count", data)
+            ids += [feature["properties"]["id"] for feature in data["features"]]
+            if not data["next"]:
+                break
+            response = self.client.get(data["next"])
+        self.assertEqual(ids, sorted(Encounter.objects.values_list("pk", flat=True)))
+
+    def test_encounter_api_list_stream(self):
+        list_url = reverse("api:encounter_list_resource")
+        response = self.client.get(list_url, {"format": "ndjson"})
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["properties"]["id"] for line in lines], sorted(Encounter.objects.values_list("pk", flat=True)))
+
+        response = self.client.get(list_url, {"format": "geojson", "after": json.loads(lines[0])["properties"]["id"]})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["type"], "FeatureCollection")
+        self.assertEqual(len(data["features"]), len(lines) - 1)
+
+        response = self.client.get(list_url, {"format": "csv"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_encounter_api_list_stream_db(self):
+        list_url = reverse("api:encounter_list_resource")
+        response = self.client.get(list_url, {"format": "geojson"})
+        features = json.loads(b"".join(response.streaming_content))["features"]
+        response = self.client.get(list_url, {"format": "geojson", "render": "db"})
+        self.assertEqual(response.status_code, 200)
+        db_features = json.loads(b"".join(response.streaming_content))["features"]
+        self.assertEqual(len(db_features), len(features))
+        for feature, db_feature in zip(features, db_features):
+            # Timestamps are rendered in UTC by the database.
+            when, db_when = feature["properties"].pop("when"), db_feature["properties"].pop("when")
+            self.assertEqual(datetime.fromisoformat(when), datetime.fromisoformat(db_when))
+            self.assertEqual(feature["properties"], db_feature["properties"])
+            self.assertEqual(feature["geometry"] is None, db_feature["geometry"] is None)
+
+        # Serializers without database rendering do not support it.
+        response = self.client.get(reverse("api:animal_encounter_list_resource"), {"format": "geojson", "render": "db"})
+        self.assertEqual(response.status_code, 400)
+
     def test_encounter_api_detail(self):
         detail_url = reverse("api:encounter_detail_resource", kwargs={"pk": self.enc.pk})
         response = self.client.get(detail_url)
@@ -161,3 +220,30 @@ class ApiTests(ViewsTestCase):
         response = self.client.get(detail_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.light_source.source_id)
+
+    def test_nests_tracks_feed(self):
+        NestTrackReport.refresh()
+        url = reverse("api:nestAndTracks")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertIn(self.nest.pk, [row["encounter_id"] for row in rows])
+
+        response = self.client.get(url, headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(b"".join(response.streaming_content))), rows)
+
+    def test_nests_tracks_feed_snapshot(self):
+        url = reverse("api:nestAndTracks")
+        nest_id = self.nest.pk
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "nests_tracks.json.gz")
+            with override_settings(NESTS_TRACKS_SNAPSHOT=path):
+                write_nests_tracks_snapshot()
+                self.nest.delete()
+                # The snapshot is served until it is refreshed, unless live data is requested.
+                response = self.client.get(url)
+                self.assertIn(nest_id, [row["encounter_id"] for row in json.loads(b"".join(response.streaming_content))])
+                response.close()
+                response = self.client.get(url, {"live": "true"})
+                self.assertNotIn(nest_id, [row["encounter_id"] for row in json.loads(b"".join(response.streaming_content))])
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.gis.geos import Point, Polygon
+from django.core.management import call_command
+
+from observations.models import Area, Campaign, CampaignAdoptionJob, NestTrackReportQueue, Survey, TurtleNestEncounter
+from observations.utils import claim_campaign_adoption_job, run_campaign_adoption_job
+
+from .test_views import ViewsTestCase
+
+
+class CampaignAdoptionTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.locality = Area.objects.create(
+            name="Test locality",
+            area_type=Area.AREATYPE_LOCALITY,
+            geom=Polygon(((114.0, -22.0), (114.0, -21.0), (115.0, -21.0), (115.0, -22.0), (114.0, -22.0))),
+        )
+        self.site = Area.objects.create(
+            name="Test site",
+            area_type=Area.AREATYPE_SITE,
+            geom=Polygon(((114.2, -21.8), (114.2, -21.2), (114.8, -21.2), (114.8, -21.8), (114.2, -21.8))),
+        )
+        self.start = datetime(2024, 11, 1, tzinfo=settings.TZ)
+        self.survey = Survey.objects.create(
+            source="odk",
+            source_id="survey-1",
+            site=self.site,
+            reporter=self.user,
+            start_time=self.start + timedelta(days=1, hours=6),
+            end_time=self.start + timedelta(days=1, hours=8),
+        )
+        self.encounter = TurtleNestEncounter.objects.create(
+            where=Point(114.5, -21.5),
+            when=self.start + timedelta(days=1, hours=7),
+            observer=self.user,
+            reporter=self.user,
+            nest_type="track-not-assessed",
+        )
+
+    def create_campaign(self, **kwargs):
+        return Campaign.objects.create(
+            destination=self.locality,
+            start_time=self.start,
+            end_time=self.start + timedelta(days=30),
+            **kwargs,
+        )
+
+    def test_save_queues_adoption(self):
+        """Saving a Campaign queues an adoption job instead of adopting its records"""
+        campaign = self.create_campaign()
+        job = CampaignAdoptionJob.objects.get()
+        self.assertEqual(job.campaign, campaign)
+        self.assertEqual(job.status, CampaignAdoptionJob.STATUS_QUEUED)
+        self.assertIsNone(Survey.objects.get(pk=self.survey.pk).campaign)
+
+    def test_adoption_changes(self):
+        """Adoption is queued again only when the destination or time range change"""
+        campaign = self.create_campaign()
+        run_campaign_adoption_job(claim_campaign_adoption_job())
+        campaign.comments = "Updated comments"
+        campaign.save()
+        self.assertEqual(CampaignAdoptionJob.objects.count(), 1)
+        campaign.end_time += timedelta(days=1)
+        campaign.save()
+        self.assertEqual(CampaignAdoptionJob.objects.filter(status=CampaignAdoptionJob.STATUS_QUEUED).count(), 1)
+
+    def test_run_adoption_job(self):
+        """An adoption job moves the records within the Campaign, and records how many were moved"""
+        campaign = self.create_campaign()
+        NestTrackReportQueue.objects.all().delete()
+        self.assertEqual(run_campaign_adoption_job(claim_campaign_adoption_job()), CampaignAdoptionJob.STATUS_COMPLETED)
+        job = CampaignAdoptionJob.objects.get()
+        self.assertEqual((job.surveys, job.encounters), (1, 1))
+        self.assertEqual(Survey.objects.get(pk=self.survey.pk).campaign, campaign)
+        self.assertEqual(TurtleNestEncounter.objects.get(pk=self.encounter.pk).campaign, campaign)
+        self.assertIsNone(TurtleNestEncounter.objects.get(pk=self.nest.pk).campaign)
+        self.assertTrue(NestTrackReportQueue.objects.filter(encounter_id=self.encounter.pk).exists())
+
+        # Records already in the Campaign are not moved again.
+        campaign.queue_adoption()
+        run_campaign_adoption_job(claim_campaign_adoption_job())
+        job = CampaignAdoptionJob.objects.first()
+        self.assertEqual((job.surveys, job.encounters), (0, 0))
+
+    def test_command(self):
+        """The management command runs queued adoption jobs"""
+        campaign = self.create_campaign()
+        call_command("run_campaign_adoption_jobs")
+        self.assertEqual(CampaignAdoptionJob.objects.get().status, CampaignAdoptionJob.STATUS_COMPLETED)
+        self.assertEqual(Survey.objects.get(pk=self.survey.pk).campaign, campaign)
@@ -0,0 +1,138 @@
+import csv
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from observations.exports import claim_export_job, delete_expired_export_jobs, run_export_job
+from observations.models import ExportJob, TurtleNestEncounter
+from observations.resources import TurtleNestEncounterResource
+from observations.views import TurtleNestEncounterList
+
+from .test_views import ViewsTestCase
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class ExportJobTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.superuser)
+        self.url = reverse("observations:turtlenestencounter-list")
+        self.params = {"download": "", "resource_format": "csv", "background": ""}
+
+    def test_submit_and_run_export_job(self):
+        """Background downloads queue an export job, which writes the export file for download"""
+        response = self.client.get(self.url, self.params)
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, job.get_absolute_url())
+        self.assertEqual(job.status, ExportJob.STATUS_QUEUED)
+        self.assertEqual(job.user, self.superuser)
+        self.assertTrue(job.fingerprint.startswith(f"2:{self.track.pk}:"))
+
+        self.assertEqual(claim_export_job(), job.pk)
+        self.assertIsNone(claim_export_job())
+        self.assertEqual(run_export_job(job.pk), ExportJob.STATUS_COMPLETED)
+        job.refresh_from_db()
+        self.assertTrue(job.file.name.endswith(".csv"))
+
+        response = self.client.get(reverse("observations:exportjob-download", kwargs={"pk": job.pk}))
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], TurtleNestEncounterResource().get_export_headers())
+        self.assertEqual(len(rows), 3)
+
+    def test_export_job_reuse(self):
+        """Identical requests reuse an export job until the exported data changes"""
+        self.client.get(self.url, self.params)
+        self.client.get(self.url, self.params)
+        self.assertEqual(ExportJob.objects.count(), 1)
+        run_export_job(ExportJob.objects.get().pk)
+        self.client.get(self.url, self.params)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        # Different parameters or changed data require a new export.
+        self.client.get(self.url, {**self.params, "resource_format": "xlsx"})
+        self.assertEqual(ExportJob.objects.count(), 2)
+        TurtleNestEncounter.objects.create(
+            where=Point((115, -32)),
+            when=timezone.now(),
+            observer=self.staff,
+            reporter=self.user,
+            species="natator-depressus",
+            nest_type="nest",
+        )
+        self.client.get(self.url, self.params)
+        self.assertEqual(ExportJob.objects.count(), 3)
+
+    def test_export_job_reuse_after_edit(self):
+        """A QA transition of an exported record requires a new export"""
+        self.client.get(self.url, self.params)
+        run_export_job(ExportJob.objects.get().pk)
+        self.nest.curate(by=self.superuser)
+        self.nest.save()
+        self.client.get(self.url, self.params)
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    def test_export_job_no_reuse(self):
+        """Views which don't reuse export files share only queued export jobs"""
+        with mock.patch.object(TurtleNestEncounterList, "export_job_reuse", False, create=True):
+            self.client.get(self.url, self.params)
+            self.client.get(self.url, self.params)
+            self.assertEqual(ExportJob.objects.count(), 1)
+            run_export_job(ExportJob.objects.get().pk)
+            self.client.get(self.url, self.params)
+            self.assertEqual(ExportJob.objects.count(), 2)
+
+    @override_settings(EXPORT_JOB_MAX_AGE=30)
+    def test_export_job_expiry(self):
+        """Completed export jobs are only reused for EXPORT_JOB_MAX_AGE minutes"""
+        self.client.get(self.url, self.params)
+        job = ExportJob.objects.get()
+        run_export_job(job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(finished=timezone.now() - timedelta(minutes=31))
+        self.client.get(self.url, self.params)
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    @override_settings(EXPORT_XLSX_MAX_ROWS=1)
+    def test_large_xlsx_download(self):
+        """XLSX downloads of more than EXPORT_XLSX_MAX_ROWS rows are run as export jobs"""
+        response = self.client.get(self.url, {"download": "", "resource_format": "xlsx"})
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, job.get_absolute_url())
+        response = self.client.get(self.url, {"download": "", "resource_format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_delete_expired_export_jobs(self):
+        """Export jobs older than EXPORT_JOB_RETENTION_DAYS are deleted with their files"""
+        self.client.get(self.url, self.params)
+        job = ExportJob.objects.get()
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        storage, name = job.file.storage, job.file.name
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(delete_expired_export_jobs(), 0)
+
+        ExportJob.objects.filter(pk=job.pk).update(created=timezone.now() - timedelta(days=settings.EXPORT_JOB_RETENTION_DAYS, hours=1))
+        self.assertEqual(delete_expired_export_jobs(), 1)
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_export_job_not_ready(self):
+        """Export files can't be downloaded before the job has completed"""
+        self.client.get(self.url, self.params)
+        job = ExportJob.objects.get()
+        response = self.client.get(job.get_absolute_url())
+        self.assertContains(response, "being prepared")
+        response = self.client.get(reverse("observations:exportjob-download", kwargs={"pk": job.pk}))
+        self.assertEqual(response.status_code, 404)
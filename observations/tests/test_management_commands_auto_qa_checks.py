@@ -5,7 +5,10 @@ from unittest.mock import MagicMock, patch
 import pytz
 from django.contrib.gis.geos import Point, Polygon
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django_fsm_log.models import StateLog
 
 from observations.lookups import NEST_TYPE_TRACK_UNSURE, TURTLE_SPECIES_DEFAULT
 from observations.models import (
@@ -312,3 +315,60 @@ class AutomatedQAChecksCommandTests(TestCase):
 
         call_command("automated_qa_checks")
         mock_logger.info.assert_any_call("Flagging 1 animal encounters for curation due to unknown reporter")
+
+    def test_flag_logs_state_change(self):
+        """Flagged encounters are updated in bulk, with a StateLog row recording each transition"""
+        encounter = TurtleNestEncounter.objects.create(
+            site=self.area, status=Encounter.STATUS_IMPORTED, species=TEST_SPECIES, when=datetime.now(pytz.utc), where=Point(0.0, 0.0)
+        )
+        call_command("automated_qa_checks")
+        encounter.refresh_from_db()
+        self.assertEqual(encounter.status, Encounter.STATUS_FLAGGED)
+        log = StateLog.objects.for_(encounter).get()
+        self.assertEqual(log.by, self.system_user)
+        self.assertEqual(log.transition, "flag")
+        self.assertEqual(log.source_state, Encounter.STATUS_IMPORTED)
+        self.assertEqual(log.description, "Flagged for curation by automated checks due to test species type")
+
+    def test_query_count(self):
+        """The number of queries run by the checks does not grow with the number of encounters"""
+
+        def run_checks():
+            with CaptureQueriesContext(connection) as queries:
+                call_command("automated_qa_checks")
+            return len(queries)
+
+        def create_encounters(count):
+            for _ in range(count):
+                TurtleNestEncounter.objects.create(
+                    site=self.area,
+                    status=Encounter.STATUS_IMPORTED,
+                    species=TEST_SPECIES,
+                    when=datetime.now(pytz.utc),
+                    where=Point(0.0, 0.0),
+                    source_id=str(uuid.uuid4()),
+                )
+
+        # The first run also populates the content type cache.
+        create_encounters(1)
+        run_checks()
+        create_encounters(1)
+        query_count = run_checks()
+        create_encounters(10)
+        self.assertEqual(run_checks(), query_count)
+        self.assertEqual(TurtleNestEncounter.objects.filter(status=Encounter.STATUS_FLAGGED).count(), 12)
+
+    @patch("logging.getLogger")
+    def test_dry_run(self, mock_get_logger):
+        mock_logger = MagicMock()
+        mock_get_logger.return_value = mock_logger
+
+        encounter = TurtleNestEncounter.objects.create(
+            site=self.area, status=Encounter.STATUS_IMPORTED, species=TEST_SPECIES, when=datetime.now(pytz.utc), where=Point(0.0, 0.0)
+        )
+        call_command("automated_qa_checks", dry_run=True)
+        mock_logger.info.assert_any_call("Flagging 1 turtle nest encounters for curation due to test species type")
+        mock_logger.info.assert_any_call("Dry run: all changes have been rolled back")
+        encounter.refresh_from_db()
+        self.assertEqual(encounter.status, Encounter.STATUS_IMPORTED)
+        self.assertFalse(StateLog.objects.for_(encounter).exists())
@@ -0,0 +1,298 @@
+from datetime import date, datetime, timezone
+from unittest import mock
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from observations.models import Encounter, Observation, OdkFailedSubmission, OdkImportJob, OdkSyncCursor, TurtleNestEncounter
+from observations.odk import (
+    IMPORT_FUNCTIONS,
+    UserResolver,
+    import_site_visit_end,
+    parse_turtle_track_or_nest,
+    run_import_job,
+    save_turtle_nest_encounters,
+)
+from observations.utils import AreaLocator
+from wastd.odk import parse_odata_submission
+
+
+def turtle_track_or_nest_submission(instance_id=None):
+    """Returns a Turtle Track or Nest form submission, shaped as parsed from the submission XML."""
+    return {
+        "meta": {"instanceID": instance_id or f"uuid:{uuid4()}"},
+        "reporter": "Test reporter",
+        "device_id": "collect:test",
+        "start_time": "2024-11-20T21:15:00.000+08:00",
+        "details": {
+            "observed_at": "-21.9 113.9 0.0 4.5",
+            "nest_age": "fresh",
+            "nest_type": "successful-crawl",
+            "species": "natator-depressus",
+        },
+        "nest": {
+            "habitat": "beach-edge-of-vegetation",
+            "disturbance": "present",
+            "nest_tagged": "present",
+            "logger_found": "present",
+            "eggs_counted": "yes",
+            "hatchlings_measured": "yes",
+        },
+        "egg_count": {
+            "no_egg_shells": "50",
+            "no_live_hatchlings": "2",
+            "no_dead_hatchlings": "1",
+            "no_undeveloped_eggs": "3",
+            "no_unhatched_eggs": "4",
+            "no_unhatched_term": "0",
+            "no_depredated_eggs": "0",
+            "nest_depth_top": "40",
+            "nest_depth_bottom": None,
+            "nest_excavation_comments": "Test excavation",
+            "photo_eggs": "eggs.jpg",
+        },
+        "disturbance_observations": {
+            "disturbance_observation": [
+                {
+                    "disturbance_cause": "fox",
+                    "disturbance_cause_confidence": "expert-opinion",
+                    "disturbance_severity": "partly",
+                    "comments": None,
+                    "photo_disturbance": "fox.jpg",
+                },
+                {
+                    "disturbance_cause": "dog",
+                    "disturbance_cause_confidence": "guess",
+                    "disturbance_severity": "na",
+                    "comments": "Dog tracks",
+                    "photo_disturbance": None,
+                },
+            ]
+        },
+        "nest_tag": {
+            "tag_status": "resighted",
+            "flipper_tag_id": "WA1234",
+            "date_nest_laid": "2024-11-01",
+            "tag_label": "A1",
+            "tag_comments": None,
+            "photo_tag": "tag.jpg",
+        },
+        "loggers": {
+            "logger_details": {
+                "logger_type": "temperature-logger",
+                "logger_status": "resighted",
+                "logger_id": "L1",
+                "logger_comments": None,
+                "photo_logger": None,
+            }
+        },
+        "hatchling_measurements": {
+            "hatchling_measurement": {
+                "straight_carapace_length_mm": "45",
+                "straight_carapace_width_mm": "35",
+                "body_weight_g": None,
+            }
+        },
+        "fan_angles": {
+            "photo_hatchling_tracks_seawards": "seawards.jpg",
+            "photo_hatchling_tracks_relief": "relief.jpg",
+            "bearing_to_water_manual": "270",
+            "leftmost_track_manual": "250",
+            "rightmost_track_manual": "290",
+            "no_tracks_main_group": "20",
+            "no_tracks_main_group_min": None,
+            "no_tracks_main_group_max": None,
+            "outlier_tracks_present": "present",
+            "path_to_sea_comments": None,
+            "hatchling_emergence_time_known": "no",
+            "light_sources_present": "present",
+            "cloud_cover_at_emergence": None,
+        },
+        "outlier_tracks": {
+            "outlier_track": {
+                "outlier_track_bearing_manual": "180",
+                "outlier_group_size": "2",
+                "outlier_track_comment": None,
+                "outlier_track_photo": "outlier.jpg",
+            }
+        },
+        "light_sources": {
+            "light_source": {
+                "light_bearing_manual": "90",
+                "light_source_type": "artificial",
+                "light_source_description": "Street light",
+                "light_source_photo": None,
+            }
+        },
+    }
+
+
+def encounter_rows(source_id):
+    """Returns the field values for an imported encounter and its observations, excluding keys."""
+    encounter = TurtleNestEncounter.objects.get(source_id=source_id)
+    exclude = ["id", "encounter_ptr", "source_id", "encounter", "observation_ptr"]
+    observations = sorted(
+        (type(obs).__name__, sorted(model_to_dict(obs, exclude=exclude).items(), key=str))
+        for obs in Observation.objects.filter(encounter=encounter)
+    )
+    return model_to_dict(encounter, exclude=exclude), encounter.polymorphic_ctype_id, observations
+
+
+class TurtleTrackOrNestImportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="reporter", name="Test reporter")
+        self.locator = AreaLocator()
+
+    def test_bulk_save_matches_individual_save(self):
+        """Bulk-created encounters and observations are identical to those saved one by one"""
+        bulk = parse_turtle_track_or_nest(turtle_track_or_nest_submission(), self.user, self.locator)
+        single = parse_turtle_track_or_nest(turtle_track_or_nest_submission(), self.user, self.locator)
+        save_turtle_nest_encounters([bulk], bulk=True)
+        save_turtle_nest_encounters([single], bulk=False)
+
+        self.assertEqual(Observation.objects.filter(encounter=bulk[0]).count(), len(bulk[1]))
+        self.assertEqual(encounter_rows(bulk[0].source_id), encounter_rows(single[0].source_id))
+        # Polymorphic queries return the subclass instances.
+        self.assertIsInstance(Encounter.objects.get(pk=bulk[0].pk), TurtleNestEncounter)
+        # Derived fields which are not editable (so not compared above) are also set.
+        self.assertEqual(
+            list(TurtleNestEncounter.objects.filter(pk__in=[bulk[0].pk, single[0].pk]).values_list("turtle_date", "season")),
+            [(date(2024, 11, 20), 2024)] * 2,
+        )
+
+    def test_bulk_save_query_count(self):
+        """The number of queries run by bulk saves does not grow with the number of submissions"""
+
+        def count_queries(count):
+            staged = [parse_turtle_track_or_nest(turtle_track_or_nest_submission(), self.user, self.locator) for _ in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                save_turtle_nest_encounters(staged, bulk=True)
+            return len(queries)
+
+        self.assertEqual(count_queries(1), count_queries(10))
+        self.assertEqual(TurtleNestEncounter.objects.count(), 11)
+
+    def test_parse_odata_submission(self):
+        """OData submission rows are converted into the shape produced by parsing the submission XML"""
+        row = {
+            "__id": "uuid:1234",
+            "__system": {"reviewState": None},
+            "meta": {"instanceID": "uuid:1234"},
+            "details": {
+                "observed_at": {"type": "Point", "coordinates": [113.9, -21.9, 0.0], "properties": {"accuracy": 4.5}},
+                "no_tracks": 2,
+            },
+            "nest_photos": {"photo_nest_1": None, "photo_nest_2": None},
+            "loggers": {"logger_details": [], "logger_details@odata.navigationLink": "Submissions('uuid:1234')/loggers/logger_details"},
+        }
+        submission = parse_odata_submission(row)
+        self.assertEqual(submission["meta"]["instanceID"], "uuid:1234")
+        self.assertEqual(submission["details"]["observed_at"], "-21.9 113.9 0.0 4.5")
+        self.assertEqual(submission["details"]["no_tracks"], "2")
+        self.assertNotIn("nest_photos", submission)
+        self.assertNotIn("loggers", submission)
+        self.assertNotIn("__system", submission)
+
+    def test_parse_odata_submission_null_field(self):
+        """OData rows with null fields from newer form versions fall back to the submission values"""
+        row = turtle_track_or_nest_submission()
+        row["details"]["observed_at"] = {"type": "Point", "coordinates": [113.9, -21.9, 0.0], "properties": {"accuracy": 4.5}}
+        row["details"]["survey_start_time"] = None
+        submission = parse_odata_submission(row)
+        self.assertIsNone(submission["details"]["survey_start_time"])
+
+        encounter, _, _ = parse_turtle_track_or_nest(submission, self.user, self.locator)
+        self.assertEqual(encounter.when, datetime(2024, 11, 20, 13, 15, tzinfo=timezone.utc))
+
+
+class SiteVisitEndImportTests(TestCase):
+    def test_unmatched_submission(self):
+        """A submission which can't be matched to a survey is recorded as failed and retried by later imports,
+        while the sync cursor moves past it
+        """
+        submission = {
+            "meta": {"instanceID": "uuid:1234"},
+            "end_time": "2024-11-20T08:15:00.000+08:00",
+            "site_visit": {"location": "-21.9 113.9 0.0 4.5", "comments": None, "site_conditions": None},
+        }
+        watermark = datetime(2024, 11, 20, 1, 0, tzinfo=timezone.utc)
+        with (
+            mock.patch("observations.odk.get_odata_submissions", return_value=[]),
+            mock.patch("observations.odk.get_submission", return_value=submission) as get_submission,
+            mock.patch("observations.odk.save_attachments"),
+        ):
+            with mock.patch("observations.odk.get_new_submissions", return_value=([submission], watermark)):
+                self.assertEqual(import_site_visit_end(auth_headers={}), (1, 1))
+            self.assertEqual(OdkSyncCursor.objects.get().synced_to, watermark)
+            failure = OdkFailedSubmission.objects.get()
+            self.assertEqual((failure.form_id, failure.instance_id, failure.attempts), ("site_visit_end", "uuid:1234", 1))
+
+            # The next import requests the failed submission again, which fails again without failing the import.
+            self.assertEqual(import_site_visit_end(auth_headers={}), (0, 0))
+            get_submission.assert_called_once()
+            self.assertEqual(OdkFailedSubmission.objects.get().attempts, 2)
+
+
+class FailedSubmissionTests(TestCase):
+    def test_record(self):
+        """Failed submissions are recorded, and removed once they have been imported"""
+        self.assertEqual(OdkFailedSubmission.record("1", "form", ["uuid:1", "uuid:2"], ["uuid:1"]), 0)
+        self.assertEqual(OdkFailedSubmission.record("1", "form", ["uuid:1", "uuid:3"], ["uuid:1", "uuid:3"]), 1)
+        failures = dict(OdkFailedSubmission.objects.values_list("instance_id", "attempts"))
+        self.assertEqual(failures, {"uuid:1": 2, "uuid:3": 1})
+        self.assertEqual(OdkFailedSubmission.record("1", "form", ["uuid:1"], []), 0)
+        self.assertEqual(list(OdkFailedSubmission.objects.values_list("instance_id", flat=True)), ["uuid:3"])
+
+
+class UserResolverTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="jane_doe", name="Jane Doe", aliases="J. Doe, Janey")
+
+    def test_get_user(self):
+        """Reporters are matched by normalised name or alias without querying the database"""
+        users = UserResolver()
+        with self.assertNumQueries(0):
+            self.assertEqual(users.get_user("jane  DOE "), self.user)
+            self.assertEqual(users.get_user("janey"), self.user)
+            self.assertIsNone(users.find("Jane"))
+            self.assertEqual(users.get_user("Jane", partial=True), self.user)
+
+    def test_create_missing(self):
+        """Reporters without a matching user are created in a single batch, with unique usernames"""
+        users = UserResolver()
+        created = users.create_missing(["Jane Doe", "jane_doe", "John Smith", "", None])
+        self.assertEqual(sorted(user.username for user in created), ["jane_doe_", "john_smith"])
+        self.assertFalse(created[0].has_usable_password())
+        with self.assertNumQueries(0):
+            self.assertEqual(users.get_user("JOHN SMITH").username, "john_smith")
+
+
+class OdkImportJobTests(TestCase):
+    def test_run_import_job_completed(self):
+        """A job records the counts returned by the form's import function"""
+        job = OdkImportJob.objects.create(form_id="turtle_sighting")
+        import_function = mock.Mock(return_value=(5, 0))
+        with mock.patch.dict(IMPORT_FUNCTIONS, {"turtle_sighting": import_function}):
+            status = run_import_job(job.pk, max_workers=2)
+        import_function.assert_called_once_with(form_id="turtle_sighting", max_workers=2)
+        job.refresh_from_db()
+        self.assertEqual(status, OdkImportJob.STATUS_COMPLETED)
+        self.assertEqual((job.submissions, job.failures, job.attempts), (5, 0, 1))
+        self.assertIsNotNone(job.duration)
+
+    def test_run_import_job_failed(self):
+        """A job fails if the import raises an exception or any submission fails, and can be re-run"""
+        job = OdkImportJob.objects.create(form_id="turtle_sighting")
+        with mock.patch.dict(IMPORT_FUNCTIONS, {"turtle_sighting": mock.Mock(side_effect=ValueError("Bad response"))}):
+            self.assertEqual(run_import_job(job.pk), OdkImportJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertIn("Bad response", job.error)
+
+        with mock.patch.dict(IMPORT_FUNCTIONS, {"turtle_sighting": mock.Mock(return_value=(5, 2))}):
+            self.assertEqual(run_import_job(job.pk), OdkImportJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.imported, job.attempts), (3, 2))
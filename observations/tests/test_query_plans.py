@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from observations.models import Encounter, Survey, TagObservation
+
+
+class QueryPlanTests(TestCase):
+    """Check that the most frequent filters can be answered from an index.
+    Sequential scans are disabled for each query, so the planner only chooses one if no index is usable.
+    Where an index was added for a filter, the plan must use that index (and not e.g. a foreign key index).
+    """
+
+    def assertIndexScan(self, queryset, index=None):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan", plan, msg=f"{queryset.query}\n{plan}")
+        if index:
+            self.assertIn(index, plan, msg=f"{queryset.query}\n{plan}")
+
+    def test_encounter_filters(self):
+        """Encounters filtered by source ID, QA status and type, or area/site and date use an index"""
+        now = timezone.now()
+        self.assertIndexScan(Encounter.objects.filter(source="odk", source_id="uuid:1234"))
+        self.assertIndexScan(
+            Encounter.objects.filter(status=Encounter.STATUS_NEW, encounter_type=Encounter.ENCOUNTER_NEST), "encounter_status_type_idx"
+        )
+        self.assertIndexScan(Encounter.objects.filter(area_id=1, when__gte=now - timedelta(days=7)), "encounter_area_when_idx")
+        self.assertIndexScan(
+            Encounter.objects.filter(site_id=1, when__range=(now - timedelta(days=7), now)), "encounter_site_when_idx"
+        )
+
+    def test_duplicate_surveys(self):
+        """Surveys filtered by site and start date use an index"""
+        now = timezone.now()
+        survey = Survey(pk=1, site_id=1, start_time=now - timedelta(hours=2), end_time=now)
+        self.assertIndexScan(survey.duplicate_surveys, "survey_site_start_date_idx")
+
+    def test_tag_observation_name(self):
+        """Tag observations filtered by tag name use an index"""
+        self.assertIndexScan(TagObservation.objects.filter(name="WA1234"))
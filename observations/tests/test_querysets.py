@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.gis.geos import Point, Polygon
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from observations.models import (
+    AnimalEncounter,
+    Area,
+    Encounter,
+    Observation,
+    Survey,
+    TurtleNestEncounter,
+    TurtleNestObservation,
+)
+
+from .test_views import ViewsTestCase
+
+
+class TypedQuerySetTests(ViewsTestCase):
+    def test_non_polymorphic(self):
+        """Non-polymorphic encounters are read from the base table only, in one query"""
+        with self.assertNumQueries(1):
+            encounters = list(Encounter.objects.non_polymorphic())
+        self.assertEqual(len(encounters), 4)
+        self.assertTrue(all(type(obj) is Encounter for obj in encounters))
+
+    def test_typed_encounters(self):
+        """Typed encounters are the same instances as polymorphic encounters, read in one query"""
+        polymorphic = list(Encounter.objects.order_by("pk"))
+        with self.assertNumQueries(1):
+            typed = list(Encounter.objects.typed().order_by("pk"))
+        self.assertEqual(typed, polymorphic)
+        self.assertEqual([type(obj) for obj in typed], [type(obj) for obj in polymorphic])
+        nest = typed[[obj.pk for obj in typed].index(self.nest.pk)]
+        with self.assertNumQueries(0):
+            self.assertEqual(nest.nest_type, "nest")
+            self.assertEqual(nest.when, self.nest.when)
+
+    def test_typed_child_models(self):
+        """Only the tables of the passed child models are joined, and other encounters are base instances"""
+        encounters = {obj.pk: obj for obj in Encounter.objects.typed(TurtleNestEncounter)}
+        self.assertIs(type(encounters[self.nest.pk]), TurtleNestEncounter)
+        self.assertIs(type(encounters[self.stranding.pk]), Encounter)
+
+    def test_typed_observations(self):
+        """Typed observations are the same instances as polymorphic observations, read in one query"""
+        polymorphic = list(Observation.objects.order_by("pk"))
+        with self.assertNumQueries(1):
+            typed = list(Observation.objects.typed().order_by("pk"))
+        self.assertEqual([type(obj) for obj in typed], [type(obj) for obj in polymorphic])
+        self.assertEqual(typed[0].comments, "Test data")
+
+    def test_typed_prefetch(self):
+        """Typed encounters and their typed observations are read in two queries"""
+        queryset = Encounter.objects.typed().prefetch_related(Prefetch("observations", queryset=Observation.objects.typed()))
+        with self.assertNumQueries(2):
+            encounters = {obj.pk: obj for obj in queryset}
+            observations = list(encounters[self.nest.pk].observations.all())
+        self.assertEqual({type(obj) for obj in observations}, {type(obj) for obj in self.nest.observation_set.all()})
+
+    def test_typed_leaf_model(self):
+        """Typed querysets of models without child models don't join any related tables"""
+        queryset = TurtleNestEncounter.objects.typed()
+        self.assertFalse(queryset.query.select_related)
+        self.assertEqual(set(queryset), {self.nest, self.track})
+
+    def test_typed_query_count(self):
+        """The number of queries of typed reads does not grow with the number or the types of the records"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                list(Encounter.objects.typed())
+                list(Observation.objects.typed())
+            return len(queries)
+
+        before = count_queries()
+        now = timezone.now()
+        for i in range(10):
+            if i % 2:
+                AnimalEncounter.objects.create(
+                    where=Point((115, -32)), when=now, observer=self.staff, reporter=self.user, species="cheloniidae-fam"
+                )
+            else:
+                encounter = TurtleNestEncounter.objects.create(
+                    where=Point((115, -32)), when=now, observer=self.staff, reporter=self.user, nest_type="nest"
+                )
+                TurtleNestObservation.objects.create(encounter=encounter, egg_count=i)
+        self.assertEqual(before, 2)
+        self.assertEqual(count_queries(), before)
+
+    def test_encounter_admin_changelist(self):
+        """The encounter admin lists and links each encounter as an instance of its child model"""
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("admin:observations_encounter_changelist"))
+        self.assertEqual(response.status_code, 200)
+        results = {obj.pk: obj for obj in response.context["cl"].result_list}
+        self.assertIs(type(results[self.nest.pk]), TurtleNestEncounter)
+        self.assertIs(type(results[self.stranding.pk]), AnimalEncounter)
+        self.assertContains(response, reverse("admin:observations_encounter_change", args=[self.nest.pk]))
+
+    def test_encounter_list(self):
+        """The encounter list renders each encounter card from its child model"""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("observations:encounter-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.nest.get_nest_type_display())
+        self.assertContains(response, str(self.stranding.get_card_title()))
+
+
+class SurveyDuplicateTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.site = Area.objects.create(
+            name="Test site",
+            area_type=Area.AREATYPE_SITE,
+            geom=Polygon(((114.0, -22.0), (114.0, -21.0), (115.0, -21.0), (115.0, -22.0), (114.0, -22.0))),
+        )
+        morning = datetime(2024, 11, 20, 6, 0, tzinfo=settings.TZ)
+        # Two overlapping production surveys, an overlapping training survey, and a later survey on the same site.
+        self.survey, self.duplicate, self.training, self.later = [
+            Survey.objects.create(
+                source="odk",
+                source_id=f"survey-{i}",
+                site=self.site,
+                reporter=self.user,
+                start_time=morning + start,
+                end_time=morning + start + timedelta(hours=2),
+                production=production,
+            )
+            for i, (start, production) in enumerate(
+                [(timedelta(0), True), (timedelta(hours=1), True), (timedelta(minutes=30), False), (timedelta(hours=4), True)]
+            )
+        ]
+        self.encounter = TurtleNestEncounter.objects.create(
+            site=self.site,
+            survey=self.duplicate,
+            where=Point(114.5, -21.5),
+            when=morning + timedelta(hours=2, minutes=30),
+            observer=self.user,
+            reporter=self.user,
+            nest_type="track-not-assessed",
+        )
+        self.cuckoo = TurtleNestEncounter.objects.create(
+            site=self.site,
+            survey=self.duplicate,
+            where=Point(116.0, -21.5),
+            when=morning + timedelta(hours=1, minutes=30),
+            observer=self.user,
+            reporter=self.user,
+            nest_type="track-not-assessed",
+        )
+
+    def test_duplicate_counts(self):
+        """Annotated duplicate counts match the duplicates of each survey"""
+        with self.assertNumQueries(1):
+            surveys = list(Survey.objects.with_duplicate_counts())
+        for survey in surveys:
+            self.assertEqual(survey.no_duplicates, survey.duplicate_surveys.count())
+            self.assertEqual(survey.has_production_duplicates(), survey.duplicate_surveys.filter(production=True).exists())
+        counts = {survey.pk: survey.no_duplicates for survey in surveys}
+        self.assertEqual(counts[self.survey.pk], 2)
+        self.assertEqual(counts[self.later.pk], 0)
+
+    def test_duplicate_ids(self):
+        """Each survey is annotated with the PKs of its duplicates and production duplicates"""
+        survey = Survey.objects.with_duplicate_ids().get(pk=self.survey.pk)
+        self.assertEqual(survey.duplicate_ids, sorted([self.duplicate.pk, self.training.pk]))
+        self.assertEqual(survey.production_duplicate_ids, [self.duplicate.pk])
+
+    def test_close_duplicates(self):
+        """Duplicates are closed, their encounters adopted, and cuckoo encounters evicted"""
+        self.survey.close_duplicates(actor=self.staff)
+        self.survey.refresh_from_db()
+        self.assertTrue(self.survey.production)
+        self.assertEqual(self.survey.status, Survey.STATUS_CURATED)
+        self.assertEqual(self.survey.end_time, self.encounter.when + timedelta(minutes=30))
+        for duplicate in [self.duplicate, self.training]:
+            duplicate.refresh_from_db()
+            self.assertFalse(duplicate.production)
+            self.assertEqual(duplicate.status, Survey.STATUS_CURATED)
+        self.assertEqual(TurtleNestEncounter.objects.get(pk=self.encounter.pk).survey, self.survey)
+        cuckoo = TurtleNestEncounter.objects.get(pk=self.cuckoo.pk)
+        self.assertIsNone(cuckoo.survey)
+        self.assertIsNone(cuckoo.site)
+        self.assertFalse(self.survey.has_production_duplicates())
+
+    def test_close_season_duplicates(self):
+        """Closing the duplicates of a season keeps the survey with the most encounters of each group"""
+        msgs = Survey.objects.filter(start_time__year=2024).close_duplicates(actor=self.staff)
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(set(Survey.objects.filter(production=True)), {self.duplicate, self.later})
+        self.assertFalse(Survey.objects.with_duplicate_counts().filter(production=True, production_duplicate_count__gt=0).exists())
+
+    def test_survey_list(self):
+        """The survey list shows duplicate counts without a query per survey"""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("observations:survey-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Duplicate surveys: 2")
@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.urls import reverse
+
+from observations.models import Area, Encounter, NestTrackReport, NestTrackReportQueue, TurtleNestObservation
+
+from .test_views import ViewsTestCase
+
+
+class NestTrackReportTests(ViewsTestCase):
+    def test_refresh(self):
+        """Saved encounters and observations are queued, and refreshed into one report row per encounter"""
+        self.assertTrue(NestTrackReportQueue.objects.filter(encounter_id=self.nest.pk).exists())
+        self.assertEqual(NestTrackReport.refresh(), 2)
+        self.assertFalse(NestTrackReportQueue.objects.exists())
+
+        report = NestTrackReport.objects.get(encounter=self.nest)
+        self.assertEqual(report.nest_type, "nest")
+        self.assertEqual(report.turtle_observation_comments, "Test data")
+        self.assertEqual(report.observer, self.staff.name)
+        self.assertTrue(NestTrackReport.objects.filter(encounter=self.track).exists())
+
+        # A later observation of the same type replaces the earlier one in the report.
+        TurtleNestObservation.objects.create(encounter=self.nest, comments="Updated data")
+        self.assertEqual(NestTrackReport.refresh(), 1)
+        report.refresh_from_db()
+        self.assertEqual(report.turtle_observation_comments, "Updated data")
+
+        self.nest.delete()
+        self.assertFalse(NestTrackReport.objects.filter(pk=report.pk).exists())
+
+    def test_requeue_during_refresh(self):
+        """Encounters re-queued after a refresh claimed them are left in the queue to be refreshed again"""
+        NestTrackReport.refresh()
+        queued = datetime.now(timezone.utc) - timedelta(minutes=1)
+        NestTrackReportQueue.objects.create(encounter_id=self.nest.pk)
+        NestTrackReportQueue.objects.update(queued=queued)
+        NestTrackReport.enqueue([self.nest.pk])
+        self.assertGreater(NestTrackReportQueue.objects.get(encounter_id=self.nest.pk).queued, queued)
+
+        # Simulate an encounter that is re-queued while a refresh is running.
+        NestTrackReport.enqueue([self.track.pk])
+        NestTrackReportQueue.objects.filter(encounter_id=self.nest.pk).update(queued=datetime.now(timezone.utc) + timedelta(minutes=1))
+        self.assertEqual(NestTrackReport.refresh(), 1)
+        self.assertEqual(list(NestTrackReportQueue.objects.values_list("encounter_id", flat=True)), [self.nest.pk])
+
+    def test_rename_queues_report_rows(self):
+        """Renaming an area or user, whose name is copied into the report, queues the rows of their encounters"""
+        site = Area.objects.create(name="Test site", area_type=Area.AREATYPE_SITE, geom=Polygon.from_bbox((114, -33, 116, -31)))
+        Encounter.objects.filter(pk=self.nest.pk).update(site=site)
+        NestTrackReport.refresh(full=True)
+        self.staff.save()
+        site.save()
+        self.assertFalse(NestTrackReportQueue.objects.exists())
+
+        self.staff.name = "Renamed user"
+        self.staff.save()
+        self.assertEqual(NestTrackReport.refresh(), 2)
+        self.assertEqual(NestTrackReport.objects.get(encounter=self.track).observer, "Renamed user")
+
+        site.name = "Renamed site"
+        site.save()
+        self.assertEqual(NestTrackReport.refresh(), 1)
+        self.assertEqual(NestTrackReport.objects.get(encounter=self.nest).site_name, "Renamed site")
+
+    def test_report_download(self):
+        """The nest/track report can be downloaded from the turtle nest encounter list"""
+        NestTrackReport.refresh()
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse("observations:turtlenestencounter-list"), {"download": "", "resource_class": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "turtle_observation_comments")
+        self.assertContains(response, "Test data")
+
+    def test_turtle_date_and_season(self):
+        """Encounters store the local date of their turtle night and their season, which are used in the report"""
+        for when, turtle_date, season in [
+            (datetime(2023, 12, 3, 10, 0, tzinfo=settings.TZ), date(2023, 12, 2), 2023),
+            (datetime(2023, 12, 3, 20, 0, tzinfo=settings.TZ), date(2023, 12, 3), 2023),
+            (datetime(2024, 3, 1, 2, 0, tzinfo=settings.TZ), date(2024, 2, 29), 2023),
+            # The start of the local season, whichever timezone the time is given in.
+            (datetime(2024, 6, 30, 19, 0, tzinfo=timezone.utc), date(2024, 6, 30), 2024),
+            (datetime(2024, 7, 2, 12, 0, tzinfo=settings.TZ), date(2024, 7, 2), 2024),
+        ]:
+            self.nest.when = when
+            self.nest.save()
+            self.assertEqual(Encounter.objects.filter(pk=self.nest.pk).values_list("turtle_date", "season").get(), (turtle_date, season))
+
+        NestTrackReport.refresh()
+        self.assertEqual(NestTrackReport.objects.get(encounter=self.nest).turtle_date, "2024-07-02")
@@ -0,0 +1,84 @@
+import csv
+import io
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from observations.models import NestTagObservation, TurtleHatchlingEmergenceObservation, TurtleNestEncounter, TurtleNestObservation
+from observations.resources import TurtleNestEncounterResource
+
+from .test_views import ViewsTestCase
+
+
+class TurtleNestEncounterResourceTests(ViewsTestCase):
+    def export(self):
+        with CaptureQueriesContext(connection) as queries:
+            dataset = TurtleNestEncounterResource().export(TurtleNestEncounter.objects.order_by("pk"))
+        return dataset, len(queries)
+
+    def test_export_query_count(self):
+        """The number of queries to export turtle nest encounters does not grow with the number of encounters"""
+        dataset, query_count = self.export()
+        self.assertEqual(len(dataset), 2)
+        row = dataset.dict[0]
+        self.assertEqual(row["nest_tag"], self.nest_tag_observation.name)
+
+        for i in range(10):
+            nest = TurtleNestEncounter.objects.create(
+                where=Point((115, -32)),
+                when=timezone.now(),
+                observer=self.staff,
+                reporter=self.user,
+                species="natator-depressus",
+                nest_type="hatched-nest",
+            )
+            TurtleNestObservation.objects.create(encounter=nest, no_egg_shells=i)
+            TurtleHatchlingEmergenceObservation.objects.create(encounter=nest)
+            NestTagObservation.objects.create(encounter=nest, tag_label=f"A{i}")
+        dataset, more_query_count = self.export()
+        self.assertEqual(len(dataset), 12)
+        self.assertEqual(more_query_count, query_count)
+        self.assertEqual([row["tag_label"] for row in dataset.dict[2:]], [f"A{i}" for i in range(10)])
+
+    def test_export_matches_unprefetched(self):
+        """Exported rows are the same as those built from the per-encounter observation queries"""
+        # A second observation of each type, so that the latest observation must be exported.
+        TurtleNestObservation.objects.create(encounter=self.nest, no_egg_shells=5)
+        TurtleHatchlingEmergenceObservation.objects.create(encounter=self.nest)
+        NestTagObservation.objects.create(encounter=self.nest, tag_label="B1")
+        resource = TurtleNestEncounterResource()
+        encounters = TurtleNestEncounter.objects.order_by("pk")
+        unprefetched = [resource.export_resource(encounter) for encounter in encounters]
+        dataset = resource.export(encounters.all())
+        self.assertEqual(dataset.dict, [dict(zip(resource.get_export_headers(), row)) for row in unprefetched])
+        self.assertEqual(dataset.dict[[obj.pk for obj in encounters].index(self.nest.pk)]["tag_label"], "B1")
+
+
+class ResourceDownloadTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.superuser)
+        self.headers = TurtleNestEncounterResource().get_export_headers()
+
+    def test_csv_download(self):
+        """CSV downloads are streamed, with a header row and one row per encounter"""
+        response = self.client.get(reverse("observations:turtlenestencounter-list"), {"download": "", "resource_format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment; filename=turtlenestencounter_", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], self.headers)
+        self.assertEqual(len(rows), 3)
+
+    def test_xlsx_download(self):
+        """XLSX downloads are written by a write-only workbook, with a header row and one row per encounter"""
+        response = self.client.get(reverse("observations:turtlenestencounter-list"), {"download": "", "resource_format": "xlsx"})
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.values)
+        self.assertEqual(list(rows[0]), self.headers)
+        self.assertEqual(len(rows), 3)
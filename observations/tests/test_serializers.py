@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from observations.models import Encounter, Survey
+from observations.serializers import (
+    encounter_serializer,
+    encounter_values_serializer,
+    survey_serializer,
+    survey_values_serializer,
+)
+
+from .test_views import ViewsTestCase
+
+
+class ValuesSerializerTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        start = timezone.now() - timedelta(hours=2)
+        self.survey = Survey.objects.create(
+            source="odk",
+            source_id="survey-1",
+            reporter=self.user,
+            start_location=Point(113.9, -21.9, srid=4326),
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            start_photo="survey/1/start.jpg",
+        )
+        self.survey.team.add(self.staff, self.superuser)
+        Survey.objects.create(source="odk", source_id="survey-2", reporter=self.user, start_time=start, end_time=start)
+
+    def test_encounter_values_serializer(self):
+        """The values serializer output is identical to serializing Encounter instances"""
+        queryset = Encounter.objects.order_by("pk")
+        self.assertEqual(list(encounter_values_serializer(queryset)), [encounter_serializer(obj) for obj in queryset])
+        self.assertEqual(list(encounter_values_serializer(queryset, chunk_size=2)), [encounter_serializer(obj) for obj in queryset])
+
+    def test_survey_values_serializer(self):
+        """The values serializer output is identical to serializing Survey instances"""
+        queryset = Survey.objects.order_by("pk")
+        self.assertEqual(list(survey_values_serializer(queryset)), [survey_serializer(obj) for obj in queryset])
+        # Surveys and their team members are queried once per chunk.
+        with self.assertNumQueries(2):
+            list(survey_values_serializer(queryset))
+
+    def test_values_serializer_query_count(self):
+        """The number of queries run by the values serializers does not grow with the number of records"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                list(encounter_values_serializer(Encounter.objects.order_by("pk")))
+                list(survey_values_serializer(Survey.objects.order_by("pk")))
+            return len(queries)
+
+        before = count_queries()
+        now = timezone.now()
+        ctype = ContentType.objects.get_for_model(Encounter)
+        Encounter.objects.bulk_create(
+            Encounter(
+                polymorphic_ctype=ctype, source="odk", source_id=f"encounter-{i}", when=now, where=Point(113.9, -21.9), reporter=self.user
+            )
+            for i in range(10)
+        )
+        surveys = Survey.objects.bulk_create(
+            Survey(source="odk", source_id=f"survey-{i}", reporter=self.user, start_time=now, end_time=now) for i in range(3, 13)
+        )
+        Survey.team.through.objects.bulk_create(Survey.team.through(survey=survey, user=self.user) for survey in surveys)
+        self.assertEqual(count_queries(), before)
@@ -0,0 +1,73 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django_fsm_log.models import StateLog
+
+from observations.models import Encounter, NestTrackReportQueue, Survey, TurtleNestEncounter
+
+from .test_views import ViewsTestCase
+
+
+class BulkTransitionTests(ViewsTestCase):
+    def test_bulk_transition(self):
+        """All encounters in a queryset are transitioned, with a StateLog row for each"""
+        counts = Encounter.objects.all().bulk_transition("curate", by=self.superuser, description="Curated in bulk")
+        self.assertEqual(counts, (4, 0))
+        self.assertFalse(Encounter.objects.exclude(status=Encounter.STATUS_CURATED).exists())
+        log = StateLog.objects.for_(self.nest).get()
+        self.assertEqual(log.content_type, ContentType.objects.get_for_model(TurtleNestEncounter))
+        self.assertEqual(log.by, self.superuser)
+        self.assertEqual(log.source_state, Encounter.STATUS_NEW)
+        self.assertEqual(log.state, Encounter.STATUS_CURATED)
+        self.assertEqual(log.transition, "curate")
+        self.assertEqual(log.description, "Curated in bulk")
+
+    def test_bulk_transition_source_states(self):
+        """Encounters whose state is not a source of the transition are skipped"""
+        Encounter.objects.filter(pk=self.nest.pk).update(status=Encounter.STATUS_REJECTED)
+        counts = Encounter.objects.all().bulk_transition("curate", by=self.superuser)
+        self.assertEqual(counts, (3, 1))
+        self.nest.refresh_from_db()
+        self.assertEqual(self.nest.status, Encounter.STATUS_REJECTED)
+        self.assertFalse(StateLog.objects.for_(self.nest).exists())
+
+    def test_bulk_transition_query_count(self):
+        """The number of queries to transition encounters does not grow with the number of encounters"""
+        ContentType.objects.get_for_model(TurtleNestEncounter)
+        with CaptureQueriesContext(connection) as queries:
+            TurtleNestEncounter.objects.filter(pk=self.nest.pk).bulk_transition("flag", by=self.superuser)
+        with self.assertNumQueries(len(queries)):
+            TurtleNestEncounter.objects.all().bulk_transition("curate", by=self.superuser)
+        self.assertEqual(TurtleNestEncounter.objects.filter(status=Encounter.STATUS_CURATED).count(), 2)
+
+    def test_bulk_transition_queues_report(self):
+        """Transitioned turtle nest encounters are queued for the nest and track report"""
+        NestTrackReportQueue.objects.all().delete()
+        Encounter.objects.all().bulk_transition("flag", by=self.superuser)
+        self.assertEqual(
+            set(NestTrackReportQueue.objects.values_list("encounter_id", flat=True)),
+            {self.nest.pk, self.track.pk},
+        )
+
+    def test_survey_bulk_transition(self):
+        """Models with QA status transitions can be transitioned in bulk"""
+        now = timezone.now()
+        Survey.objects.bulk_create(
+            Survey(source="odk", source_id=f"survey-{i}", reporter=self.user, start_time=now, end_time=now) for i in range(3)
+        )
+        self.assertEqual(Survey.objects.all().bulk_transition("proofread", by=self.staff), (3, 0))
+        self.assertEqual(Survey.objects.all().bulk_transition("proofread", by=self.staff), (0, 3))
+        self.assertEqual(StateLog.objects.filter(content_type=ContentType.objects.get_for_model(Survey)).count(), 3)
+
+    def test_admin_action(self):
+        """The admin curation action transitions the selected encounters in bulk"""
+        self.client.force_login(self.superuser)
+        response = self.client.post(
+            reverse("admin:observations_turtlenestencounter_changelist"),
+            {"action": "curate_encounter", "_selected_action": [self.nest.pk, self.track.pk]},
+            follow=True,
+        )
+        self.assertContains(response, "Curated 2 selected encounter(s) as trustworthy")
+        self.assertEqual(TurtleNestEncounter.objects.filter(status=Encounter.STATUS_CURATED).count(), 2)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.gis.geos import Point, Polygon
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from observations.models import Area, Survey, TurtleNestEncounter
+from observations.utils import reconstruct_missing_surveys
+
+from .test_views import ViewsTestCase
+
+
+class ReconstructMissingSurveysTests(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.site = Area.objects.create(
+            name="Test site",
+            area_type=Area.AREATYPE_SITE,
+            geom=Polygon(((114.0, -22.0), (114.0, -21.0), (115.0, -21.0), (115.0, -22.0), (114.0, -22.0))),
+        )
+        # Two encounters on one (local) morning, and one on the next morning.
+        morning = datetime(2024, 11, 20, 6, 0, tzinfo=settings.TZ)
+        for when, reporter in [
+            (morning, self.user),
+            (morning + timedelta(hours=1), self.staff),
+            (morning + timedelta(days=1), self.staff),
+        ]:
+            TurtleNestEncounter.objects.create(
+                site=self.site,
+                where=Point(114.5, -21.5),
+                when=when,
+                observer=reporter,
+                reporter=reporter,
+                nest_type="track-not-assessed",
+            )
+
+    def test_reconstruct_missing_surveys(self):
+        """One survey is created per site and local date, and claims the encounters on that date"""
+        self.assertEqual(reconstruct_missing_surveys(buffer_mins=30), (2, 3))
+        survey = Survey.objects.order_by("start_time").first()
+        self.assertEqual(survey.source, "reconstructed")
+        self.assertEqual(survey.site, self.site)
+        self.assertEqual(survey.reporter, self.user)
+        self.assertEqual(survey.start_time, datetime(2024, 11, 20, 5, 30, tzinfo=settings.TZ))
+        self.assertEqual(survey.end_time, datetime(2024, 11, 20, 7, 30, tzinfo=settings.TZ))
+        self.assertEqual(survey.label, survey.make_label())
+        self.assertEqual(TurtleNestEncounter.objects.filter(survey=survey).count(), 2)
+        self.assertFalse(TurtleNestEncounter.objects.exclude(site=None).filter(survey=None).exists())
+        # Encounters without a site are left alone.
+        self.assertIsNone(TurtleNestEncounter.objects.get(pk=self.nest.pk).survey)
+
+    def test_reconstruct_missing_surveys_query_count(self):
+        """The number of queries does not grow with the number of surveys created"""
+        with CaptureQueriesContext(connection) as queries:
+            reconstruct_missing_surveys()
+        for days in range(2, 12):
+            TurtleNestEncounter.objects.create(
+                site=self.site,
+                where=Point(114.5, -21.5),
+                when=datetime(2024, 11, 20, 6, 0, tzinfo=settings.TZ) + timedelta(days=days),
+                observer=self.user,
+                reporter=self.user,
+                nest_type="track-not-assessed",
+            )
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(reconstruct_missing_surveys(), (10, 10))
+
+    def test_dry_run(self):
+        """A dry run rolls back the reconstructed surveys"""
+        call_command("reconstruct_missing_surveys", dry_run=True)
+        self.assertFalse(Survey.objects.exists())
+        self.assertTrue(TurtleNestEncounter.objects.exclude(site=None).filter(survey=None).exists())
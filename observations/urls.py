@@ -31,6 +31,8 @@ urlpatterns = [
     ),
     path("disturbance-observations/", views.DisturbanceObservationList.as_view(), name="disturbanceobservation-list"),
     path("track-tally-observations/", views.TrackTallyObservationList.as_view(), name="tracktallyobservation-list"),
+    path("exports/<int:pk>/", views.ExportJobDetail.as_view(), name="exportjob-detail"),
+    path("exports/<int:pk>/download/", views.ExportJobDownload.as_view(), name="exportjob-download"),
     # Satellite view for Area
     path("area/<int:pk>/satellite/", views.AreaSatelliteView.as_view(), name="area-satellite"),
 ]
@@ -1,9 +1,19 @@
 import logging
+import traceback
 from datetime import timedelta
-import pandas
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import router, transaction
+from django.db.models import Max, Min, OuterRef, QuerySet, Subquery
+from django.db.models.functions import TruncDate
 
 from .models import (
     Area,
+    CampaignAdoptionJob,
+    Encounter,
+    NestTrackReport,
     Survey,
     TurtleNestEncounter,
 )
@@ -11,6 +21,84 @@ from .models import (
 LOGGER = logging.getLogger("turtles")
 
 
+class AreaLocator:
+    """An in-memory index of locality and site Areas, used to assign the area and site of many records
+    without running two spatial queries per record (see Encounter.guess_area and Encounter.guess_site).
+
+    Areas are loaded once. Candidates for a point are filtered by bounding box, then tested with a prepared
+    geometry. As with the guess_* properties, the first covering Area in the default ordering is returned.
+    """
+
+    def __init__(self):
+        self.localities = self._load(Area.AREATYPE_LOCALITY)
+        self.sites = self._load(Area.AREATYPE_SITE)
+
+    @staticmethod
+    def _load(area_type):
+        return [(area, area.geom.extent, area.geom.prepared) for area in Area.objects.filter(area_type=area_type)]
+
+    @staticmethod
+    def _match(candidates, point):
+        if not point:
+            return None
+        for area, (xmin, ymin, xmax, ymax), prepared in candidates:
+            if xmin <= point.x <= xmax and ymin <= point.y <= ymax and prepared.covers(point):
+                return area
+        return None
+
+    def locality(self, point):
+        """Return the first locality covering the passed-in point, or None."""
+        return self._match(self.localities, point)
+
+    def site(self, point):
+        """Return the first site covering the passed-in point, or None."""
+        return self._match(self.sites, point)
+
+    def locate_many(self, points):
+        """Return a list of (locality, site) tuples for the passed-in list of points."""
+        return [(self.locality(point), self.site(point)) for point in points]
+
+    def assign(self, instance, point):
+        """Set the area and site of an Encounter or Survey from the passed-in point.
+        The instance is flagged so that the pre_save signal handlers do not look them up again.
+        """
+        instance.area, instance.site = self.locality(point), self.site(point)
+        instance._area_assigned = True
+        return instance
+
+
+def bulk_create_polymorphic(model, objs, batch_size=None):
+    """Bulk create instances of a polymorphic model that inherits directly from a concrete polymorphic base model
+    (e.g. TurtleNestEncounter from Encounter, or TurtleNestObservation from Observation).
+
+    QuerySet.bulk_create does not support multi-table inheritance, so rows are inserted into the base table first
+    (returning their primary keys), then into the child table. As with bulk_create, save() is not called and no
+    signals are sent, so any derived fields must be set beforehand.
+    """
+    if not objs:
+        return objs
+    db = router.db_for_write(model)
+    ((parent, parent_link),) = model._meta.parents.items()
+    ctype = ContentType.objects.db_manager(db).get_for_model(model, for_concrete_model=False)
+
+    for obj in objs:
+        obj.polymorphic_ctype_id = ctype.pk
+        obj._prepare_related_fields_for_save(operation_name="bulk_create")
+
+    # Use plain (non-polymorphic) querysets to insert the rows for each table.
+    parent_fields = [f for f in parent._meta.local_concrete_fields if f is not parent._meta.pk]
+    rows = QuerySet(parent, using=db)._batched_insert(objs, parent_fields, batch_size)
+    for obj, row in zip(objs, rows):
+        setattr(obj, parent._meta.pk.attname, row[0])
+        setattr(obj, parent_link.attname, row[0])
+    QuerySet(model, using=db)._batched_insert(objs, model._meta.local_concrete_fields, batch_size)
+
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = db
+    return objs
+
+
 def claim_encounters(survey):
     """For a Survey, update any 'orphan' TurtleNestEncounters within the same site and the same
     start & end times to be associated with that survey.
@@ -21,62 +109,121 @@ def claim_encounters(survey):
         when__gte=survey.start_time,
         when__lte=survey.end_time,
     )
-    if encounters:
-        encounters.update(survey=survey, site=survey.site)
+    encounter_ids = list(encounters.values_list("pk", flat=True))
+    if encounter_ids:
+        TurtleNestEncounter.objects.filter(pk__in=encounter_ids).update(survey=survey, site=survey.site)
+        # Queryset updates bypass the post_save signals, so queue the report rows explicitly.
+        NestTrackReport.enqueue(encounter_ids)
 
 
 def reconstruct_missing_surveys(buffer_mins=30):
     """Create missing surveys.
 
     Find TurtleNestEncounters with missing survey but existing site,
-    group by date and site, aggregate datetime ("when") into earliest and latest record,
+    group by site and local date, aggregate datetime ("when") into earliest and latest record,
     buffer earliest and latest record by given minutes (default: 30),
-    create a Survey with aggregated data.
+    create a Survey with aggregated data, reported by the reporter of the earliest record.
 
-    Crosstab: See pandas
+    The groups are aggregated in the database, the surveys are bulk created and labelled, and the orphaned encounters
+    are then claimed by their new surveys with a single update. As with bulk_create, no Survey signals are sent.
+    Returns the number of surveys created and the number of encounters claimed.
     """
     encounters_no_survey = TurtleNestEncounter.objects.exclude(site=None).filter(survey=None)
-    LOGGER.info("Found {} orphan Encounters without survey".format(encounters_no_survey.count()))
+    encounter_ids = list(encounters_no_survey.values_list("pk", flat=True))
+    LOGGER.info("Found {} orphan Encounters without survey".format(len(encounter_ids)))
     LOGGER.info("Inferring missing survey data...")
-    tne_all = [[t.site.id, t.when.date(), t.when, t.reporter] for t in encounters_no_survey]
-    tne_idx = [[t[0], t[1]] for t in tne_all]
-    tne_data = [[t[2], t[3]] for t in tne_all]
-    idx = pandas.MultiIndex.from_tuples(tne_idx, names=["site", "date"])
-    df = pandas.DataFrame(tne_data, index=idx, columns=["datetime", "reporter"])
-    missing_surveys = pandas.pivot_table(
-        df,
-        index=["date", "site"],
-        values=["datetime", "reporter"],
-        aggfunc={"datetime": [min, max], "reporter": "first"},
+    missing_surveys = list(
+        encounters_no_survey.annotate(date=TruncDate("when", tzinfo=settings.TZ))
+        .order_by()
+        .values("site", "date")
+        .annotate(start=Min("when"), end=Max("when"), reporters=ArrayAgg("reporter", ordering="when"))
+        .order_by("date", "site")
     )
-    LOGGER.info("Creating {} missing surveys...".format(len(missing_surveys)))
 
     buffer = timedelta(minutes=buffer_mins)
-    for idx, row in missing_surveys.iterrows():
+    sites = Area.objects.in_bulk({row["site"] for row in missing_surveys})
+    locator = AreaLocator()
+    surveys = []
+    for row in missing_surveys:
         LOGGER.debug(
             "Missing Survey on {} at {} by {} from {}-{}".format(
-                idx[0],
-                idx[1],
-                row["reporter"]["first"],
-                row["datetime"]["min"] - buffer,
-                row["datetime"]["max"] + buffer,
+                row["date"],
+                row["site"],
+                row["reporters"][0],
+                row["start"] - buffer,
+                row["end"] + buffer,
             )
         )
-        ste = Area.objects.get(id=idx[1])
-        s = Survey.objects.create(
-            source="reconstructed",
-            site=ste,
-            start_location=ste.centroid,
-            start_time=row["datetime"]["min"] - buffer,
-            end_time=row["datetime"]["max"] + buffer,
-            end_location=ste.centroid,
-            reporter=row["reporter"]["first"],
-            start_comments="[QA] Reconstructed automatically from Turtle Nest Encounters without surveys",
+        site = sites[row["site"]]
+        surveys.append(
+            Survey(
+                source="reconstructed",
+                site=site,
+                area=locator.locality(site.centroid),
+                start_location=site.centroid,
+                start_time=row["start"] - buffer,
+                end_time=row["end"] + buffer,
+                end_location=site.centroid,
+                reporter_id=row["reporters"][0],
+                start_comments="[QA] Reconstructed automatically from Turtle Nest Encounters without surveys",
+            )
         )
-        s.save()
-    LOGGER.info("Created {} surveys to adopt {} orphaned Encounters.".format(len(missing_surveys), encounters_no_survey.count()))
+    LOGGER.info("Creating {} missing surveys...".format(len(surveys)))
+    surveys = Survey.objects.bulk_create(surveys)
+    # Labels include the pk, so can only be made once the surveys are inserted.
+    for survey in surveys:
+        survey.label = survey.make_label()
+    Survey.objects.bulk_update(surveys, ["label"])
+
+    # Claim each orphan for the new survey at its site covering its time.
+    survey = Survey.objects.filter(
+        pk__in=[survey.pk for survey in surveys],
+        site=OuterRef("site"),
+        start_time__lte=OuterRef("when"),
+        end_time__gte=OuterRef("when"),
+    ).order_by("start_time")
+    claimed = Encounter.objects.filter(pk__in=encounter_ids).update(survey=Subquery(survey.values("pk")[:1]))
+    # Queryset updates bypass the post_save signals, so queue the report rows explicitly.
+    NestTrackReport.enqueue(encounter_ids)
+    LOGGER.info("Created {} surveys to adopt {} orphaned Encounters.".format(len(surveys), claimed))
 
     encounters_no_survey = TurtleNestEncounter.objects.exclude(site=None).filter(survey=None)
     LOGGER.info("Remaining TurtleNestEncounters without survey: {}".format(encounters_no_survey.count()))
 
-    return None
+    return len(surveys), claimed
+
+
+def claim_campaign_adoption_job():
+    """Mark the oldest queued campaign adoption job as running and return its pk, or None if no jobs are queued.
+    Jobs locked by another worker are skipped.
+    """
+    with transaction.atomic():
+        job_id = (
+            CampaignAdoptionJob.objects.select_for_update(skip_locked=True)
+            .filter(status=CampaignAdoptionJob.STATUS_QUEUED)
+            .order_by("created")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if job_id:
+            CampaignAdoptionJob.objects.filter(pk=job_id).update(status=CampaignAdoptionJob.STATUS_RUNNING)
+    return job_id
+
+
+def run_campaign_adoption_job(job_id):
+    """Run a CampaignAdoptionJob in this process, adopting the Surveys and Encounters within its Campaign in one
+    transaction, and recording the number of records moved and the job's status and timings. Returns the job status.
+    """
+    job = CampaignAdoptionJob.objects.select_related("campaign__destination").get(pk=job_id)
+    job.start()
+    LOGGER.info(f"Running campaign adoption job {job.pk}: {job.campaign}")
+    try:
+        with transaction.atomic():
+            job.surveys, job.encounters = job.campaign.adopt_all_surveys_and_encounters()
+    except Exception:
+        LOGGER.exception(f"An error occurred during campaign adoption job {job.pk}")
+        job.fail(traceback.format_exc())
+    else:
+        job.complete()
+    LOGGER.info(f"Campaign adoption job {job.pk} {job.status} in {job.duration}: {job.surveys} surveys, {job.encounters} encounters")
+    return job.status
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseForbidden, HttpResponseRedirect
+from django.db.models import Prefetch, Q
+from django.http import FileResponse, Http404, HttpResponseForbidden, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
@@ -56,7 +57,10 @@ from .models import (
     Area,
     DisturbanceObservation,
     Encounter,
+    ExportJob,
     LineTransectEncounter,
+    NestTrackReport,
+    Observation,
     Survey,
     SurveyMediaAttachment,
     TagObservation,
@@ -69,6 +73,7 @@ from .resources import (
     DisturbanceObservationResource,
     EncounterResource,
     LineTransectEncounterResource,
+    NestTrackReportResource,
     SurveyResource,
     TrackTallyObservationResource,
     TurtleNestDisturbanceObservationResource,
@@ -135,7 +140,13 @@ class SurveyList(ListViewBreadcrumbMixin, ResourceDownloadMixin, PaginateMixin,
         return context
 
     def get_queryset(self):
-        qs = super().get_queryset().prefetch_related("reporter", "site", "encounter_set").order_by("-start_time")
+        qs = (
+            super()
+            .get_queryset()
+            .with_duplicate_counts()
+            .prefetch_related("reporter", "site", "encounter_set")
+            .order_by("-start_time")
+        )
         return SurveyFilter(self.request.GET, queryset=qs).qs
 
 
@@ -297,7 +308,15 @@ class EncounterList(ListViewBreadcrumbMixin, ResourceDownloadMixin, PaginateMixi
         return context
 
     def get_queryset(self):
-        qs = super().get_queryset().prefetch_related("observer", "area", "site").order_by("-when")
+        # Each card is rendered from the child model instance, and lists the encounter's observations.
+        # Fetch both with their child tables joined, rather than with one polymorphic query per child model.
+        qs = (
+            super()
+            .get_queryset()
+            .typed()
+            .prefetch_related("observer", "area", "site", Prefetch("observations", queryset=Observation.objects.typed()))
+            .order_by("-when")
+        )
         return EncounterFilter(self.request.GET, queryset=qs).qs
 
 
@@ -414,9 +433,15 @@ class TurtleNestEncounterList(ListViewBreadcrumbMixin, ResourceDownloadMixin, Pa
     template_name = "default_list.html"
     paginate_by = 20
     filter_class = TurtleNestEncounterFilter
-    resource_class = TurtleNestEncounterResource
+    resource_class = [TurtleNestEncounterResource, NestTrackReportResource]
     resource_formats = ["csv", "xlsx"]
 
+    def get_resource_queryset(self, resource_class, queryset):
+        if resource_class is NestTrackReportResource:
+            # Report rows are as of the last refresh (see refresh_nest_track_report), so downloads do not write.
+            return NestTrackReport.objects.filter(encounter__in=queryset.values("pk")).order_by("-when")
+        return queryset
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["list_filter"] = TurtleNestEncounterFilter(self.request.GET, queryset=self.get_queryset())
@@ -535,3 +560,30 @@ class TrackTallyObservationList(ListViewBreadcrumbMixin, ResourceDownloadMixin,
     def get_queryset(self):
         qs = super().get_queryset()
         return TrackTallyObservationFilter(self.request.GET, queryset=qs).qs
+
+
+class ExportJobDetail(LoginRequiredMixin, DetailView):
+    """The status of an export job, with a download link once the export file has been written."""
+
+    model = ExportJob
+    template_name = "observations/exportjob_detail.html"
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.user.is_superuser:
+            return qs
+        # Per-user exports may only be viewed by the user who requested them.
+        return qs.filter(Q(per_user=False) | Q(user=self.request.user))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = f"{settings.SITE_CODE} | Export {self.object.filename}"
+        return context
+
+
+class ExportJobDownload(ExportJobDetail):
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ExportJob.STATUS_COMPLETED or not job.file:
+            raise Http404("The export file is not available")
+        return FileResponse(job.file.open("rb"), as_attachment=True, filename=job.filename)
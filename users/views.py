@@ -53,14 +53,14 @@ class UserDetailView(DetailViewBreadcrumbMixin, LoginRequiredMixin, DetailView):
         context["collapse_details"] = False
         context["page_title"] = f"{settings.SITE_CODE} | User profile"
         if "pk" not in self.kwargs:
-            context["surveys"] = Survey.objects.filter(reporter=self.request.user).prefetch_related(
+            context["surveys"] = Survey.objects.filter(reporter=self.request.user).with_duplicate_counts().prefetch_related(
                 "encounter_set", "reporter", "area", "site", "encounter_set__observations"
             )[0:100]
             context["encounters"] = Encounter.objects.filter(reporter=self.request.user).prefetch_related(
                 "observer", "reporter", "area", "site", "observations"
             )[0:100]
         else:
-            context["surveys"] = Survey.objects.filter(reporter_id=self.kwargs["pk"]).prefetch_related(
+            context["surveys"] = Survey.objects.filter(reporter_id=self.kwargs["pk"]).with_duplicate_counts().prefetch_related(
                 "encounter_set", "reporter", "area", "site", "encounter_set__observations"
             )[0:100]
             context["encounters"] = Encounter.objects.filter(reporter_id=self.kwargs["pk"]).prefetch_related(
@@ -1,4 +1,4 @@
-import csv
+import io
 import json
 import operator
 from datetime import date, datetime, time, timedelta
@@ -14,7 +14,7 @@ from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.paginator import Paginator
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import DatabaseError, connections, transaction
-from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
@@ -28,9 +28,9 @@ from django.views.generic.edit import FormMixin
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Inches, Pt, RGBColor
-from openpyxl import Workbook
 
-from wastd.utils import Breadcrumb, PaginateMixin
+from observations.exports import submit_export_job
+from wastd.utils import Breadcrumb, PaginateMixin, iter_csv, write_xlsx
 
 from .forms import BatchesCodeForm, SearchForm, TagRegisterForm, TemplateForm, TrtDataEntryForm, TrtEntryBatchesForm, TrtPersonsForm
 from .models import (
@@ -2220,392 +2220,317 @@ class ExportDataView(LoginRequiredMixin, View):
 
         return JsonResponse({"sexes": sex_list})
 
-    def export_data(self, request):
-        try:
-            from_date, to_date = self._get_date_range(request.GET.get("observation_date_from"), request.GET.get("observation_date_to"))
+    # Additional columns of processed entries (TrtObservations).
+    processed_export_headers = [
+        "tag_1_id",
+        "tag_2_id",
+        "pit_tag_1_id",
+        "pit_tag_2_id",
+        "measurement_1_type",
+        "measurement_1_value",
+        "measurement_2_type",
+        "measurement_2_value",
+        "damage_1_body_part",
+        "damage_1_code",
+        "damage_2_body_part",
+        "damage_2_code",
+        "turtle_species_code",
+        "turtle_sex",
+        "turtle_status",
+    ]
+    # Exports are limited to the user's organisations, so export jobs are not shared between users.
+    export_job_parameter = "background"
+    export_job_per_user = True
+    # Entries are edited in place on the wamtram2 database, which has no modification timestamps, so changes
+    # can't be detected and completed export files are not reused.
+    export_job_reuse = False
+
+    def get_export_filename(self):
+        request = self.request
+        from_date, to_date = self._get_date_range(request.GET.get("observation_date_from"), request.GET.get("observation_date_to"))
+        location_code = request.GET.get("location_code")
+        place_code = request.GET.get("place_code")
+        species = request.GET.get("species")
+        sex = request.GET.get("sex")
+        file_format = request.GET.get("format", "csv")
+        entry_type = request.GET.get("entry_type", "field")
 
-            if not from_date or not to_date:
-                return HttpResponse("Please select both start and end dates", status=400)
+        # Build filename
+        filename_parts = []
+        if location_code:
+            filename_parts.append(location_code)
+        elif place_code:
+            filename_parts.append(place_code)
+        if species:
+            filename_parts.append(species)
+        if sex:
+            filename_parts.append(sex)
+        if entry_type == "processed":
+            filename_parts.append("processed")
 
-            location_code = request.GET.get("location_code")
-            place_code = request.GET.get("place_code")
-            species = request.GET.get("species")
-            sex = request.GET.get("sex")
-            file_format = request.GET.get("format", "csv")
-            entry_type = request.GET.get("entry_type", "field")
-
-            # Build filename
-            filename_parts = []
-            if location_code:
-                filename_parts.append(location_code)
-            elif place_code:
-                filename_parts.append(place_code)
-            if species:
-                filename_parts.append(species)
-            if sex:
-                filename_parts.append(sex)
-            if entry_type == "processed":
-                filename_parts.append("processed")
-
-            date_range = f"({from_date.strftime('%Y%m%d')}-{to_date.strftime('%Y%m%d')})"
-            filename = "_".join(filename_parts) + date_range if filename_parts else f"data_export{date_range}"
-
-            # Build queryset based on Entry Type
-            if entry_type == "processed":
-                queryset = TrtObservations.objects.all()
-
-                # Apply organization filter
-                user = request.user
-                batch_ids = []
-                if not user.is_superuser:
-                    user_organisations = user.organisations.all()
-                    if user_organisations.exists():
-                        related_batch_ids = TrtEntryBatchOrganisation.objects.filter(
-                            organisation__in=[org.code for org in user_organisations]
-                        ).values_list("trtentrybatch_id", flat=True)
-                        queryset = queryset.filter(entry_batch_id__in=related_batch_ids)
-                        batch_ids = related_batch_ids
-                    else:
-                        return HttpResponse("No data available for your organisation", status=403)
+        date_range = f"({from_date.strftime('%Y%m%d')}-{to_date.strftime('%Y%m%d')})"
+        filename = "_".join(filename_parts) + date_range if filename_parts else f"data_export{date_range}"
+        return f"{filename}.csv" if file_format == "csv" else f"{filename}.xlsx"
 
-                # Apply filters
-                queryset = queryset.filter(observation_date__range=[from_date, to_date])
+    def get_export_queryset(self):
+        """Return the field entries (TrtDataEntry) or processed entries (TrtObservations) matching the export
+        parameters, limited to the user's organisations. Returns None if the user has no organisation.
+        """
+        request = self.request
+        from_date, to_date = self._get_date_range(request.GET.get("observation_date_from"), request.GET.get("observation_date_to"))
+        location_code = request.GET.get("location_code")
+        place_code = request.GET.get("place_code")
+        species = request.GET.get("species")
+        sex = request.GET.get("sex")
+        entry_type = request.GET.get("entry_type", "field")
 
-                if location_code:
-                    queryset = queryset.filter(place_code__location_code=location_code)
-                elif place_code:
-                    queryset = queryset.filter(place_code=place_code)
+        # Build queryset based on Entry Type
+        if entry_type == "processed":
+            queryset = TrtObservations.objects.all()
+        else:
+            queryset = TrtDataEntry.objects.all()
 
-                if species:
-                    queryset = queryset.filter(turtle__species_code=species)
-                if sex:
-                    queryset = queryset.filter(turtle__sex=sex)
+        # Apply organization filter
+        user = request.user
+        if not user.is_superuser:
+            user_organisations = user.organisations.all()
+            if not user_organisations.exists():
+                return None
+            related_batch_ids = TrtEntryBatchOrganisation.objects.filter(
+                organisation__in=[org.code for org in user_organisations]
+            ).values_list("trtentrybatch_id", flat=True)
+            queryset = queryset.filter(entry_batch_id__in=related_batch_ids)
 
-                # Optimize query with select_related
-                queryset = queryset.select_related("entry_batch", "place_code", "place_code__location_code", "turtle")
+        # Apply filters
+        queryset = queryset.filter(observation_date__range=[from_date, to_date])
 
-                model_meta = TrtObservations._meta
+        if location_code:
+            queryset = queryset.filter(place_code__location_code=location_code)
+        elif place_code:
+            queryset = queryset.filter(place_code=place_code)
 
-            else:
-                queryset = TrtDataEntry.objects.all()
-
-                # Apply organization filter
-                user = request.user
-                batch_ids = []
-                if not user.is_superuser:
-                    user_organisations = user.organisations.all()
-                    if user_organisations.exists():
-                        related_batch_ids = TrtEntryBatchOrganisation.objects.filter(
-                            organisation__in=[org.code for org in user_organisations]
-                        ).values_list("trtentrybatch_id", flat=True)
-                        queryset = queryset.filter(entry_batch_id__in=related_batch_ids)
-                        batch_ids = related_batch_ids
+        if entry_type == "processed":
+            if species:
+                queryset = queryset.filter(turtle__species_code=species)
+            if sex:
+                queryset = queryset.filter(turtle__sex=sex)
+            # Optimize query with select_related
+            return queryset.select_related("entry_batch", "place_code", "place_code__location_code", "turtle")
+
+        if species:
+            queryset = queryset.filter(species_code=species)
+        if sex:
+            queryset = queryset.filter(sex=sex)
+        # Optimize query with select_related
+        return queryset.select_related("entry_batch", "place_code", "place_code__location_code", "observation_id")
+
+    def get_export_fingerprint(self):
+        """Return a string which changes when entries matching the export parameters are added or removed.
+        Edits to existing entries don't change it, so export files are not reused (see export_job_reuse).
+        """
+        queryset = self.get_export_queryset()
+        if queryset is None:
+            return ""
+        stats = queryset.order_by().aggregate(count=Count("pk"), last=Max("pk"))
+        return "{count}:{last}".format(**stats)
+
+    def iter_export_rows(self, queryset):
+        """Yield the export headers, then one row per entry in the queryset."""
+        entry_type = self.request.GET.get("entry_type", "field")
+        model_meta = queryset.model._meta
+
+        # Pre-fetch batch organizations to avoid N+1 queries
+        batch_ids = set(queryset.values_list("entry_batch_id", flat=True))
+        batch_orgs = TrtEntryBatchOrganisation.objects.filter(trtentrybatch_id__in=batch_ids).values("trtentrybatch_id", "organisation")
+
+        org_dict = {}
+        for bo in batch_orgs:
+            org_dict.setdefault(bo["trtentrybatch_id"], []).append(bo["organisation"])
+
+        # Pre-fetch Tags and PIT Tags for Processed Entries
+        tags_dict = {}
+        pit_tags_dict = {}
+        measurements_dict = {}
+        damages_dict = {}
+        if entry_type == "processed":
+            obs_ids = set(queryset.values_list("observation_id", flat=True))
+            # 1. Tags
+            recorded_tags = (
+                TrtRecordedTags.objects.filter(observation_id__in=obs_ids).select_related("tag_id").order_by("tag_position", "side")
+            )
+
+            for rt in recorded_tags:
+                o_id = rt.observation_id_id
+                t_list = tags_dict.setdefault(o_id, [])
+                if len(t_list) < 2:
+                    tag_val = rt.tag_id_id or rt.other_tag_id or ""
+                    t_list.append(str(tag_val))
+
+            # 2. PIT Tags
+            recorded_pit_tags = (
+                TrtRecordedPitTags.objects.filter(observation_id__in=obs_ids).select_related("pittag_id").order_by("pit_tag_position")
+            )
+
+            for rpt in recorded_pit_tags:
+                o_id = rpt.observation_id_id
+                pt_list = pit_tags_dict.setdefault(o_id, [])
+                if len(pt_list) < 2:
+                    pt_val = rpt.pittag_id_id or ""
+                    pt_list.append(str(pt_val))
+
+            # 3. Measurements
+            measurements = TrtMeasurements.objects.filter(observation_id__in=obs_ids).select_related("measurement_type").order_by("id")
+
+            for m in measurements:
+                o_id = m.observation_id
+                m_list = measurements_dict.setdefault(o_id, [])
+                if len(m_list) < 2:
+                    m_type = m.measurement_type_id or ""
+                    m_val = str(m.measurement_value) if m.measurement_value is not None else ""
+                    m_list.append((str(m_type), m_val))
+
+            # 4. Damages
+            damages = TrtDamage.objects.filter(observation_id__in=obs_ids).select_related("body_part", "damage_code")
+
+            for d in damages:
+                o_id = d.observation_id
+                d_list = damages_dict.setdefault(o_id, [])
+                if len(d_list) < 2:
+                    d_part = d.body_part_id or ""
+                    d_code = d.damage_code_id or ""
+                    d_list.append((str(d_part), str(d_code)))
+
+        # Write headers
+        headers = [field.name for field in model_meta.fields]
+        headers.append("organisations")
+        if entry_type == "field":
+            headers.append("observation_status")
+        elif entry_type == "processed":
+            headers.extend(self.processed_export_headers)
+        yield headers
+
+        # Write data
+        for entry in queryset.iterator(chunk_size=2000):
+            organisations = org_dict.get(entry.entry_batch_id, [])
+            org_str = ", ".join(organisations)
+
+            row = []
+            for field in model_meta.fields:
+                name = field.name
+
+                if name == "observation_id" and entry_type == "field":
+                    # Ensure observation_id column exports the raw FK ID
+                    value = entry.observation_id_id or ""
+                elif name == "turtle" and entry_type == "processed":
+                    value = entry.turtle_id or ""
+                else:
+                    if field.is_relation and field.many_to_one:
+                        value = getattr(entry, f"{name}_id", "")
                     else:
-                        return HttpResponse("No data available for your organisation", status=403)
+                        value = getattr(entry, name)
+
+                # Custom formatting for observation_date / observation_time
+                if name == "observation_date" and isinstance(value, (datetime, date)):
+                    value = value.strftime("%Y-%m-%d") if value else ""
+                elif name == "observation_time" and isinstance(value, datetime):
+                    value = value.strftime("%H:%M:%S") if value else ""
+                elif isinstance(value, (datetime, date)):
+                    value = value.isoformat() if value else ""
+                elif value is None:
+                    value = ""
+
+                row.append(str(value))
+            row.append(org_str)
+
+            if entry_type == "field":
+                # Get observation status from pre-fetched related object
+                observation_status = ""
+                if entry.observation_id_id is not None and getattr(entry, "observation_id", None):
+                    observation_status = entry.observation_id.observation_status or ""
+                row.append(observation_status)
+            elif entry_type == "processed":
+                # Extract Tags up to 2
+                obs_id = entry.observation_id
+                t_list = tags_dict.get(obs_id, [])
+                pt_list = pit_tags_dict.get(obs_id, [])
+
+                t1 = t_list[0] if len(t_list) > 0 else ""
+                t2 = t_list[1] if len(t_list) > 1 else ""
+                pt1 = pt_list[0] if len(pt_list) > 0 else ""
+                pt2 = pt_list[1] if len(pt_list) > 1 else ""
+
+                m_list = measurements_dict.get(obs_id, [])
+                m1_t, m1_v = m_list[0] if len(m_list) > 0 else ("", "")
+                m2_t, m2_v = m_list[1] if len(m_list) > 1 else ("", "")
+
+                d_list = damages_dict.get(obs_id, [])
+                d1_b, d1_c = d_list[0] if len(d_list) > 0 else ("", "")
+                d2_b, d2_c = d_list[1] if len(d_list) > 1 else ("", "")
+
+                row.extend([t1, t2, pt1, pt2, m1_t, m1_v, m2_t, m2_v, d1_b, d1_c, d2_b, d2_c])
+
+                # Append specific turtle info
+                turtle = getattr(entry, "turtle", None)
+                if turtle:
+                    row.extend(
+                        [
+                            getattr(turtle, "species_code_id", ""),
+                            getattr(turtle, "sex", ""),
+                            getattr(turtle, "turtle_status_id", ""),
+                        ]
+                    )
+                else:
+                    row.extend(["", "", ""])
 
-                # Apply filters
-                queryset = queryset.filter(observation_date__range=[from_date, to_date])
+            yield row
 
-                if location_code:
-                    queryset = queryset.filter(place_code__location_code=location_code)
-                elif place_code:
-                    queryset = queryset.filter(place_code=place_code)
+    def write_export(self, file):
+        """Write the requested export to the passed-in binary file (used by export jobs)."""
+        queryset = self.get_export_queryset()
+        if queryset is None:
+            raise PermissionDenied("No data available for the user's organisation")
+        rows = self.iter_export_rows(queryset)
+        if self.request.GET.get("format", "csv") == "csv":
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            for chunk in iter_csv(rows):
+                text.write(chunk)
+            text.flush()
+            text.detach()
+        else:
+            write_xlsx(rows, file)
 
-                if species:
-                    queryset = queryset.filter(species_code=species)
-                if sex:
-                    queryset = queryset.filter(sex=sex)
+    def export_data(self, request):
+        try:
+            from_date, to_date = self._get_date_range(request.GET.get("observation_date_from"), request.GET.get("observation_date_to"))
 
-                # Optimize query with select_related
-                queryset = queryset.select_related("entry_batch", "place_code", "place_code__location_code", "observation_id")
+            if not from_date or not to_date:
+                return HttpResponse("Please select both start and end dates", status=400)
 
-                model_meta = TrtDataEntry._meta
+            queryset = self.get_export_queryset()
+            if queryset is None:
+                return HttpResponse("No data available for your organisation", status=403)
 
             # Check if there's any data to export
             if not queryset.exists():
                 return HttpResponse("No data found matching the selected criteria", status=404)
 
-            # Pre-fetch batch organizations to avoid N+1 queries
-            if user.is_superuser:
-                batch_ids = set(queryset.values_list("entry_batch_id", flat=True))
-            batch_orgs = TrtEntryBatchOrganisation.objects.filter(trtentrybatch_id__in=batch_ids).values("trtentrybatch_id", "organisation")
-
-            org_dict = {}
-            for bo in batch_orgs:
-                org_dict.setdefault(bo["trtentrybatch_id"], []).append(bo["organisation"])
-
-            # Pre-fetch Tags and PIT Tags for Processed Entries
-            tags_dict = {}
-            pit_tags_dict = {}
-            if entry_type == "processed":
-                obs_ids = set(queryset.values_list("observation_id", flat=True))
-                # 1. Tags
-                recorded_tags = (
-                    TrtRecordedTags.objects.filter(observation_id__in=obs_ids).select_related("tag_id").order_by("tag_position", "side")
-                )
-
-                for rt in recorded_tags:
-                    o_id = rt.observation_id_id
-                    t_list = tags_dict.setdefault(o_id, [])
-                    if len(t_list) < 2:
-                        tag_val = rt.tag_id_id or rt.other_tag_id or ""
-                        t_list.append(str(tag_val))
-
-                # 2. PIT Tags
-                recorded_pit_tags = (
-                    TrtRecordedPitTags.objects.filter(observation_id__in=obs_ids).select_related("pittag_id").order_by("pit_tag_position")
-                )
-
-                for rpt in recorded_pit_tags:
-                    o_id = rpt.observation_id_id
-                    pt_list = pit_tags_dict.setdefault(o_id, [])
-                    if len(pt_list) < 2:
-                        pt_val = rpt.pittag_id_id or ""
-                        pt_list.append(str(pt_val))
-
-                # 3. Measurements
-                measurements_dict = {}
-                measurements = TrtMeasurements.objects.filter(observation_id__in=obs_ids).select_related("measurement_type").order_by("id")
-
-                for m in measurements:
-                    o_id = m.observation_id
-                    m_list = measurements_dict.setdefault(o_id, [])
-                    if len(m_list) < 2:
-                        m_type = m.measurement_type_id or ""
-                        m_val = str(m.measurement_value) if m.measurement_value is not None else ""
-                        m_list.append((str(m_type), m_val))
-
-                # 4. Damages
-                damages_dict = {}
-                damages = TrtDamage.objects.filter(observation_id__in=obs_ids).select_related("body_part", "damage_code")
-
-                for d in damages:
-                    o_id = d.observation_id
-                    d_list = damages_dict.setdefault(o_id, [])
-                    if len(d_list) < 2:
-                        d_part = d.body_part_id or ""
-                        d_code = d.damage_code_id or ""
-                        d_list.append((str(d_part), str(d_code)))
+            # Large exports can be run out of the request cycle as an export job. XLSX workbooks are written in full
+            # before responding, so large XLSX exports are always run as export jobs.
+            xlsx = request.GET.get("format", "csv") != "csv"
+            if self.export_job_parameter in request.GET or (xlsx and queryset.count() > settings.EXPORT_XLSX_MAX_ROWS):
+                job = submit_export_job(self)
+                return HttpResponseRedirect(job.get_absolute_url())
 
+            filename = self.get_export_filename()
             try:
-                if file_format == "csv":
+                if request.GET.get("format", "csv") == "csv":
                     response = HttpResponse(content_type="text/csv")
-                    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
-                    writer = csv.writer(response)
-
-                    # Write headers
-                    headers = [field.name for field in model_meta.fields]
-                    headers.append("organisations")
-                    if entry_type == "field":
-                        headers.append("observation_status")
-                    elif entry_type == "processed":
-                        headers.extend(
-                            [
-                                "tag_1_id",
-                                "tag_2_id",
-                                "pit_tag_1_id",
-                                "pit_tag_2_id",
-                                "measurement_1_type",
-                                "measurement_1_value",
-                                "measurement_2_type",
-                                "measurement_2_value",
-                                "damage_1_body_part",
-                                "damage_1_code",
-                                "damage_2_body_part",
-                                "damage_2_code",
-                                "turtle_species_code",
-                                "turtle_sex",
-                                "turtle_status",
-                            ]
-                        )
-                    writer.writerow(headers)
-
-                    # Write data
-                    for entry in queryset:
-                        organisations = org_dict.get(entry.entry_batch_id, [])
-                        org_str = ", ".join(organisations)
-
-                        row = []
-                        for field in model_meta.fields:
-                            name = field.name
-
-                            if name == "observation_id" and entry_type == "field":
-                                # Ensure observation_id column exports the raw FK ID
-                                value = entry.observation_id_id or ""
-                            elif name == "turtle" and entry_type == "processed":
-                                value = entry.turtle_id or ""
-                            else:
-                                if field.is_relation and field.many_to_one:
-                                    value = getattr(entry, f"{name}_id", "")
-                                else:
-                                    value = getattr(entry, name)
-
-                            # Custom formatting for observation_date / observation_time
-                            if name == "observation_date" and isinstance(value, (datetime, date)):
-                                value = value.strftime("%Y-%m-%d") if value else ""
-                            elif name == "observation_time" and isinstance(value, datetime):
-                                value = value.strftime("%H:%M:%S") if value else ""
-                            elif isinstance(value, (datetime, date)):
-                                value = value.isoformat() if value else ""
-                            elif value is None:
-                                value = ""
-
-                            row.append(str(value))
-                        row.append(org_str)
-
-                        if entry_type == "field":
-                            # Get observation status from pre-fetched related object
-                            observation_status = ""
-                            if entry.observation_id_id is not None and getattr(entry, "observation_id", None):
-                                observation_status = entry.observation_id.observation_status or ""
-                            row.append(observation_status)
-                        elif entry_type == "processed":
-                            # Extract Tags up to 2
-                            obs_id = entry.observation_id
-                            t_list = tags_dict.get(obs_id, [])
-                            pt_list = pit_tags_dict.get(obs_id, [])
-
-                            t1 = t_list[0] if len(t_list) > 0 else ""
-                            t2 = t_list[1] if len(t_list) > 1 else ""
-                            pt1 = pt_list[0] if len(pt_list) > 0 else ""
-                            pt2 = pt_list[1] if len(pt_list) > 1 else ""
-
-                            m_list = measurements_dict.get(obs_id, [])
-                            m1_t, m1_v = m_list[0] if len(m_list) > 0 else ("", "")
-                            m2_t, m2_v = m_list[1] if len(m_list) > 1 else ("", "")
-
-                            d_list = damages_dict.get(obs_id, [])
-                            d1_b, d1_c = d_list[0] if len(d_list) > 0 else ("", "")
-                            d2_b, d2_c = d_list[1] if len(d_list) > 1 else ("", "")
-
-                            row.extend([t1, t2, pt1, pt2, m1_t, m1_v, m2_t, m2_v, d1_b, d1_c, d2_b, d2_c])
-
-                            # Append specific turtle info
-                            turtle = getattr(entry, "turtle", None)
-                            if turtle:
-                                row.extend(
-                                    [
-                                        getattr(turtle, "species_code_id", ""),
-                                        getattr(turtle, "sex", ""),
-                                        getattr(turtle, "turtle_status_id", ""),
-                                    ]
-                                )
-                            else:
-                                row.extend(["", "", ""])
-
-                        writer.writerow(row)
-
+                    for chunk in iter_csv(self.iter_export_rows(queryset)):
+                        response.write(chunk)
                 else:  # xlsx format
                     response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-                    response["Content-Disposition"] = f'attachment; filename="{filename}.xlsx"'
-
-                    wb = Workbook()
-                    ws = wb.active
-
-                    # Write headers
-                    headers = [field.name for field in model_meta.fields]
-                    headers.append("organisations")
-                    if entry_type == "field":
-                        headers.append("observation_status")
-                    elif entry_type == "processed":
-                        headers.extend(
-                            [
-                                "tag_1_id",
-                                "tag_2_id",
-                                "pit_tag_1_id",
-                                "pit_tag_2_id",
-                                "measurement_1_type",
-                                "measurement_1_value",
-                                "measurement_2_type",
-                                "measurement_2_value",
-                                "damage_1_body_part",
-                                "damage_1_code",
-                                "damage_2_body_part",
-                                "damage_2_code",
-                                "turtle_species_code",
-                                "turtle_sex",
-                                "turtle_status",
-                            ]
-                        )
-                    ws.append(headers)
-
-                    # Write data
-                    for entry in queryset:
-                        organisations = org_dict.get(entry.entry_batch_id, [])
-                        org_str = ", ".join(organisations)
-
-                        row = []
-                        for field in model_meta.fields:
-                            name = field.name
-
-                            if name == "observation_id" and entry_type == "field":
-                                value = entry.observation_id_id or ""
-                            elif name == "turtle" and entry_type == "processed":
-                                value = entry.turtle_id or ""
-                            else:
-                                if field.is_relation and field.many_to_one:
-                                    value = getattr(entry, f"{name}_id", "")
-                                else:
-                                    value = getattr(entry, name)
-
-                            if name == "observation_date" and isinstance(value, (datetime, date)):
-                                value = value.strftime("%Y-%m-%d") if value else ""
-                            elif name == "observation_time" and isinstance(value, datetime):
-                                value = value.strftime("%H:%M:%S") if value else ""
-                            elif isinstance(value, (datetime, date)):
-                                value = value.isoformat() if value else ""
-                            elif value is None:
-                                value = ""
-                            else:
-                                value = str(value)
-
-                            row.append(value)
-                        row.append(org_str)
-
-                        if entry_type == "field":
-                            # Get observation status from pre-fetched related object
-                            observation_status = ""
-                            if entry.observation_id_id is not None and getattr(entry, "observation_id", None):
-                                observation_status = entry.observation_id.observation_status or ""
-                            row.append(observation_status)
-                        elif entry_type == "processed":
-                            # Extract Tags up to 2
-                            obs_id = entry.observation_id
-                            t_list = tags_dict.get(obs_id, [])
-                            pt_list = pit_tags_dict.get(obs_id, [])
-
-                            t1 = t_list[0] if len(t_list) > 0 else ""
-                            t2 = t_list[1] if len(t_list) > 1 else ""
-                            pt1 = pt_list[0] if len(pt_list) > 0 else ""
-                            pt2 = pt_list[1] if len(pt_list) > 1 else ""
-
-                            m_list = measurements_dict.get(obs_id, [])
-                            m1_t, m1_v = m_list[0] if len(m_list) > 0 else ("", "")
-                            m2_t, m2_v = m_list[1] if len(m_list) > 1 else ("", "")
-
-                            d_list = damages_dict.get(obs_id, [])
-                            d1_b, d1_c = d_list[0] if len(d_list) > 0 else ("", "")
-                            d2_b, d2_c = d_list[1] if len(d_list) > 1 else ("", "")
-
-                            row.extend([t1, t2, pt1, pt2, m1_t, m1_v, m2_t, m2_v, d1_b, d1_c, d2_b, d2_c])
-
-                            # Append specific turtle info
-                            turtle = getattr(entry, "turtle", None)
-                            if turtle:
-                                row.extend(
-                                    [
-                                        str(getattr(turtle, "species_code_id", "")),
-                                        str(getattr(turtle, "sex", "")),
-                                        str(getattr(turtle, "turtle_status_id", "")),
-                                    ]
-                                )
-                            else:
-                                row.extend(["", "", ""])
-
-                        ws.append(row)
-
-                    wb.save(response)
-
+                    write_xlsx(self.iter_export_rows(queryset), response)
+                response["Content-Disposition"] = f'attachment; filename="{filename}"'
                 return response
 
             except Exception as e:
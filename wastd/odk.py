@@ -1,10 +1,14 @@
 """Utilities and functions related to ODK."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timezone
 from tempfile import TemporaryFile
 
 import requests
 import xmltodict
+from dateutil import parser
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.core.files import File
@@ -15,6 +19,17 @@ ODK_API_URL = settings.ODK_API_URL
 logger = logging.getLogger("turtles")
 
 
+def get_session(max_workers=None):
+    """Returns a requests Session having a connection pool large enough to be shared by `max_workers` threads."""
+    if not max_workers:
+        max_workers = settings.ODK_API_MAX_WORKERS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def get_auth_headers(email=None, password=None):
     """Returns a dict containing authorization headers for ODK."""
     if not email:
@@ -54,16 +69,68 @@ def get_form(
     return resp.json()
 
 
-def get_submissions_metadata(auth_headers, project_id, form_id):
-    """Returns metadata about all submissions to an ODK form, as a dict."""
-    resp = requests.get(f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions", headers=auth_headers)
-    resp.raise_for_status()
-    return resp.json()
+def get_odata_rows(auth_headers, project_id, form_id, table="Submissions", params=None, page_size=1000, session=None):
+    """Generator that pages through an OData feed for an ODK form (default: the Submissions table), following
+    the @odata.nextLink URL returned with each page, and yields each row as a dict.
+    Reference: https://docs.getodk.org/central-api-odata-endpoints/
+    """
+    http = session or requests
+    url = f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}.svc/{table}"
+    params = dict(params or {})
+    params.setdefault("$top", page_size)
+
+    while url:
+        resp = http.get(url, headers=auth_headers, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        yield from data["value"]
+        # The next page link includes all query parameters (including a skip token).
+        url = data.get("@odata.nextLink")
+        params = None
+
+
+def odata_datetime(value):
+    """Returns the passed-in aware datetime as a UTC OData datetime literal."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def get_submissions_metadata(auth_headers, project_id, form_id, since=None, session=None):
+    """Returns metadata about all submissions to an ODK form, as a list of dicts.
+    If `since` is passed in, only submissions created or updated at or after that datetime are requested, using
+    a server-side filter on the OData Submissions feed. Rows are returned in the same shape as the REST endpoint.
+    """
+    http = session or requests
+    if not since:
+        resp = http.get(f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions", headers=auth_headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    timestamp = odata_datetime(since)
+    params = {
+        "$filter": f"__system/submissionDate ge {timestamp} or __system/updatedAt ge {timestamp}",
+        "$select": "__id,__system",
+    }
+    return [
+        {
+            "instanceId": row["__id"],
+            "createdAt": row["__system"]["submissionDate"],
+            "updatedAt": row["__system"]["updatedAt"],
+            "reviewState": row["__system"]["reviewState"],
+        }
+        for row in get_odata_rows(auth_headers, project_id, form_id, params=params, session=session)
+    ]
+
+
+def get_submissions_watermark(submissions_metadata):
+    """Returns the latest created/updated timestamp in a list of submission metadata, or None if the list is empty."""
+    timestamps = [parser.isoparse(metadata["updatedAt"] or metadata["createdAt"]) for metadata in submissions_metadata]
+    return max(timestamps, default=None)
 
 
-def get_submission(auth_headers, project_id, form_id, instance_id):
+def get_submission(auth_headers, project_id, form_id, instance_id, session=None):
     """Returns data for a single submission, parsed as a dict."""
-    resp = requests.get(f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions/{instance_id}.xml", headers=auth_headers)
+    http = session or requests
+    resp = http.get(f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions/{instance_id}.xml", headers=auth_headers)
     resp.raise_for_status()
 
     try:
@@ -74,29 +141,164 @@ def get_submission(auth_headers, project_id, form_id, instance_id):
     return data
 
 
-def get_form_submission_data(auth_headers, project_id, form_id, skip_existing=True, skip_rejected=True):
-    """Returns submission data for an ODK form, as JSON.
-    Skips records that have already been imported by default.
-    Skips records that are in "rejected" state in ODK, by default.
+def get_submissions(auth_headers, project_id, form_id, instance_ids, max_workers=None, session=None):
+    """Download submission data for each of the passed-in instance IDs concurrently, using a bounded pool of
+    worker threads sharing a single HTTP session. Returns a list of submissions in the same order as `instance_ids`.
     """
-    # Get submission metadata for the form.
-    submissions_metadata = get_submissions_metadata(auth_headers, project_id, form_id)
+    if not max_workers:
+        max_workers = settings.ODK_API_MAX_WORKERS
+    if not session:
+        session = get_session(max_workers)
 
-    # Get individual submission data records.
-    submission_data = []
+    def fetch(instance_id):
+        return get_submission(auth_headers, project_id, form_id, instance_id, session=session)
+
+    # Executor.map returns results in the order that the inputs were submitted, and re-raises any exception.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, instance_ids))
+
+
+def get_imported_source_ids(source_ids, queryset=None, field="source_id", chunk_size=1000):
+    """Returns the subset of the passed-in source IDs that are already present in the local database, as a set.
+    Lookups are made in chunks of `chunk_size` IDs, against `field` on `queryset` (default: ODK-sourced Encounters).
+    """
+    if queryset is None:
+        queryset = Encounter.objects.filter(source="odk")
+    source_ids = list(source_ids)
+    imported = set()
+    for i in range(0, len(source_ids), chunk_size):
+        chunk = source_ids[i : i + chunk_size]
+        imported.update(queryset.filter(**{f"{field}__in": chunk}).values_list(field, flat=True))
+    return imported
+
+
+def filter_submissions_metadata(
+    submissions_metadata,
+    skip_existing=True,
+    skip_rejected=True,
+    imported_queryset=None,
+    imported_field="source_id",
+):
+    """Returns the list of instance IDs in the passed-in submission metadata which should be downloaded.
+    Skips records that have already been imported by default; existing records are those having a matching
+    `imported_field` value in `imported_queryset` (default: ODK-sourced Encounters, matched on source_id).
+    Skips records that are in "rejected" state in ODK, by default.
+    """
+    # Query the set of records already present in the local database once, up front.
+    if skip_existing:
+        imported = get_imported_source_ids(
+            [metadata["instanceId"] for metadata in submissions_metadata],
+            queryset=imported_queryset,
+            field=imported_field,
+        )
+    else:
+        imported = set()
+
+    instance_ids = []
     for metadata in submissions_metadata:
-        if skip_existing:  # Check to see if record is already present in the local database.
-            if Encounter.objects.filter(source="odk", source_id=metadata["instanceId"]).exists():
-                continue
+        if metadata["instanceId"] in imported:
+            continue
 
         if skip_rejected and metadata["reviewState"] == "rejected":
             logger.info("skipping rejected: " + metadata["instanceId"])
             continue
 
-        submission = get_submission(auth_headers, project_id, form_id, metadata["instanceId"])
-        submission_data.append(submission)
+        instance_ids.append(metadata["instanceId"])
+
+    return instance_ids
+
+
+def get_form_submission_data(
+    auth_headers,
+    project_id,
+    form_id,
+    skip_existing=True,
+    skip_rejected=True,
+    max_workers=None,
+    imported_queryset=None,
+    imported_field="source_id",
+    submissions_metadata=None,
+):
+    """Returns submission data for an ODK form, as JSON.
+    Skips records that have already been imported, or which are in "rejected" state in ODK, by default
+    (see `filter_submissions_metadata`).
+    Submissions are downloaded concurrently by up to `max_workers` threads (default: settings.ODK_API_MAX_WORKERS).
+    Optionally pass in `submissions_metadata` that has already been downloaded (e.g. filtered to recent submissions).
+    """
+    session = get_session(max_workers)
+    # Get submission metadata for the form.
+    if submissions_metadata is None:
+        submissions_metadata = get_submissions_metadata(auth_headers, project_id, form_id, session=session)
+
+    # Determine which individual submission data records to download.
+    instance_ids = filter_submissions_metadata(
+        submissions_metadata,
+        skip_existing=skip_existing,
+        skip_rejected=skip_rejected,
+        imported_queryset=imported_queryset,
+        imported_field=imported_field,
+    )
+
+    return get_submissions(auth_headers, project_id, form_id, instance_ids, max_workers=max_workers, session=session)
+
+
+def get_odata_submissions(auth_headers, project_id, form_id, since=None, page_size=500, session=None):
+    """Generator that pages through the OData Submissions feed for an ODK form, yielding each submission as
+    a dict (repeat groups are expanded inline). If `since` is passed in, only submissions created or updated
+    at or after that datetime are requested.
+    """
+    params = {"$expand": "*"}
+    if since:
+        timestamp = odata_datetime(since)
+        params["$filter"] = f"__system/submissionDate ge {timestamp} or __system/updatedAt ge {timestamp}"
+    yield from get_odata_rows(auth_headers, project_id, form_id, params=params, page_size=page_size, session=session)
+
+
+def get_odata_submission_metadata(row):
+    """Returns the metadata for an OData submission row, in the same shape as the REST submissions endpoint."""
+    return {
+        "instanceId": row["__id"],
+        "createdAt": row["__system"]["submissionDate"],
+        "updatedAt": row["__system"]["updatedAt"],
+        "reviewState": row["__system"]["reviewState"],
+    }
+
 
-    return submission_data
+def parse_odata_value(value):
+    """Convert a value from an OData submission into the form that parsing the submission XML would give:
+    numbers become strings, GeoJSON points become ODK geopoint strings, OData annotations are removed and
+    groups or repeats that hold no values (i.e. which would be absent from the XML) are returned empty.
+    Fields missing from a submission's form version are null in OData and are kept as None, so callers
+    should test a field's value rather than the presence of its key.
+    """
+    if isinstance(value, dict):
+        if value.get("type") == "Point" and "coordinates" in value:
+            longitude, latitude, *altitude = value["coordinates"]
+            accuracy = (value.get("properties") or {}).get("accuracy")
+            return f"{latitude} {longitude} {altitude[0] if altitude else 0.0} {accuracy if accuracy is not None else 0.0}"
+        data = {}
+        for key, child in value.items():
+            if key.startswith("__") or "@odata" in key:
+                continue
+            child = parse_odata_value(child)
+            if isinstance(child, (dict, list)) and not child:
+                continue
+            data[key] = child
+        return data if any(v is not None for v in data.values()) else {}
+    elif isinstance(value, list):
+        return [item for item in (parse_odata_value(item) for item in value) if item]
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def parse_odata_submission(row):
+    """Parse an OData submission row into a dict shaped like the one returned by `get_submission`."""
+    data = parse_odata_value(row)
+    data.setdefault("meta", {})["instanceID"] = row["__id"]
+    return data
 
 
 def parse_geopoint(geopoint):
@@ -117,18 +319,48 @@ def parse_geopoint_accuracy(geopoint):
     return geopoint[-1]
 
 
-def get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename):
+def get_submission_attachment(auth_headers, project_id, form_id, instance_id, filename, session=None, chunk_size=65536):
     """Download a single attachment for a given form submission and return it as a Django File object.
+    The response body is streamed to a temporary file in chunks, rather than being read into memory.
     Reference: https://odkcentral.docs.apiary.io/#reference/submissions/attachments/downloading-an-attachment
     """
-    resp = requests.get(
-        f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions/{instance_id}/attachments/{filename}", headers=auth_headers
-    )
-    resp.raise_for_status()
-
-    # Response will be the attachment body.
+    http = session or requests
     tempfile = TemporaryFile()
-    tempfile.write(resp.content)  # Turn the downloaded content into a Python file.
+    with http.get(
+        f"{ODK_API_URL}/projects/{project_id}/forms/{form_id}/submissions/{instance_id}/attachments/{filename}",
+        headers=auth_headers,
+        stream=True,
+    ) as resp:
+        resp.raise_for_status()
+        # Response will be the attachment body.
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            tempfile.write(chunk)
+    tempfile.seek(0)
     file = File(tempfile, name=filename)  # Pass that to a Django File.
 
     return file
+
+
+def get_submission_attachments(auth_headers, project_id, form_id, attachments, max_workers=None, session=None):
+    """Download attachments for form submissions concurrently, using a bounded pool of worker threads sharing
+    a single HTTP session. `attachments` is a list of (instance_id, filename) tuples.
+    Generator that yields a tuple of (index in `attachments`, Django File or None, exception or None) as each
+    download completes. At most a few downloads per worker are held in temporary files at any one time.
+    """
+    if not max_workers:
+        max_workers = settings.ODK_API_MAX_WORKERS
+    if not session:
+        session = get_session(max_workers)
+    window = max_workers * 4
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(attachments), window):
+            futures = {
+                executor.submit(get_submission_attachment, auth_headers, project_id, form_id, instance_id, filename, session): index
+                for index, (instance_id, filename) in enumerate(attachments[start : start + window], start)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
@@ -35,7 +35,7 @@ from observations.api import (
     LightSourceObservationDetailResource,
     DisturbanceObservationListResource,
     DisturbanceObservationDetailResource,
-    # nests_tracks_streaming_json,
+    NestsTracksResource,
 )
 
 # from turtle_tags.api import (
@@ -49,7 +49,7 @@ from users.api import UserListResource, UserDetailResource
 
 urlpatterns = [
     # observations
-    # path('nestAndTracks/', nests_tracks_streaming_json, name='nestAndTracks'),
+    path("nestAndTracks/", NestsTracksResource.as_view(), name="nestAndTracks"),
     # path('taggedTurtles/', tagviews.taggedTurtles, name='taggedTurtles'),
     path("", ObservationsResourceSummary.as_view(), name="observations_resource_summary"),
     path("area-diagnostics/", AreaDiagnostics.as_view(), name="area_diagnostics"),
@@ -330,6 +330,17 @@ ODK_API_URL = os.environ.get("ODK_API_URL", "url")
 ODK_API_EMAIL = os.environ.get("ODK_API_EMAIL", "email")
 ODK_API_PASSWORD = os.environ.get("ODK_API_PASSWORD", "pass")
 ODK_API_PROJECTID = os.environ.get("ODK_API_PROJECTID", "-1")
+# Maximum number of concurrent requests made to ODK Central when downloading submissions.
+ODK_API_MAX_WORKERS = env("ODK_API_MAX_WORKERS", 8)
+# Optional path of a gzipped snapshot of the nests and tracks feed, refreshed after each ODK import.
+NESTS_TRACKS_SNAPSHOT = env("NESTS_TRACKS_SNAPSHOT", "")
+# Number of minutes for which a completed export job's file is reused by identical export requests.
+# Edits which the export fingerprint doesn't detect are included in exports requested after this time.
+EXPORT_JOB_MAX_AGE = env("EXPORT_JOB_MAX_AGE", 30)
+# Number of days after which export jobs and their files are deleted by the run_export_jobs management command.
+EXPORT_JOB_RETENTION_DAYS = env("EXPORT_JOB_RETENTION_DAYS", 7)
+# XLSX downloads of more rows than this are run as export jobs, since the workbook is written in full before responding.
+EXPORT_XLSX_MAX_ROWS = env("EXPORT_XLSX_MAX_ROWS", 20000)
 
 
 # Phone number
@@ -1,16 +1,36 @@
+import csv
+import io
+import json
 import re
+import tempfile
 import uuid
 from collections import namedtuple
 from datetime import date, datetime
+from decimal import Decimal
 from functools import reduce
+from itertools import islice
 from urllib import parse
 
+from django.conf import settings
 from django.contrib.admin import site
 from django.contrib.admin.widgets import AdminFileWidget
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis.db import models
-from django.db.models import Q
-from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction as db_transaction
+from django.db.models import Count, Max, Q
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
 from django.utils.text import smart_split
@@ -20,10 +40,15 @@ from django_filters import CharFilter
 from django_fsm import FSMField, transition
 from django_fsm_log.admin import StateLogInline
 from django_fsm_log.decorators import fsm_log_by, fsm_log_description
+from django_fsm_log.models import StateLog
 from import_export.formats import base_formats
 from import_export.resources import Resource
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from reversion.models import Revision
 
 Breadcrumb = namedtuple("Breadcrumb", ["name", "url"])
+TransitionCounts = namedtuple("TransitionCounts", ["transitioned", "skipped"])
 
 
 def sanitize_tag_label(label_string):
@@ -123,15 +148,72 @@ class DetailViewBreadcrumbMixin(BreadcrumbContextMixin, View):
         )
 
 
+def iter_csv(rows, chunk_size=1000):
+    """Yield the passed-in rows as CSV text, in chunks of `chunk_size` rows."""
+    rows = iter(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    while chunk := list(islice(rows, chunk_size)):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_xlsx(rows, file):
+    """Write the passed-in rows to a file as a single XLSX worksheet, using a write-only workbook
+    (rows are written to disk as they are appended, instead of being held in memory).
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    for row in rows:
+        worksheet.append([xlsx_cell_value(value) for value in row])
+    workbook.save(file)
+
+
+def xlsx_cell_value(value):
+    """Return an exported value in a form that can be written to an XLSX cell."""
+    if value is None or isinstance(value, (bool, int, float, Decimal, date)):
+        if isinstance(value, datetime) and timezone.is_aware(value):
+            # Excel does not support timezones.
+            return timezone.make_naive(value)
+        return value
+    return ILLEGAL_CHARACTERS_RE.sub("", str(value))
+
+
+def change_fingerprint():
+    """Return a string which changes when any record changes QA status (a StateLog is written, including by
+    bulk transitions), or is saved within a django-reversion revision (edits in the admin and other views).
+    Changes made by other queryset updates are not detected: reused export files expire after
+    EXPORT_JOB_MAX_AGE minutes to bound how stale they can be.
+    """
+    transition = StateLog.objects.aggregate(last=Max("pk"))["last"]
+    revision = Revision.objects.aggregate(last=Max("pk"))["last"]
+    return f"{transition}:{revision}"
+
+
 class ResourceDownloadMixin:
     """Copy of the ResourceDownloadMixin class from django-export-download to add XLSX as a format option.
     Reference: https://github.com/soerenbe/django-export-download/blob/master/export_download/views/__init__.py
 
+    CSV downloads are streamed: the queryset is exported in chunks and written to the response incrementally.
+    XLSX downloads are written to a temporary file via a write-only workbook, so memory use does not grow with the
+    number of rows, but the response only starts once the whole workbook has been written. XLSX downloads of more
+    than EXPORT_XLSX_MAX_ROWS rows are therefore run as export jobs. Other formats are exported into a tablib Dataset.
+
+    Adding the `background` GET parameter to a download queues an export job instead (see observations.exports),
+    and redirects to the job's page.
+
     TODO: add an R resource format download (i.e. .rds).
     """
 
     resource_class = None
     resource_formats = ["csv", "xlsx"]
+    streaming_formats = ["csv", "xlsx"]
+    csv_chunk_size = 1000
+    export_job_parameter = "background"
+    # Whether export jobs depend on the requesting user (otherwise, identical requests share export files).
+    export_job_per_user = False
     resource_class_parameter = "resource_class"
     resource_format_parameter = "resource_format"
     _resource_format_map = {
@@ -193,8 +275,15 @@ class ResourceDownloadMixin:
                 # we use it to display it as a description
                 description = getattr(resource_class, "description", resource_class.__name__)
                 resource_links[f.lower()].append([link, description])
+                resource_links[f.lower()].append([f"{link}&{self.export_job_parameter}", f"{description} (background export)"])
         return resource_links
 
+    def get_resource_queryset(self, resource_class, queryset):
+        """Return the queryset to be exported by the passed-in resource class, given the filtered queryset of
+        the view's model. Override this for resource classes exporting a different model.
+        """
+        return queryset
+
     def _to_url_params(self, d):
         """Return a kwarg in GET parameter format"""
         return self._download_parameter + "&" + "&".join("{}={}".format(k, v) for k, v in d.items())
@@ -208,6 +297,44 @@ class ResourceDownloadMixin:
         self._sanity_check()
         if self.request.method != "GET":
             return HttpResponseNotAllowed(["GET"])
+        resource_class, resource_format = self.get_download_options()
+
+        selected_format = self._resource_format_map[resource_format]
+        qs = self.get_download_queryset(resource_class)
+
+        if self.export_job_parameter in self.request.GET or (
+            resource_format == "xlsx" and qs.order_by().count() > settings.EXPORT_XLSX_MAX_ROWS
+        ):
+            # Run the export out of the request cycle. Imported here to avoid a circular import.
+            from observations.exports import submit_export_job
+
+            job = submit_export_job(self)
+            return HttpResponseRedirect(job.get_absolute_url())
+
+        filename = self.get_export_filename()
+
+        if resource_format == "csv" and resource_format in self.streaming_formats:
+            response = StreamingHttpResponse(
+                iter_csv(self.iter_export_rows(resource_class(), qs), self.csv_chunk_size), content_type=selected_format.CONTENT_TYPE
+            )
+            response["Content-Disposition"] = "attachment; filename={}".format(filename)
+            return response
+        elif resource_format == "xlsx" and resource_format in self.streaming_formats:
+            # The workbook is written in full before responding. FileResponse then streams the file in blocks
+            # and closes (deleting) the temporary file when done.
+            xlsx_file = tempfile.TemporaryFile()
+            write_xlsx(self.iter_export_rows(resource_class(), qs), xlsx_file)
+            xlsx_file.seek(0)
+            return FileResponse(xlsx_file, as_attachment=True, filename=filename, content_type=selected_format.CONTENT_TYPE)
+
+        export = resource_class().export(qs)
+        res = getattr(export, selected_format.__name__.lower())
+        response = HttpResponse(res, content_type=selected_format.CONTENT_TYPE)
+        response["Content-Disposition"] = "attachment; filename={}".format(filename)
+        return response
+
+    def get_download_options(self):
+        """Return the resource class and resource format requested by the GET parameters."""
         # We use the first resource class and first resource format as a default when there are no parameters.
         resource_class = self.request.GET.get(self.resource_class_parameter, 0)
         resource_format = self.request.GET.get(self.resource_format_parameter, self.resource_formats[0])
@@ -224,35 +351,86 @@ class ResourceDownloadMixin:
             raise Http404("Parameter {} must be an integer".format(self.resource_class_parameter))
         if resource_class_number >= len(self._get_resource_classes()):
             raise Http404("Parameter {}.{} does not exist".format(self.__class__.__name__, self.resource_class_parameter))
+        return self._get_resource_classes()[resource_class_number], resource_format
 
+    def get_download_queryset(self, resource_class):
+        """Return the queryset to be exported by the passed-in resource class, filtered by the GET parameters."""
         qs = self.model.objects.all()
         # If filter_class is defined try to filter against it.
         # You need django-filter to use this feature.
         if hasattr(self, "filter_class"):
             if self.filter_class:
                 qs = self.filter_class(self.request.GET, queryset=qs).qs
-        resource_class = self._get_resource_classes()[resource_class_number]
-        export = resource_class().export(qs)
-        res = getattr(export, selected_format.__name__.lower())
-        response = HttpResponse(res, content_type=selected_format.CONTENT_TYPE)
-        # Give the response attachment a sane filename.
-        response["Content-Disposition"] = "attachment; filename={}_{}_{}.{}".format(
+        return self.get_resource_queryset(resource_class, qs)
+
+    def get_export_filename(self):
+        """Give the download attachment a sane filename."""
+        resource_class, resource_format = self.get_download_options()
+        return "{}_{}_{}.{}".format(
             resource_class._meta.model._meta.model_name,
             date.today().isoformat(),
             datetime.now().strftime("%H%M"),
-            selected_format.__name__.lower(),
+            self._resource_format_map[resource_format].__name__.lower(),
         )
-        return response
+
+    def get_export_fingerprint(self):
+        """Return a string which changes when the rows of the requested export are added or removed, or when
+        records are changed (see change_fingerprint()).
+        Export jobs with the same GET parameters and fingerprint reuse the same file.
+        """
+        resource_class, _ = self.get_download_options()
+        stats = self.get_download_queryset(resource_class).order_by().aggregate(count=Count("pk"), last=Max("pk"))
+        return "{count}:{last}:{changes}".format(changes=change_fingerprint(), **stats)
+
+    def write_export(self, file):
+        """Write the requested export to the passed-in binary file (used by export jobs)."""
+        resource_class, resource_format = self.get_download_options()
+        qs = self.get_download_queryset(resource_class)
+        if resource_format == "csv":
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            for chunk in iter_csv(self.iter_export_rows(resource_class(), qs), self.csv_chunk_size):
+                text.write(chunk)
+            text.flush()
+            text.detach()
+        elif resource_format == "xlsx":
+            write_xlsx(self.iter_export_rows(resource_class(), qs), file)
+        else:
+            export = resource_class().export(qs)
+            res = getattr(export, self._resource_format_map[resource_format].__name__.lower())
+            file.write(res.encode("utf-8") if isinstance(res, str) else res)
+
+    def iter_export_rows(self, resource, queryset):
+        """Yield the export headers of the passed-in resource, then the exported row of each object in
+        the queryset. Objects are fetched in chunks rather than loading the whole queryset.
+        """
+        yield resource.get_export_headers()
+        queryset = resource.filter_export(queryset)
+        for obj in resource.iter_queryset(queryset):
+            yield resource.export_resource(obj)
 
 
 class ListResourceView(ListView):
     """Generic API list view, having filtering and pagination options as request params.
     Extend with a `model` and `serializer` class.
+
+    By default, results are paginated using `offset` and `limit`. Optional modes:
+
+    * `after=<id>`: keyset pagination, returning `limit` objects with a primary key greater than `id`
+      (ordered by primary key, without a count). Pass `after=` to request the first page.
+    * `format=ndjson` or `format=geojson`: stream all matching objects (optionally starting `after` an id
+      and up to `limit` objects) from a database cursor, as newline-delimited JSON or a GeoJSON FeatureCollection.
+    * `render=db` (with `format`): render each object as JSON text in the database instead of Python, if the
+      serializer defines `serialize_db` (timestamps are then rendered in UTC).
     """
 
     http_method_names = ["get", "options", "trace"]
     model = None
     serializer = None
+    stream_formats = {
+        "ndjson": "application/x-ndjson",
+        "geojson": "application/geo+json",
+    }
+    stream_chunk_size = 1000
 
     def dispatch(self, request, *args, **kwargs):
         # NOTE: handle any required user access authorisation in this method.
@@ -267,6 +445,15 @@ class ListResourceView(ListView):
                 int(request.GET["limit"])
             except:
                 return HttpResponseBadRequest()
+        if "after" in request.GET and request.GET["after"]:
+            try:
+                int(request.GET["after"])
+            except:
+                return HttpResponseBadRequest()
+        if "format" in request.GET and request.GET["format"] not in self.stream_formats:
+            return HttpResponseBadRequest()
+        if "render" in request.GET and (request.GET["render"] != "db" or not hasattr(self.serializer, "serialize_db")):
+            return HttpResponseBadRequest()
 
         return super().dispatch(request, *args, **kwargs)
 
@@ -290,6 +477,11 @@ class ListResourceView(ListView):
     def get(self, request, *args, **kwargs):
         queryset = self.get_queryset()
 
+        if "format" in request.GET:
+            return self.get_streaming_response(queryset)
+        if "after" in request.GET:
+            return self.get_keyset_response(queryset)
+
         # Pagination logic.
         count = queryset.count()
         if "offset" in request.GET and request.GET["offset"]:
@@ -328,11 +520,85 @@ class ListResourceView(ListView):
             "features": [],
         }
 
-        for obj in queryset:
-            objects["features"].append(self.serializer.serialize(obj))
+        objects["features"] = list(self.serialize_queryset(queryset))
+
+        return JsonResponse(objects)
+
+    def serialize_queryset(self, queryset, chunk_size=None):
+        """Yield the serialised objects in the queryset, read from a database cursor in chunks if `chunk_size` is passed.
+        Serializers defining `serialize_values` serialise rows of field values instead of model instances.
+        """
+        if hasattr(self.serializer, "serialize_values"):
+            return self.serializer.serialize_values(queryset, chunk_size=chunk_size)
+        if chunk_size:
+            queryset = queryset.iterator(chunk_size=chunk_size)
+        return (self.serializer.serialize(obj) for obj in queryset)
+
+    def filter_after(self, queryset):
+        """Order the queryset by primary key, starting after the `after` request param (if any)."""
+        queryset = queryset.order_by("pk")
+        if self.request.GET.get("after"):
+            queryset = queryset.filter(pk__gt=int(self.request.GET["after"]))
+        return queryset
+
+    def get_keyset_response(self, queryset):
+        """Return one page of objects following the `after` primary key, with a link to the next page.
+        The cost of each page is constant, because no count or offset is required.
+        """
+        if "limit" in self.request.GET and self.request.GET["limit"]:
+            limit = int(self.request.GET["limit"])
+        else:
+            limit = 100  # Default limit
+
+        # Query one extra primary key to find out if there is a next page.
+        pks = list(self.filter_after(queryset).values_list("pk", flat=True)[: limit + 1])
+        if len(pks) > limit:
+            pks = pks[:limit]
+            next_url = replace_query_param(self.request.build_absolute_uri(), "after", pks[-1])
+        else:
+            next_url = None
+
+        objects = {
+            "type": "FeatureCollection",
+            "next": next_url,
+            "features": list(self.serialize_queryset(queryset.filter(pk__in=pks).order_by("pk"))),
+        }
 
         return JsonResponse(objects)
 
+    def get_streaming_response(self, queryset):
+        """Return a response that serialises objects as they are read from a server-side cursor."""
+        queryset = self.filter_after(queryset)
+        if "limit" in self.request.GET and self.request.GET["limit"]:
+            queryset = queryset[: int(self.request.GET["limit"])]
+        stream_format = self.request.GET["format"]
+
+        return StreamingHttpResponse(self.stream(queryset, stream_format), content_type=self.stream_formats[stream_format])
+
+    def stream(self, queryset, stream_format):
+        """Yield the serialised objects in the queryset as NDJSON lines, or as a GeoJSON FeatureCollection.
+        Objects are joined into one block of text per chunk read from the database cursor.
+        """
+        if self.request.GET.get("render") == "db":
+            # The database returns each object as JSON text, which is passed straight through.
+            objects = self.serializer.serialize_db(queryset, chunk_size=self.stream_chunk_size)
+        else:
+            objects = self.serialize_queryset(queryset, chunk_size=self.stream_chunk_size)
+            objects = (json.dumps(obj, cls=DjangoJSONEncoder) for obj in objects)
+
+        if stream_format == "geojson":
+            yield '{"type": "FeatureCollection", "features": ['
+        separator = "\n" if stream_format == "ndjson" else ","
+        first_chunk = True
+        while chunk := list(islice(objects, self.stream_chunk_size)):
+            if stream_format == "ndjson":
+                yield separator.join(chunk) + separator
+            else:
+                yield separator.join(chunk) if first_chunk else separator + separator.join(chunk)
+            first_chunk = False
+        if stream_format == "geojson":
+            yield "]}"
+
 
 class DetailResourceView(DetailView):
     """Generic API detail (single object) view.
@@ -508,6 +774,135 @@ class UrlsMixin(models.Model):
         )
 
 
+class JobMixin(models.Model):
+    """Mixin class recording the status, timings and outcome of a job run outside of the request cycle
+    (e.g. by a management command or a worker process).
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0, help_text="The number of times that this job has been started.")
+    error = models.TextField(blank=True, null=True, help_text="The exception raised by the most recent failed attempt.")
+
+    class Meta:
+        abstract = True
+
+    @property
+    def duration(self):
+        """Return the run time of the most recent attempt as a timedelta, or None if not finished."""
+        if self.started and self.finished:
+            return self.finished - self.started
+        return None
+
+    def start(self):
+        """Mark this job as running."""
+        self.status = self.STATUS_RUNNING
+        self.started = timezone.now()
+        self.finished = None
+        self.error = None
+        self.attempts += 1
+        self.save()
+
+    def complete(self):
+        """Mark this job as completed."""
+        self.status = self.STATUS_COMPLETED
+        self.finished = timezone.now()
+        self.save()
+
+    def fail(self, error):
+        """Mark this job as failed, recording the passed-in error message."""
+        self.status = self.STATUS_FAILED
+        self.finished = timezone.now()
+        self.error = error
+        self.save()
+
+
+class BulkTransitionMixin(object):
+    """QuerySet mixin to apply a django-fsm transition to every object in a queryset at once."""
+
+    def bulk_transition(self, transition, by=None, description=None, chunk_size=5000):
+        """Apply the named transition to each object in the queryset whose state is a source of the transition.
+
+        Each chunk of objects is locked and has its state checked in SQL, then the state is updated with one
+        query per target state, and a StateLog row is bulk created for each object transitioned.
+        Objects aren't saved, so model save() methods and signals are bypassed, and transition conditions
+        aren't checked: use the transition method of each object where either is required.
+        Returns the number of objects transitioned, and skipped because of their state.
+        """
+        meta = getattr(self.model, transition)._django_fsm
+        field = meta.field if isinstance(meta.field, str) else meta.field.name
+        # Check the state of each object in SQL, unless the transition has a wildcard source state.
+        if "*" in meta.transitions or "+" in meta.transitions:
+            filters = Q()
+        else:
+            filters = Q(**{f"{field}__in": list(meta.transitions)})
+        values = [field, "polymorphic_ctype_id"] if hasattr(self.model, "polymorphic_ctype_id") else [field]
+        content_type_id = ContentType.objects.get_for_model(self.model).pk
+        pks = iter(self.values_list("pk", flat=True))
+        transitioned = skipped = 0
+
+        while chunk := list(islice(pks, chunk_size)):
+            with db_transaction.atomic():
+                objects = (
+                    self.model._default_manager.filter(pk__in=chunk)
+                    .filter(filters)
+                    .select_for_update(of=("self",))
+                    .values_list("pk", *values)
+                )
+                updates = {}
+                logs = []
+                for pk, source, *ctype_id in objects:
+                    if not meta.has_transition(source):
+                        continue
+                    target = meta.get_transition(source).target
+                    if not isinstance(target, str):
+                        raise ValueError(f"The {transition} transition has a dynamic target state, and can't be applied in bulk")
+                    updates.setdefault(target, []).append(pk)
+                    logs.append(
+                        StateLog(
+                            by=by,
+                            source_state=source,
+                            state=target,
+                            transition=transition,
+                            content_type_id=ctype_id[0] if ctype_id else content_type_id,
+                            object_id=pk,
+                            description=description,
+                        )
+                    )
+                for target, target_pks in updates.items():
+                    self.model._default_manager.filter(pk__in=target_pks).update(**{field: target})
+                StateLog.objects.bulk_create(logs)
+                self.bulk_transitioned(logs)
+            transitioned += len(logs)
+            skipped += len(chunk) - len(logs)
+
+        return TransitionCounts(transitioned, skipped)
+
+    def bulk_transitioned(self, logs):
+        """Hook called with the StateLog rows of each chunk of objects transitioned by bulk_transition(), within
+        its transaction. Override this to do the work of any signal receivers bypassed by the bulk update.
+        """
+        pass
+
+
+class BulkTransitionQuerySet(BulkTransitionMixin, models.QuerySet):
+    pass
+
+
 class QualityControlMixin(models.Model):
     """Mixin class for QA status levels with django-fsm transitions.
 
@@ -548,6 +943,8 @@ class QualityControlMixin(models.Model):
 
     status = FSMField(default=STATUS_NEW, choices=STATUS_CHOICES, verbose_name="QA Status")
 
+    objects = BulkTransitionQuerySet.as_manager()
+
     class Meta:
         abstract = True
 